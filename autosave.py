@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from store_paths import STORE_ROOT
+from file_io import atomicWrite
+
+RECOVERY_DIR = os.path.join(STORE_ROOT, "recovery")
+AUTOSAVE_DELAY = 2000
+AUTO_SNAPSHOT_INTERVAL = 300
+SNAPSHOT_MESSAGE = "Auto-snapshot"
+
+
+def pathKey(filePath):
+    return hashlib.sha256(os.path.abspath(filePath).encode('utf-8')).hexdigest()[:32]
+
+
+def recoveryFileName(key):
+    return os.path.join(RECOVERY_DIR, f"{key}.recovery")
+
+
+def writeRecovery(key, filePath, content):
+    # One JSON header line followed by the buffer text.
+    os.makedirs(RECOVERY_DIR, exist_ok=True)
+    header = json.dumps({"key": key, "path": filePath, "savedAt": time.time()})
+    atomicWrite(recoveryFileName(key), header + "\n" + content)
+
+
+def readRecovery(fileName):
+    with open(fileName, 'r', encoding='utf-8') as recoveryFile:
+        header = json.loads(recoveryFile.readline())
+        return header, recoveryFile.read()
+
+
+def listRecoveryFiles():
+    # (fileName, header) of every recovery file left behind, oldest first.
+    try:
+        names = os.listdir(RECOVERY_DIR)
+    except OSError:
+        return []
+    found = []
+    for name in names:
+        if not name.endswith(".recovery"):
+            continue
+        fileName = os.path.join(RECOVERY_DIR, name)
+        try:
+            with open(fileName, 'r', encoding='utf-8') as recoveryFile:
+                header = json.loads(recoveryFile.readline())
+        except (OSError, ValueError):
+            continue
+        found.append((fileName, header))
+    found.sort(key=lambda item: item[1].get("savedAt", 0))
+    return found
+
+
+def removeRecovery(key):
+    try:
+        os.remove(recoveryFileName(key))
+    except OSError:
+        pass
+
+
+class AutosaveWorker(QThread):
+    autosaveFailed = pyqtSignal(str)
+    snapshotStored = pyqtSignal(str)
+
+    def __init__(self, key, filePath, content, revision, writeRecoveryFile, snapshotParent, takeSnapshot, parent=None):
+        super().__init__(parent)
+        self.key = key
+        self.filePath = filePath
+        self.content = content
+        self.revision = revision
+        self.writeRecoveryFile = writeRecoveryFile
+        self.snapshotParent = snapshotParent
+        self.takeSnapshot = takeSnapshot
+
+    def run(self):
+        try:
+            if self.writeRecoveryFile:
+                writeRecovery(self.key, self.filePath, self.content)
+            if self.takeSnapshot:
+                from version_store import defaultStore
+                # Content identical to the newest version is not stored again.
+                if defaultStore.hashContent(self.content) != self.snapshotParent:
+                    self.snapshotStored.emit(defaultStore.put(self.content, parent=self.snapshotParent))
+        except Exception as e:
+            self.autosaveFailed.emit(str(e))
+
+
+class Autosaver(QObject):
+    # Per-tab autosave. Edits restart a short idle timer; when it fires the
+    # buffer is written to the recovery area (and, if enabled, stored as a
+    # version at most every AUTO_SNAPSHOT_INTERVAL seconds) on a worker thread.
+    # Work is keyed on the document revision, so a tab nobody edits costs nothing.
+    snapshotTaken = pyqtSignal(str)
+    autosaveFailed = pyqtSignal(str)
+
+    def __init__(self, tab, parent=None):
+        super().__init__(parent)
+        self.tab = tab
+        self.untitledKey = f"untitled-{uuid.uuid4().hex}"
+        self.snapshotsEnabled = False
+        self.lastSnapshot = time.monotonic()
+        self.cleanRevision = tab.editor.document().revision()
+        self.handledRevision = self.cleanRevision
+        self.savingRevision = None
+        self.writtenKeys = set()
+        self.worker = None
+        self.pending = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(AUTOSAVE_DELAY)
+        self.timer.timeout.connect(self.autosave)
+        tab.editor.changesCoalescedSignal.connect(self.onEdited)
+
+    def key(self):
+        return pathKey(self.tab.currentFile) if self.tab.currentFile else self.untitledKey
+
+    def onEdited(self, *args):
+        self.timer.start()
+
+    def markClean(self, revision=None):
+        # The buffer at `revision` matches the file on disk, so any recovery
+        # copy up to that point is obsolete.
+        self.cleanRevision = self.tab.editor.document().revision() if revision is None else revision
+        self.handledRevision = max(self.handledRevision, self.cleanRevision)
+        if self.worker is None:
+            self.removeRecoveryFiles()
+
+    def removeRecoveryFiles(self):
+        for key in self.writtenKeys:
+            removeRecovery(key)
+        self.writtenKeys.clear()
+
+    def autosave(self):
+        tab = self.tab
+        revision = tab.editor.document().revision()
+        if revision == self.handledRevision or tab.loading:
+            return
+        if self.worker is not None:
+            self.pending = True
+            return
+
+        # Snapshots only extend files that already have a history.
+        takeSnapshot = (self.snapshotsEnabled and bool(tab.currentFile) and not tab.partiallyLoaded
+                        and bool(tab.versionHistory)
+                        and time.monotonic() - self.lastSnapshot >= AUTO_SNAPSHOT_INTERVAL)
+        writeRecoveryFile = revision != self.cleanRevision
+        if not writeRecoveryFile and not takeSnapshot:
+            self.handledRevision = revision
+            return
+
+        key = self.key()
+        if writeRecoveryFile:
+            self.writtenKeys.add(key)
+        if takeSnapshot:
+            self.lastSnapshot = time.monotonic()
+        self.handledRevision = revision
+        self.worker = AutosaveWorker(key, tab.currentFile, tab.editor.toPlainText(), revision,
+                                     writeRecoveryFile, tab.latestVersionHash(), takeSnapshot, self)
+        self.worker.snapshotStored.connect(self.onSnapshotStored)
+        self.worker.autosaveFailed.connect(self.autosaveFailed)
+        self.worker.finished.connect(self.onWorkerFinished)
+        self.worker.start()
+
+    def onSnapshotStored(self, digest):
+        if digest != self.tab.latestVersionHash() and self.tab.addVersionEntry(digest, SNAPSHOT_MESSAGE):
+            self.snapshotTaken.emit(self.tab.currentFile)
+
+    def onWorkerFinished(self):
+        worker = self.worker
+        self.worker = None
+        worker.deleteLater()
+        if worker.revision <= self.cleanRevision:
+            self.removeRecoveryFiles()
+        if self.pending:
+            self.pending = False
+            self.autosave()
+
+    def shutdown(self):
+        self.timer.stop()
+        if self.worker is not None:
+            self.worker.wait()
@@ -0,0 +1,369 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import itertools
+import argparse
+import subprocess
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_line_diff import generateLines, mutate
+
+DEFAULT_SIZES = "1K,64K,1M,16M,256M,1G"
+UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+BLOCK_LINES = 25000
+WAIT_TIMEOUT = 600
+GUTTER_PAINTS = 200
+TERMINAL_CHUNK = 64 << 10
+# Benchmarks that need an editable buffer are skipped for files the editor
+# opens in the read-only large file viewer.
+EDITABLE_ONLY = {"saveFile", "saveVersion", "compareWithVersion"}
+
+
+def parseSize(text):
+    text = text.strip().upper()
+    if text[-1:] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def formatSize(size):
+    for unit in ("G", "M", "K"):
+        if size >= UNITS[unit] and size % UNITS[unit] == 0:
+            return f"{size // UNITS[unit]}{unit}"
+    return str(size)
+
+
+def generateFile(dataDir, size, seed=1):
+    # Deterministic for a given (size, seed), so runs on different machines or
+    # commits time the same bytes. Generated files are reused between runs.
+    filePath = os.path.join(dataDir, f"synthetic-{formatSize(size)}-{seed}.log")
+    if os.path.exists(filePath) and os.path.getsize(filePath) == size:
+        return filePath
+    block = ("\n".join(generateLines(BLOCK_LINES, seed)) + "\n").encode('utf-8')
+    with open(filePath + ".tmp", 'wb') as dataFile:
+        written = 0
+        while written < size:
+            chunk = block[:size - written]
+            dataFile.write(chunk)
+            written += len(chunk)
+    os.replace(filePath + ".tmp", filePath)
+    return filePath
+
+
+def resetPeakRss():
+    # Linux lets a process reset its high-water mark, giving a per-benchmark peak.
+    try:
+        with open("/proc/self/clear_refs", 'w') as clearRefs:
+            clearRefs.write("5")
+    except OSError:
+        pass
+
+
+def peakRss():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def gitRevision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Suite:
+    # Drives a real TextEditor on the offscreen platform. Asynchronous
+    # operations are timed until their completion is visible to the GUI
+    # thread, i.e. until the user would see the result.
+    def __init__(self, args):
+        from PyQt5.QtWidgets import QApplication
+        self.app = QApplication.instance() or QApplication(sys.argv[:1])
+        from text_editor import TextEditor
+        self.editor = TextEditor(lazyStartup=False, sessionPath=None)
+        self.editor.resize(1280, 800)
+        self.editor.show()
+        self.args = args
+        self.workDir = tempfile.mkdtemp(prefix="tracktext-bench-work-")
+        self.selected = set(args.only.split(",")) if args.only else None
+        self.results = []
+        self.processEvents()
+
+    def processEvents(self):
+        self.app.processEvents()
+
+    def waitFor(self, condition, timeout=WAIT_TIMEOUT):
+        deadline = time.perf_counter() + timeout
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("benchmark step did not finish")
+            self.app.processEvents()
+            time.sleep(0.0005)
+        self.app.processEvents()
+
+    def wanted(self, name):
+        return self.selected is None or name in self.selected
+
+    def record(self, name, params, run):
+        # run() performs one repetition and returns (seconds, metrics).
+        if not self.wanted(name):
+            return
+        resetPeakRss()
+        seconds = []
+        metrics = {}
+        for _ in range(self.args.repeat):
+            elapsed, metrics = run()
+            seconds.append(elapsed)
+        result = {"name": name, "params": params, "seconds": seconds, "median": median(seconds),
+                  "min": min(seconds), "peakRssBytes": peakRss(), **metrics}
+        self.results.append(result)
+        extra = "".join(f"  {key}={value}" for key, value in metrics.items())
+        print(f"{name:<28}{json.dumps(params):<36}{result['median'] * 1000:>12.2f} ms"
+              f"{result['peakRssBytes'] / (1 << 20):>10.1f} MB{extra}", file=sys.stderr)
+
+    def openTab(self, filePath):
+        from editor_tab import EditorTab
+        self.editor.openFile(filePath)
+        tab = self.editor.tabWidget.currentWidget()
+        if isinstance(tab, EditorTab):
+            self.waitFor(lambda: not tab.loading)
+        else:
+            self.waitFor(lambda: tab.index.complete)
+        return tab
+
+    def closeTab(self, tab):
+        index = self.editor.tabWidget.indexOf(tab)
+        if index != -1:
+            self.editor.closeTab(index)
+        tab.deleteLater()
+        self.processEvents()
+
+    def benchOpenFile(self, filePath, params):
+        def run():
+            start = time.perf_counter()
+            tab = self.openTab(filePath)
+            elapsed = time.perf_counter() - start
+            self.closeTab(tab)
+            return elapsed, {}
+        self.record("openFile", params, run)
+
+    def benchEditing(self, dataPath, params):
+        # Edited and saved in a copy, so the generated file stays reusable.
+        filePath = shutil.copy(dataPath, self.workDir)
+        tab = self.openTab(filePath)
+        cursor = tab.editor.textCursor()
+
+        def save():
+            cursor.insertText("x")
+            start = time.perf_counter()
+            self.editor.saveFile()
+            self.waitFor(lambda: not self.editor.saveQueue.isSaving(filePath))
+            return time.perf_counter() - start, {}
+        self.record("saveFile", params, save)
+
+        base = tab.editor.toPlainText()
+        revisions = itertools.count()
+
+        def commit():
+            content = f"{base}revision {next(revisions)}\n"
+            start = time.perf_counter()
+            tab.saveVersion(content, "benchmark")
+            return time.perf_counter() - start, {}
+        self.record("saveVersion", params, commit)
+
+        from version_cache import versionCache
+        lines = base.splitlines()
+        tab.editor.setPlainText("\n".join(mutate(lines, self.args.edits, seed=len(lines))) if lines else "")
+
+        def diff():
+            versionCache.clear()
+            start = time.perf_counter()
+            self.editor.compareWithVersion(tab, len(tab.versionHistory) - 1)
+            self.waitFor(lambda: self.editor.diffView.worker is None)
+            return time.perf_counter() - start, {}
+        self.record("compareWithVersion", params, diff)
+        self.closeTab(tab)
+        os.remove(filePath)
+
+    def benchHistoryPanel(self, filePath):
+        from history_catalog import defaultCatalog, PAGE_SIZE
+        from version_store import defaultStore
+        entries = self.args.history_entries
+        path = defaultCatalog.normalizePath(filePath)
+        missing = entries - defaultCatalog.ensureFile(path)
+        if missing > 0:
+            with open(filePath, 'r', encoding='utf-8') as dataFile:
+                digest = defaultStore.put(dataFile.read())
+            for offset in range(0, missing, PAGE_SIZE):
+                defaultCatalog.appendMany([(path, "20240101000000", f"entry {offset + i}", digest)
+                                           for i in range(min(PAGE_SIZE, missing - offset))])
+        tab = self.openTab(filePath)
+        historyList = self.editor.versionHistoryList
+
+        def run():
+            start = time.perf_counter()
+            tab.loadVersionHistory()
+            self.editor.updateVersionHistoryPanel()
+            self.processEvents()
+            historyList.scrollToBottom()
+            self.processEvents()
+            return time.perf_counter() - start, {}
+        self.record("updateVersionHistoryPanel", {"entries": entries}, run)
+        self.closeTab(tab)
+
+    def benchGutter(self, filePath, params):
+        tab = self.openTab(filePath)
+        editor = tab.editor
+        scrollBar = editor.verticalScrollBar()
+        step = max(1, scrollBar.maximum() // GUTTER_PAINTS)
+
+        def run():
+            start = time.perf_counter()
+            for paint in range(GUTTER_PAINTS):
+                scrollBar.setValue(paint * step)
+                editor.lineNumberArea.repaint()
+            elapsed = time.perf_counter() - start
+            return elapsed, {"msPerPaint": round(elapsed * 1000 / GUTTER_PAINTS, 3)}
+        self.record("gutterPaint", params, run)
+        self.closeTab(tab)
+
+    def benchTerminal(self):
+        # Output is fed straight into the widget, as the backend would deliver
+        # it, so the measurement does not depend on the shell or the pty.
+        from terminal_widget import TerminalWidget
+        terminal = TerminalWidget()
+        terminal.resize(1000, 400)
+        terminal.show()
+        total = self.args.terminal_mb << 20
+        lines = [f"\x1b[32mINFO\x1b[0m {line}" for line in generateLines(BLOCK_LINES, seed=7)]
+        chunk = ("\r\n".join(lines) + "\r\n").encode('utf-8')[:TERMINAL_CHUNK]
+
+        def run():
+            start = time.perf_counter()
+            for _ in range(total // len(chunk)):
+                terminal.readOutput(chunk)
+                self.processEvents()
+            terminal.flushOutput()
+            self.processEvents()
+            elapsed = time.perf_counter() - start
+            return elapsed, {"mbPerSecond": round(total / (1 << 20) / elapsed, 1)}
+        self.record("terminalOutput", {"megabytes": self.args.terminal_mb}, run)
+        terminal.close()
+
+    def run(self, sizes, dataDir):
+        from large_file_viewer import LARGE_FILE_THRESHOLD
+        wanted = self.wanted
+        for size in sizes:
+            filePath = generateFile(dataDir, size)
+            params = {"size": formatSize(size)}
+            if wanted("openFile"):
+                self.benchOpenFile(filePath, params)
+            if size < LARGE_FILE_THRESHOLD and any(wanted(name) for name in EDITABLE_ONLY):
+                self.benchEditing(filePath, params)
+        smallFile = generateFile(dataDir, UNITS["K"], seed=2)
+        if wanted("updateVersionHistoryPanel"):
+            self.benchHistoryPanel(smallFile)
+        if wanted("gutterPaint"):
+            self.benchGutter(generateFile(dataDir, UNITS["M"]), {"size": "1M"})
+        if wanted("terminalOutput"):
+            self.benchTerminal()
+        self.editor.close()
+
+
+def resultKey(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(baselineFile, currentFile, threshold):
+    # Flags benchmarks whose median time or peak RSS grew by more than threshold.
+    with open(baselineFile) as baselineInput:
+        baseline = {resultKey(result): result for result in json.load(baselineInput)["results"]}
+    with open(currentFile) as currentInput:
+        current = json.load(currentInput)["results"]
+
+    regressions = 0
+    print(f"{'benchmark':<28}{'params':<24}{'baseline ms':>12}{'current ms':>12}{'change':>9}{'rss':>9}")
+    for result in current:
+        old = baseline.get(resultKey(result))
+        if old is None:
+            continue
+        change = result["median"] / old["median"] - 1 if old["median"] else 0.0
+        rssChange = result["peakRssBytes"] / old["peakRssBytes"] - 1 if old["peakRssBytes"] else 0.0
+        flags = []
+        if change > threshold:
+            flags.append("SLOWER")
+        elif change < -threshold:
+            flags.append("faster")
+        if rssChange > threshold:
+            flags.append("MORE MEMORY")
+        if "SLOWER" in flags or "MORE MEMORY" in flags:
+            regressions += 1
+        params = ",".join(f"{key}={value}" for key, value in result["params"].items())
+        print(f"{result['name']:<28}{params:<24}{old['median'] * 1000:>12.2f}{result['median'] * 1000:>12.2f}"
+              f"{change:>+9.1%}{rssChange:>+9.1%}  {' '.join(flags)}")
+    print(f"{regressions} regression(s) above {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark editor and version-control hot paths headlessly.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated file sizes, e.g. 1K,1M,1G")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--edits", type=int, default=200, help="line edits between the buffer and the diffed version")
+    parser.add_argument("--history-entries", type=int, default=10000)
+    parser.add_argument("--terminal-mb", type=int, default=16)
+    parser.add_argument("--only", help="comma-separated benchmark names to run")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "tracktext-bench-data"),
+                        help="where synthetic files are generated and kept")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change reported as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold))
+
+    # The editor keeps its store, catalog and session under the home
+    # directory; a fresh one keeps runs independent of each other and of the user.
+    home = tempfile.mkdtemp(prefix="tracktext-bench-home-")
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    sizes = [parseSize(size) for size in args.sizes.split(",")]
+    suite = Suite(args)
+    suite.run(sizes, args.data_dir)
+
+    from PyQt5.QtCore import QT_VERSION_STR
+    report = {
+        "meta": {"revision": gitRevision(), "python": platform.python_version(), "qt": QT_VERSION_STR,
+                 "platform": platform.platform(), "machine": platform.machine(), "cpus": os.cpu_count(),
+                 "repeat": args.repeat, "startedAt": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": suite.results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import random
+import difflib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import line_diff
+
+REPEATED_LINES = ["", "{", "}", "    }", "    return;", "INFO  [main] heartbeat ok"]
+
+
+def generateLines(count, seed):
+    # Source/log-like text: a large share of blank lines, braces and prefixes.
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        if rng.random() < 0.4:
+            lines.append(rng.choice(REPEATED_LINES))
+        else:
+            lines.append(f"INFO  [worker-{i % 16}] request {i} took {rng.randint(1, 900)} ms")
+    return lines
+
+
+def mutate(lines, edits, seed):
+    rng = random.Random(seed)
+    result = list(lines)
+    for _ in range(edits):
+        position = rng.randrange(len(result))
+        choice = rng.random()
+        if choice < 0.3:
+            del result[position]
+        elif choice < 0.6:
+            result.insert(position, rng.choice(REPEATED_LINES))
+        else:
+            result[position] = f"WARN  edited line {rng.randint(0, 1 << 30)}"
+    return result
+
+
+def timeIt(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare line_diff against difflib.unified_diff.")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--difflib-max-lines", type=int, default=100000,
+                        help="skip difflib above this size; it can take many minutes")
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'difflib (s)':>12} {'line_diff (s)':>14} {'speedup':>8} {'diff lines':>11}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        old = generateLines(size, seed=size)
+        new = mutate(old, args.edits, seed=size + 1)
+
+        fastTime, fastDiff = timeIt(lambda: list(line_diff.unifiedDiff(old, new, lineterm="")))
+        if size <= args.difflib_max_lines:
+            slowTime, _ = timeIt(lambda: list(difflib.unified_diff(old, new, lineterm="")))
+            slow = f"{slowTime:12.3f}"
+            speedup = f"{slowTime / fastTime:7.1f}x"
+        else:
+            slow = f"{'skipped':>12}"
+            speedup = f"{'-':>8}"
+        print(f"{size:>10} {slow} {fastTime:14.3f} {speedup} {len(fastDiff):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import os
+import zlib
+import hashlib
+import threading
+from array import array
+from line_diff import iterOpcodes
+from store_paths import STORE_ROOT
+from file_io import replaceFile
+from history_catalog import HistoryCatalog, readEntryContent
+
+BLAME_ROOT = os.path.join(STORE_ROOT, "blame")
+CHECKPOINT_INTERVAL = 64
+UNCOMMITTED = -1
+
+# path -> (seq, key, origins, lines) for the newest version blamed in this process.
+latestOrigins = {}
+latestOriginsLock = threading.Lock()
+
+
+def extendOrigins(previousOrigins, oldLines, newLines, seq, isCancelled=None):
+    # Lines the diff matches keep their origin; everything else was introduced by `seq`.
+    origins = array('i', [seq]) * len(newLines)
+    for tag, i1, i2, j1, j2 in iterOpcodes(oldLines, newLines, isCancelled):
+        if tag == 'equal':
+            origins[j1:j2] = previousOrigins[i1:i2]
+    return origins
+
+
+def entryKey(entry):
+    return entry.get("hash") or f"legacy{entry['timestamp']}"
+
+
+def blameDirectory(root, path):
+    return os.path.join(root, hashlib.sha256(path.encode('utf-8')).hexdigest()[:32])
+
+
+def invalidateBlame(filePath, seq, root=None):
+    # Origin maps from `seq` on were derived from a version that has been amended.
+    path = HistoryCatalog.normalizePath(filePath)
+    with latestOriginsLock:
+        cached = latestOrigins.get(path)
+        if cached is not None and cached[0] >= seq:
+            del latestOrigins[path]
+    directory = blameDirectory(root or BLAME_ROOT, path)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if name.split("-", 1)[0].isdigit() and int(name.split("-", 1)[0]) >= seq:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+class BlameEngine:
+    # For each version, origins[i] is the seq of the commit that last changed
+    # line i. A version's map is its predecessor's map plus one diff, so maps
+    # are only ever extended: the newest one is kept in memory and on disk,
+    # together with a checkpoint every CHECKPOINT_INTERVAL versions to resume
+    # from after an amend.
+    def __init__(self, root=None, catalog=None):
+        self.root = root or BLAME_ROOT
+        self.catalog = catalog
+
+    def getCatalog(self):
+        if self.catalog is None:
+            self.catalog = HistoryCatalog()
+        return self.catalog
+
+    def close(self):
+        if self.catalog is not None:
+            self.catalog.close()
+
+    def storedOrigins(self, path):
+        # (seq, key, fileName) of every map on disk, newest first.
+        directory = blameDirectory(self.root, path)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return []
+        stored = []
+        for name in names:
+            seq, _, key = name.partition("-")
+            if seq.isdigit() and key:
+                stored.append((int(seq), key, os.path.join(directory, name)))
+        stored.sort(reverse=True)
+        return stored
+
+    def loadOrigins(self, fileName):
+        try:
+            with open(fileName, 'rb') as originFile:
+                origins = array('i')
+                origins.frombytes(zlib.decompress(originFile.read()))
+                return origins
+        except (OSError, zlib.error, ValueError):
+            return None
+
+    def saveOrigins(self, path, seq, entry, origins):
+        directory = blameDirectory(self.root, path)
+        os.makedirs(directory, exist_ok=True)
+        fileName = os.path.join(directory, f"{seq:08d}-{entryKey(entry)}")
+        replaceFile(fileName, zlib.compress(origins.tobytes(), 1))
+        # Only checkpoints and the newest map are kept.
+        for storedSeq, _, storedName in self.storedOrigins(path):
+            if storedSeq < seq and storedSeq % CHECKPOINT_INTERVAL:
+                try:
+                    os.remove(storedName)
+                except OSError:
+                    pass
+
+    def originsAt(self, filePath, seq, isCancelled=None):
+        # Returns (origins, lines) for version `seq`.
+        path = HistoryCatalog.normalizePath(filePath)
+        catalog = self.getCatalog()
+        target = catalog.entryAt(path, seq)
+        if target is None:
+            raise IndexError(f"version {seq} out of range")
+
+        with latestOriginsLock:
+            cached = latestOrigins.get(path)
+        if cached is not None and cached[0] == seq and cached[1] == entryKey(target):
+            return cached[2], cached[3]
+
+        # Resume from the newest map at or before `seq` that still belongs to
+        # the version it was computed for.
+        start = None
+        if cached is not None and cached[0] < seq and cached[1] == entryKey(catalog.entryAt(path, cached[0])):
+            start, origins, lines = cached[0], cached[2], cached[3]
+        for storedSeq, key, fileName in self.storedOrigins(path):
+            if start is not None and storedSeq <= start:
+                break
+            if storedSeq > seq:
+                continue
+            entry = catalog.entryAt(path, storedSeq)
+            if entry is None or entryKey(entry) != key:
+                continue
+            loaded = self.loadOrigins(fileName)
+            if loaded is None:
+                continue
+            lines = readEntryContent(path, entry).splitlines()
+            if len(loaded) == len(lines):
+                start, origins = storedSeq, loaded
+                break
+        if start is None:
+            first = catalog.entryAt(path, 0)
+            lines = readEntryContent(path, first).splitlines()
+            start, origins = 0, array('i', [0]) * len(lines)
+            self.saveOrigins(path, 0, first, origins)
+
+        entry = catalog.entryAt(path, start)
+        for entry in catalog.page(path, start + 1, seq - start):
+            newLines = readEntryContent(path, entry).splitlines()
+            origins = extendOrigins(origins, lines, newLines, entry["seq"], isCancelled)
+            lines = newLines
+            if entry["seq"] % CHECKPOINT_INTERVAL == 0:
+                self.saveOrigins(path, entry["seq"], entry, origins)
+        if start < seq and seq % CHECKPOINT_INTERVAL:
+            self.saveOrigins(path, seq, entry, origins)
+
+        with latestOriginsLock:
+            current = latestOrigins.get(path)
+            if current is None or current[0] <= seq:
+                latestOrigins[path] = (seq, entryKey(entry), origins, lines)
+        return origins, lines
+
+    def blameLines(self, filePath, bufferLines, isCancelled=None):
+        # Origins for the lines of an unsaved buffer: the newest version's map
+        # plus one diff, with lines not in any version marked UNCOMMITTED.
+        path = HistoryCatalog.normalizePath(filePath)
+        count = self.getCatalog().count(path)
+        if count == 0:
+            return array('i', [UNCOMMITTED]) * len(bufferLines)
+        origins, lines = self.originsAt(path, count - 1, isCancelled)
+        return extendOrigins(origins, lines, bufferLines, UNCOMMITTED, isCancelled)
@@ -0,0 +1,30 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from blame_engine import BlameEngine
+from line_diff import DiffCancelled
+
+
+class BlameWorker(QThread):
+    blameReady = pyqtSignal(object)
+    blameFailed = pyqtSignal(str)
+
+    def __init__(self, filePath, content, parent=None):
+        super().__init__(parent)
+        self.filePath = filePath
+        self.content = content
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        engine = BlameEngine()
+        try:
+            origins = engine.blameLines(self.filePath, self.content.splitlines(), lambda: self.cancelled)
+        except DiffCancelled:
+            return
+        except Exception as e:
+            self.blameFailed.emit(str(e))
+            return
+        finally:
+            engine.close()
+        self.blameReady.emit(origins)
@@ -1,22 +1,60 @@
-import os
-import json
-import difflib
+import math
+import time
+from collections import namedtuple
 from PyQt5.QtWidgets import QPlainTextEdit, QTextEdit
-from PyQt5.QtCore import pyqtSignal, Qt, QRect  # <-- Import QRect here
-from PyQt5.QtGui import QColor, QPainter, QTextCharFormat, QTextCursor, QFont
-from line_number_area import LineNumberArea
+from PyQt5.QtCore import pyqtSignal, Qt, QRect, QTimer, QEvent  # <-- Import QRect here
+from PyQt5.QtGui import QColor, QPainter, QTextCursor, QFont, QFontMetrics, QPixmap, QTextFormat
+from line_number_area import LineNumberArea, BlameArea
+from instrumentation import recorder
+
+# A single document edit: `removed` characters at `position` were replaced by `text`.
+TextChange = namedtuple("TextChange", ["position", "removed", "added", "text"])
+
+DEFAULT_COALESCE_INTERVAL = 150
+
+GUTTER_PADDING = 6
+MIN_GUTTER_DIGITS = 3
+GUTTER_BACKGROUND = QColor(30, 30, 30)
+GUTTER_FOREGROUND = QColor(128, 128, 128)
+BLAME_COLUMN_CHARS = 32
+BLAME_BACKGROUND = QColor(37, 37, 38)
+BLAME_FOREGROUND = QColor(150, 150, 150)
 
 class CodeEditor(QPlainTextEdit):
-    textChangedSignal = pyqtSignal(str)
+    textChangedSignal = pyqtSignal()
+    contentsChangedSignal = pyqtSignal(object)
+    dirtyBlocksSignal = pyqtSignal(int, int)
+    changesCoalescedSignal = pyqtSignal(list, int, int)
 
     def __init__(self):
         super().__init__()
+        self.pendingChanges = []
+        self.pendingFirstBlock = None
+        self.pendingLastBlock = None
+        self.trackChanges = True
+        self.coalesceTimer = QTimer(self)
+        self.coalesceTimer.setSingleShot(True)
+        self.coalesceTimer.timeout.connect(self.flushChanges)
+        self.setCoalesceInterval(DEFAULT_COALESCE_INTERVAL)
+        # perf_counter() of the oldest keystroke not yet painted, while instrumented.
+        self.keystrokeStarted = None
+
         self.lineNumberArea = LineNumberArea(self)
+        self.gutterWidth = 0
+        # Optional blame column left of the line numbers: blameOrigins[i] is the
+        # version that last changed block i, blameLabel turns it into text.
+        self.blameArea = BlameArea(self)
+        self.blameArea.hide()
+        self.blameWidth = 0
+        self.blameOrigins = None
+        self.blameLabel = None
+        self.blameTexts = {}
+        self.updateGutterMetrics()
         self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
         self.updateRequest.connect(self.updateLineNumberArea)
         self.cursorPositionChanged.connect(self.highlightCurrentLine)
-        self.textChanged.connect(self.emitTextChanged)
-        self.updateLineNumberAreaWidth(0)
+        self.textChanged.connect(self.textChangedSignal)
+        self.document().contentsChange.connect(self.onContentsChange)
 
         # Setting the font and style
         self.setFont(QFont("Consolas", 10))
@@ -30,45 +68,161 @@ class CodeEditor(QPlainTextEdit):
             }
         """)
 
+    def updateGutterMetrics(self):
+        # Everything the gutter needs from the font is computed here, once per font
+        # change: line height, digit advance and one pre-rendered pixmap per digit.
+        metrics = QFontMetrics(self.font())
+        self.gutterLineHeight = metrics.height()
+        self.gutterDigitWidth = max(metrics.horizontalAdvance(digit) for digit in "0123456789")
+        ratio = self.devicePixelRatioF()
+        self.digitGlyphs = []
+        for digit in "0123456789":
+            glyph = QPixmap(math.ceil(self.gutterDigitWidth * ratio), math.ceil(self.gutterLineHeight * ratio))
+            glyph.setDevicePixelRatio(ratio)
+            glyph.fill(Qt.transparent)
+            glyphPainter = QPainter(glyph)
+            glyphPainter.setFont(self.font())
+            glyphPainter.setPen(GUTTER_FOREGROUND)
+            glyphPainter.drawText(QRect(0, 0, self.gutterDigitWidth, self.gutterLineHeight), Qt.AlignCenter, digit)
+            glyphPainter.end()
+            self.digitGlyphs.append(glyph)
+        self.gutterWidth = 0
+        self.blameTexts = {}
+        if self.blameOrigins is not None:
+            self.blameWidth = metrics.averageCharWidth() * BLAME_COLUMN_CHARS
+        self.updateLineNumberAreaWidth(0)
+        self.lineNumberArea.update()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.FontChange:
+            self.updateGutterMetrics()
+
     def lineNumberAreaWidth(self):
-        return 50  # Fixed width in pixels
+        digits = max(MIN_GUTTER_DIGITS, len(str(self.blockCount())))
+        return 2 * GUTTER_PADDING + self.gutterDigitWidth * digits
 
     def updateLineNumberAreaWidth(self, _):
-        self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
+        width = self.lineNumberAreaWidth()
+        if width == self.gutterWidth:
+            return
+        self.gutterWidth = width
+        self.updateViewportMargins()
 
-    def updateLineNumberArea(self, rect, dy):
-        if dy:
-            self.lineNumberArea.scroll(0, dy)
-        else:
-            self.lineNumberArea.update(0, rect.y(), self.lineNumberArea.width(), rect.height())
+    def updateViewportMargins(self):
+        self.setViewportMargins(self.blameWidth + self.gutterWidth, 0, 0, 0)
+        self.layoutGutters()
+
+    def layoutGutters(self):
+        cr = self.contentsRect()
+        self.blameArea.setGeometry(QRect(cr.left(), cr.top(), self.blameWidth, cr.height()))
+        self.lineNumberArea.setGeometry(QRect(cr.left() + self.blameWidth, cr.top(), self.gutterWidth, cr.height()))
 
-        if rect.contains(self.viewport().rect()):
-            self.updateLineNumberAreaWidth(0)
+    def updateLineNumberArea(self, rect, dy):
+        areas = (self.lineNumberArea, self.blameArea) if self.blameOrigins is not None else (self.lineNumberArea,)
+        for area in areas:
+            if dy:
+                area.scroll(0, dy)
+            else:
+                area.update(0, rect.y(), area.width(), rect.height())
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
-        cr = self.contentsRect()
-        self.lineNumberArea.setGeometry(QRect(cr.left(), cr.top(), self.lineNumberAreaWidth(), cr.height()))
+        self.layoutGutters()
+
+    def keyPressEvent(self, event):
+        # Keys without text (bare modifiers) may never cause a paint.
+        if recorder.enabled and self.keystrokeStarted is None and event.text():
+            self.keystrokeStarted = time.perf_counter()
+        super().keyPressEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.keystrokeStarted is not None:
+            recorder.recordDuration("keystrokeToPaint", self.keystrokeStarted)
+            self.keystrokeStarted = None
 
     def lineNumberAreaPaintEvent(self, event):
+        started = time.perf_counter() if recorder.enabled else None
         painter = QPainter(self.lineNumberArea)
-        painter.fillRect(event.rect(), QColor(30, 30, 30))
+        dirty = event.rect()
+        painter.fillRect(dirty, GUTTER_BACKGROUND)
 
+        glyphs = self.digitGlyphs
+        digitWidth = self.gutterDigitWidth
+        right = self.lineNumberArea.width() - GUTTER_PADDING
         block = self.firstVisibleBlock()
         blockNumber = block.blockNumber()
-        top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
-        bottom = top + int(self.blockBoundingRect(block).height())
-
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(blockNumber + 1)
-                painter.setPen(QColor(128, 128, 128))
-                painter.drawText(0, top, self.lineNumberArea.width(), self.fontMetrics().height(),
-                                 Qt.AlignCenter, number)
+        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        dirtyTop, dirtyBottom = dirty.top(), dirty.bottom()
 
+        # Only blocks intersecting the dirty band are drawn, one pixmap blit per digit.
+        while block.isValid() and top <= dirtyBottom:
+            bottom = top + self.blockBoundingRect(block).height()
+            if block.isVisible() and bottom >= dirtyTop:
+                x = right
+                y = int(top)
+                for digit in reversed(str(blockNumber + 1)):
+                    x -= digitWidth
+                    painter.drawPixmap(x, y, glyphs[ord(digit) - 48])
             block = block.next()
             top = bottom
-            bottom = top + int(self.blockBoundingRect(block).height())
+            blockNumber += 1
+        painter.end()
+        if started is not None:
+            recorder.recordDuration("gutterPaint", started)
+
+    def setBlameAnnotations(self, origins, label):
+        self.blameOrigins = origins
+        self.blameLabel = label
+        self.blameTexts = {}
+        self.blameWidth = QFontMetrics(self.font()).averageCharWidth() * BLAME_COLUMN_CHARS
+        self.updateViewportMargins()
+        self.blameArea.show()
+        self.blameArea.update()
+
+    def clearBlameAnnotations(self):
+        self.blameOrigins = None
+        self.blameLabel = None
+        self.blameTexts = {}
+        self.blameWidth = 0
+        self.blameArea.hide()
+        self.updateViewportMargins()
+
+    def blameAreaPaintEvent(self, event):
+        painter = QPainter(self.blameArea)
+        dirty = event.rect()
+        painter.fillRect(dirty, BLAME_BACKGROUND)
+        origins = self.blameOrigins
+        if origins is None:
+            return
+        painter.setPen(BLAME_FOREGROUND)
+        metrics = QFontMetrics(self.font())
+        textWidth = self.blameWidth - 2 * GUTTER_PADDING
+
+        block = self.firstVisibleBlock()
+        blockNumber = block.blockNumber()
+        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        dirtyTop, dirtyBottom = dirty.top(), dirty.bottom()
+        previous = None
+
+        # Only visible blocks are labelled, and a run of lines from the same
+        # version shows its label once. Labels are built once per version.
+        while block.isValid() and top <= dirtyBottom:
+            height = self.blockBoundingRect(block).height()
+            if blockNumber >= len(origins):
+                break
+            origin = origins[blockNumber]
+            if block.isVisible() and top + height >= dirtyTop and origin != previous:
+                text = self.blameTexts.get(origin)
+                if text is None:
+                    text = metrics.elidedText(self.blameLabel(origin), Qt.ElideRight, textWidth)
+                    self.blameTexts[origin] = text
+                painter.drawText(QRect(GUTTER_PADDING, int(top), textWidth, int(height)),
+                                 Qt.AlignLeft | Qt.AlignVCenter, text)
+            previous = origin
+            block = block.next()
+            top += height
             blockNumber += 1
 
     def highlightCurrentLine(self):
@@ -85,22 +239,52 @@ class CodeEditor(QPlainTextEdit):
 
         self.setExtraSelections(extraSelections)
 
-    def displayDiff(self, diff_lines):
-        self.clear()
-        cursor = self.textCursor()
+    def setCoalesceInterval(self, interval):
+        # 0 emits changesCoalescedSignal after every edit instead of batching bursts.
+        self.coalesceTimer.setInterval(interval)
 
-        for line in diff_lines:
-            if line.startswith('+'):
-                cursor.insertText(line + '\n', self.getTextCharFormat(QColor(0, 180, 0)))  # Green for additions
-            elif line.startswith('-'):
-                cursor.insertText(line + '\n', self.getTextCharFormat(QColor(180, 0, 0)))  # Red for deletions
-            else:
-                cursor.insertText(line + '\n')
+    def setChangeTracking(self, enabled):
+        # Bulk inserts such as a streaming load are not edits; while tracking
+        # is off they are neither copied into pendingChanges nor signalled.
+        self.trackChanges = enabled
+
+    def onContentsChange(self, position, charsRemoved, charsAdded):
+        if not self.trackChanges:
+            return
+        document = self.document()
+        end = min(position + charsAdded, document.characterCount() - 1)
+        text = ""
+        if end > position:
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            text = cursor.selectedText().replace('\u2029', '\n')
 
-    def getTextCharFormat(self, color):
-        text_format = QTextCharFormat()
-        text_format.setForeground(color)
-        return text_format
+        change = TextChange(position, charsRemoved, charsAdded, text)
+        firstBlock = document.findBlock(position).blockNumber()
+        lastBlock = max(firstBlock, document.findBlock(end).blockNumber())
+        self.contentsChangedSignal.emit(change)
+        self.dirtyBlocksSignal.emit(firstBlock, lastBlock)
+
+        self.pendingChanges.append(change)
+        if self.pendingFirstBlock is None:
+            self.pendingFirstBlock, self.pendingLastBlock = firstBlock, lastBlock
+        else:
+            self.pendingFirstBlock = min(self.pendingFirstBlock, firstBlock)
+            self.pendingLastBlock = max(self.pendingLastBlock, lastBlock)
+
+        if self.coalesceTimer.interval() > 0:
+            self.coalesceTimer.start()
+        else:
+            self.flushChanges()
 
-    def emitTextChanged(self):
-        self.textChangedSignal.emit(self.toPlainText())
+    def flushChanges(self):
+        if not self.pendingChanges:
+            return
+        changes = self.pendingChanges
+        lastBlock = min(self.pendingLastBlock, self.blockCount() - 1)
+        firstBlock = min(self.pendingFirstBlock, lastBlock)
+        self.pendingChanges = []
+        self.pendingFirstBlock = self.pendingLastBlock = None
+        self.coalesceTimer.stop()
+        self.changesCoalescedSignal.emit(changes, firstBlock, lastBlock)
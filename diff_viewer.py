@@ -0,0 +1,263 @@
+import time
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QStackedWidget, QSplitter,
+    QCheckBox, QPushButton, QLabel, QApplication
+)
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QTextCharFormat, QTextCursor
+from diff_worker import DiffWorker
+from line_diff import formatUnified
+from instrumentation import recorder
+
+CONTEXT_LINES = 3
+FOLD_MARKER = "⋯ {} unchanged lines (click to expand)"
+
+
+def makeFormat(foreground, background=None, italic=False):
+    textFormat = QTextCharFormat()
+    textFormat.setForeground(foreground)
+    if background is not None:
+        textFormat.setBackground(background)
+    textFormat.setFontItalic(italic)
+    return textFormat
+
+
+class DiffTextView(QPlainTextEdit):
+    foldClicked = pyqtSignal(int, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.setFont(QFont("Consolas", 10))
+        self.setStyleSheet("""
+            QPlainTextEdit {
+                background-color: #1e1e1e;
+                color: #dfffff;
+                selection-background-color: #264f78;
+                border: 1px solid #000000;
+            }
+        """)
+        # Rows are appended through writeCursor. An empty document and one
+        # holding a single empty row look alike, hence rowsWritten.
+        self.writeCursor = None
+        self.rowsWritten = False
+
+    def mouseReleaseEvent(self, event):
+        super().mouseReleaseEvent(event)
+        # Fold markers are the only blocks carrying a user state.
+        block = self.cursorForPosition(event.pos()).block()
+        if block.userState() >= 0 and event.button() == Qt.LeftButton:
+            self.foldClicked.emit(block.userState(), block.blockNumber())
+
+
+class DiffView(QWidget):
+    # Read-only diff tab. The document is built from line_diff opcodes in one edit
+    # block per batch, one insertText per run of lines, with shared formats.
+    # Long unchanged runs are inserted only when their fold marker is expanded.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.currentFile = None
+        self.worker = None
+        self.diffStarted = None
+        self.oldLines = []
+        self.newLines = []
+        self.opcodes = []
+        self.folds = []
+        self.foldingEnabled = True
+
+        self.formats = {
+            'equal': makeFormat(QColor(223, 255, 255)),
+            'delete': makeFormat(QColor(230, 120, 120), QColor(60, 20, 20)),
+            'insert': makeFormat(QColor(120, 220, 120), QColor(20, 50, 20)),
+            'pad': makeFormat(QColor(80, 80, 80), QColor(40, 40, 40)),
+            'fold': makeFormat(QColor(128, 128, 128), italic=True),
+        }
+
+        self.layout = QVBoxLayout(self)
+        self.setupToolbar()
+        self.inlineView = DiffTextView(self)
+        self.leftView = DiffTextView(self)
+        self.rightView = DiffTextView(self)
+        splitter = QSplitter(Qt.Horizontal, self)
+        splitter.addWidget(self.leftView)
+        splitter.addWidget(self.rightView)
+        self.stack = QStackedWidget(self)
+        self.stack.addWidget(self.inlineView)
+        self.stack.addWidget(splitter)
+        self.layout.addWidget(self.stack)
+        self.setLayout(self.layout)
+
+        for view in (self.inlineView, self.leftView, self.rightView):
+            view.foldClicked.connect(self.expandFold)
+        self.syncScrollBars(self.leftView.verticalScrollBar(), self.rightView.verticalScrollBar())
+        self.syncScrollBars(self.leftView.horizontalScrollBar(), self.rightView.horizontalScrollBar())
+
+    def setupToolbar(self):
+        toolbar = QWidget(self)
+        toolbarLayout = QHBoxLayout(toolbar)
+        toolbarLayout.setContentsMargins(0, 0, 0, 0)
+        self.sideBySideCheck = QCheckBox("Side by side", toolbar)
+        self.sideBySideCheck.toggled.connect(self.setSideBySide)
+        expandButton = QPushButton("Expand All", toolbar)
+        expandButton.clicked.connect(lambda: self.setFoldingEnabled(False))
+        collapseButton = QPushButton("Collapse All", toolbar)
+        collapseButton.clicked.connect(lambda: self.setFoldingEnabled(True))
+        copyButton = QPushButton("Copy Unified Diff", toolbar)
+        copyButton.clicked.connect(self.copyUnifiedDiff)
+        self.statusLabel = QLabel(toolbar)
+        toolbarLayout.addWidget(self.sideBySideCheck)
+        toolbarLayout.addWidget(expandButton)
+        toolbarLayout.addWidget(collapseButton)
+        toolbarLayout.addWidget(copyButton)
+        toolbarLayout.addStretch()
+        toolbarLayout.addWidget(self.statusLabel)
+        self.layout.addWidget(toolbar)
+
+    @staticmethod
+    def syncScrollBars(first, second):
+        first.valueChanged.connect(lambda value: second.value() != value and second.setValue(value))
+        second.valueChanged.connect(lambda value: first.value() != value and first.setValue(value))
+
+    def activeViews(self):
+        if self.sideBySideCheck.isChecked():
+            return [self.leftView, self.rightView]
+        return [self.inlineView]
+
+    def startDiff(self, loadOldLines, newContent):
+        self.cancelDiff()
+        self.oldLines, self.newLines, self.opcodes = [], [], []
+        self.clearViews()
+        self.statusLabel.setText("Computing diff...")
+        self.diffStarted = time.perf_counter() if recorder.enabled else None
+        self.worker = DiffWorker(loadOldLines, newContent, self)
+        self.worker.linesReady.connect(self.onLinesReady)
+        self.worker.opcodesReady.connect(self.onOpcodesReady)
+        self.worker.diffFailed.connect(self.onDiffFailed)
+        self.worker.diffFinished.connect(self.onDiffFinished)
+        self.worker.start()
+
+    def cancelDiff(self):
+        if self.worker is None:
+            return
+        self.worker.linesReady.disconnect(self.onLinesReady)
+        self.worker.opcodesReady.disconnect(self.onOpcodesReady)
+        self.worker.diffFailed.disconnect(self.onDiffFailed)
+        self.worker.diffFinished.disconnect(self.onDiffFinished)
+        self.worker.cancel()
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker = None
+
+    def onLinesReady(self, oldLines, newLines):
+        self.oldLines, self.newLines = oldLines, newLines
+
+    def onOpcodesReady(self, opcodes):
+        self.opcodes.extend(opcodes)
+        self.renderOpcodes(opcodes)
+
+    def onDiffFailed(self, error):
+        self.statusLabel.setText(f"Failed to read the selected version: {error}")
+
+    def onDiffFinished(self, completed):
+        if completed and self.diffStarted is not None:
+            recorder.recordDuration("diff", self.diffStarted)
+        if completed:
+            changed = sum(1 for opcode in self.opcodes if opcode[0] != 'equal')
+            self.statusLabel.setText(f"{changed} changed regions" if changed else "No differences")
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker = None
+
+    def clearViews(self):
+        self.folds = []
+        for view in (self.inlineView, self.leftView, self.rightView):
+            view.clear()
+            view.rowsWritten = False
+
+    def rebuild(self):
+        self.clearViews()
+        self.renderOpcodes(self.opcodes)
+
+    def setSideBySide(self, enabled):
+        self.stack.setCurrentIndex(1 if enabled else 0)
+        self.rebuild()
+
+    def setFoldingEnabled(self, enabled):
+        self.foldingEnabled = enabled
+        self.rebuild()
+
+    def renderOpcodes(self, opcodes):
+        sideBySide = self.sideBySideCheck.isChecked()
+        views = self.activeViews()
+        for view in views:
+            view.writeCursor = QTextCursor(view.document())
+            view.writeCursor.movePosition(QTextCursor.End)
+            view.writeCursor.beginEditBlock()
+
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                self.renderEqual(views, i1, i2, sideBySide)
+            elif sideBySide:
+                oldPart, newPart = self.oldLines[i1:i2], self.newLines[j1:j2]
+                padding = abs(len(oldPart) - len(newPart))
+                self.appendRun(views[0], oldPart, 'delete')
+                self.appendRun(views[1], newPart, 'insert')
+                self.appendRun(views[0 if len(oldPart) < len(newPart) else 1], [""] * padding, 'pad')
+            else:
+                self.appendRun(views[0], self.oldLines[i1:i2], 'delete', "-")
+                self.appendRun(views[0], self.newLines[j1:j2], 'insert', "+")
+
+        for view in views:
+            view.writeCursor.endEditBlock()
+            view.writeCursor = None
+
+    def renderEqual(self, views, i1, i2, sideBySide):
+        count = i2 - i1
+        if not self.foldingEnabled or count <= 2 * CONTEXT_LINES + 1:
+            self.appendEqual(views, i1, i2, sideBySide)
+            return
+        self.appendEqual(views, i1, i1 + CONTEXT_LINES, sideBySide)
+        foldId = len(self.folds)
+        foldStart = i1 + CONTEXT_LINES
+        foldEnd = i2 - CONTEXT_LINES
+        self.folds.append((foldStart, foldEnd))
+        for view in views:
+            self.appendRun(view, [FOLD_MARKER.format(foldEnd - foldStart)], 'fold')
+            view.writeCursor.block().setUserState(foldId)
+        self.appendEqual(views, foldEnd, i2, sideBySide)
+
+    def appendEqual(self, views, start, end, sideBySide):
+        lines = self.oldLines[start:end]
+        for view in views:
+            self.appendRun(view, lines, 'equal', "" if sideBySide else " ")
+
+    def appendRun(self, view, lines, kind, prefix=""):
+        if not lines:
+            return
+        text = "\n".join(prefix + line for line in lines) if prefix else "\n".join(lines)
+        if view.rowsWritten:
+            text = "\n" + text
+        view.rowsWritten = True
+        view.writeCursor.insertText(text, self.formats[kind])
+
+    def expandFold(self, foldId, blockNumber):
+        foldStart, foldEnd = self.folds[foldId]
+        prefix = "" if self.sideBySideCheck.isChecked() else " "
+        text = "\n".join(prefix + line for line in self.oldLines[foldStart:foldEnd])
+        for view in self.activeViews():
+            # Side-by-side views are padded to equal length, so a marker sits on
+            # the same block number in both.
+            block = view.document().findBlockByNumber(blockNumber)
+            if block.userState() != foldId:
+                continue
+            block.setUserState(-1)
+            cursor = QTextCursor(block)
+            cursor.beginEditBlock()
+            cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+            cursor.insertText(text, self.formats['equal'])
+            cursor.endEditBlock()
+
+    def copyUnifiedDiff(self):
+        lines = formatUnified(self.oldLines, self.newLines, self.opcodes,
+                              fromfile="Previous Version", tofile="Current Version", lineterm="")
+        QApplication.clipboard().setText("\n".join(lines))
@@ -0,0 +1,62 @@
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+from line_diff import iterOpcodes, DiffCancelled
+
+BATCH_INTERVAL = 0.05
+MAX_BATCH_OPCODES = 2000
+
+
+class DiffWorker(QThread):
+    linesReady = pyqtSignal(object, object)
+    opcodesReady = pyqtSignal(list)
+    diffFailed = pyqtSignal(str)
+    diffFinished = pyqtSignal(bool)
+
+    def __init__(self, loadOldLines, newContent, parent=None):
+        super().__init__(parent)
+        self.loadOldLines = loadOldLines
+        self.newContent = newContent
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            oldLines = self.loadOldLines()
+        except Exception as e:
+            self.diffFailed.emit(str(e))
+            self.diffFinished.emit(False)
+            return
+        # newContent is either the text or an already split sequence of lines.
+        newLines = self.newContent.splitlines() if isinstance(self.newContent, str) else self.newContent
+        self.linesReady.emit(oldLines, newLines)
+
+        # Opcodes are produced in file order. The first change is flushed as soon
+        # as it is found so it appears quickly; later ones arrive in timed batches.
+        batch = []
+        changeSent = False
+        lastEmit = time.monotonic()
+        try:
+            for opcode in iterOpcodes(oldLines, newLines, lambda: self.cancelled):
+                # Already matched opcodes can still be yielded after a cancel.
+                if self.cancelled:
+                    break
+                batch.append(opcode)
+                if (not changeSent and opcode[0] != 'equal') or len(batch) >= MAX_BATCH_OPCODES or \
+                        time.monotonic() - lastEmit >= BATCH_INTERVAL:
+                    changeSent = changeSent or opcode[0] != 'equal'
+                    self.opcodesReady.emit(batch)
+                    batch = []
+                    lastEmit = time.monotonic()
+        except DiffCancelled:
+            pass
+        except (OSError, ValueError) as e:
+            # Lines read from a mapping fail once its tab closes it.
+            self.diffFailed.emit(str(e))
+            self.diffFinished.emit(False)
+            return
+
+        if batch and not self.cancelled:
+            self.opcodesReady.emit(batch)
+        self.diffFinished.emit(not self.cancelled)
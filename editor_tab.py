@@ -1,75 +1,272 @@
-import os
-import json
+import time
 from datetime import datetime
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QListWidget, QMessageBox
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QMessageBox, QProgressBar, QPushButton
+)
+from PyQt5.QtGui import QTextCursor
 from code_editor import CodeEditor
+from file_loader import FileLoadWorker
+from version_history_model import VersionHistoryModel
+from version_cache import versionCache, versionKey
+from autosave import Autosaver
+from syntax_highlighter import SyntaxHighlighter
+from syntax_languages import languageForFile
+from instrumentation import recorder
+# version_store and history_catalog (sqlite3, zlib, json) are imported where
+# they are first needed so opening the window does not pay for them.
 
 class EditorTab(QWidget):
     def __init__(self, parent=None, filePath=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
+        self.setupLoadProgress()
         self.editor = CodeEditor()
         self.layout.addWidget(self.editor)
         self.setLayout(self.layout)
         self.currentFile = filePath
         self.versionHistory = []
-        if self.currentFile:
-            self.loadVersionHistory()
+        self.historyModel = None
+        self.loadWorker = None
+        self.loading = False
+        self.partiallyLoaded = False
+        self.loadStarted = None
+        self.pendingViewState = None
+        self.blameVisible = False
+        self.blameWorker = None
+        self.blamePending = False
+        self.editor.changesCoalescedSignal.connect(self.refreshBlame)
+        self.autosaver = Autosaver(self, self)
+        self.highlighter = SyntaxHighlighter(self.editor)
+        self.updateLanguage()
+
+    def updateLanguage(self):
+        self.highlighter.setLanguage(languageForFile(self.currentFile))
+
+    def setupLoadProgress(self):
+        self.loadProgressRow = QWidget(self)
+        rowLayout = QHBoxLayout(self.loadProgressRow)
+        rowLayout.setContentsMargins(0, 0, 0, 0)
+        self.loadProgressBar = QProgressBar(self.loadProgressRow)
+        self.loadProgressBar.setRange(0, 1000)
+        self.loadCancelButton = QPushButton("Cancel", self.loadProgressRow)
+        self.loadCancelButton.clicked.connect(self.cancelLoading)
+        rowLayout.addWidget(self.loadProgressBar)
+        rowLayout.addWidget(self.loadCancelButton)
+        self.loadProgressRow.hide()
+        self.layout.addWidget(self.loadProgressRow)
+
+    def loadFileAsync(self, filePath):
+        self.loadStarted = time.perf_counter() if recorder.enabled else None
+        self.loading = True
+        self.partiallyLoaded = False
+        # Loaded text is not an edit the user should be able to undo, and the
+        # buffer stays read-only until the tail has arrived.
+        self.editor.setUndoRedoEnabled(False)
+        self.editor.setReadOnly(True)
+        self.editor.setChangeTracking(False)
+        self.loadCursor = QTextCursor(self.editor.document())
+        self.loadProgressBar.setValue(0)
+        self.loadProgressRow.show()
+
+        self.loadWorker = FileLoadWorker(filePath, self)
+        self.loadWorker.chunkLoaded.connect(self.appendLoadedChunk)
+        self.loadWorker.progressChanged.connect(self.updateLoadProgress)
+        self.loadWorker.loadFailed.connect(self.onLoadFailed)
+        self.loadWorker.loadFinished.connect(self.onLoadFinished)
+        self.loadWorker.start()
+
+    def appendLoadedChunk(self, text):
+        if not self.loading:
+            return
+        self.loadCursor.movePosition(QTextCursor.End)
+        self.loadCursor.beginEditBlock()
+        self.loadCursor.insertText(text)
+        self.loadCursor.endEditBlock()
+        self.loadWorker.chunkConsumed()
+
+    def updateLoadProgress(self, done, total):
+        self.loadProgressBar.setValue(int(done * 1000 / total) if total else 1000)
+
+    def cancelLoading(self):
+        if self.loadWorker and self.loading:
+            self.loadWorker.cancel()
+
+    def onLoadFailed(self, error):
+        QMessageBox.warning(self, "Error", f"Failed to open file:\n{error}")
+
+    def onLoadFinished(self, completed):
+        self.loading = False
+        self.partiallyLoaded = not completed
+        self.loadProgressRow.hide()
+        self.editor.setReadOnly(False)
+        self.editor.setUndoRedoEnabled(True)
+        self.editor.setChangeTracking(True)
+        self.loadWorker = None
+        if completed and self.loadStarted is not None:
+            recorder.recordDuration("load", self.loadStarted)
+        self.loadStarted = None
+        if completed:
+            self.autosaver.markClean()
+        self.refreshBlame()
+        if self.pendingViewState is not None:
+            self.setViewState(*self.pendingViewState)
+
+    def viewState(self):
+        if self.pendingViewState is not None:
+            return self.pendingViewState
+        return self.editor.textCursor().position(), self.editor.verticalScrollBar().value()
+
+    def setViewState(self, cursorPosition, scrollPosition):
+        # Positions restored while a file is still streaming in are applied once it is complete.
+        if self.loading:
+            self.pendingViewState = (cursorPosition, scrollPosition)
+            return
+        self.pendingViewState = None
+        cursor = self.editor.textCursor()
+        cursor.setPosition(min(cursorPosition, self.editor.document().characterCount() - 1))
+        self.editor.setTextCursor(cursor)
+        self.editor.verticalScrollBar().setValue(scrollPosition)
 
     def getVersionDirectory(self):
         if not self.currentFile:
             return None
-        baseName = os.path.basename(self.currentFile)
-        versionDir = os.path.join(os.path.expanduser("~/.version_control_text_editor"), baseName)
-        return versionDir
+        from history_catalog import legacyVersionDirectory
+        return legacyVersionDirectory(self.currentFile)
+
+    def getHistoryModel(self):
+        if self.historyModel is None:
+            self.historyModel = VersionHistoryModel(self.versionHistory, self.getReadableTimestamp, self)
+        return self.historyModel
 
     def loadVersionHistory(self):
-        versionDir = self.getVersionDirectory()
-        if not versionDir:
-            self.versionHistory = []
-            return
-        historyFileName = os.path.join(versionDir, "history.json")
-        if not os.path.exists(historyFileName):
+        self.historyModel = None
+        if not self.currentFile:
             self.versionHistory = []
             return
 
+        from history_catalog import defaultCatalog
         try:
-            with open(historyFileName, 'r', encoding='utf-8') as historyFile:
-                self.versionHistory = json.load(historyFile)
+            self.versionHistory = defaultCatalog.history(self.currentFile)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to load version history:\n{str(e)}")
-            self.versionHistory = []
+            self.versionHistory = defaultCatalog.emptyHistory(self.currentFile)
 
-    def updateVersionHistory(self, history):
-        versionDir = self.getVersionDirectory()
-        if not versionDir:
+    def saveVersion(self, content, message):
+        if not self.currentFile:
+            QMessageBox.warning(self, "Error", "No file selected for version control.")
             return
-        historyFileName = os.path.join(versionDir, "history.json")
+
+        started = time.perf_counter() if recorder.enabled else None
         try:
-            with open(historyFileName, 'w', encoding='utf-8') as historyFile:
-                json.dump(history, historyFile, indent=4)
+            from version_store import defaultStore
+            digest = defaultStore.put(content, parent=self.latestVersionHash())
         except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to update version history:\n{str(e)}")
-
-    def saveVersion(self, content, message):
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        versionDir = self.getVersionDirectory()
-        if not versionDir:
-            QMessageBox.warning(self, "Error", "No file selected for version control.")
+            QMessageBox.warning(self, "Error", f"Failed to save version:\n{str(e)}")
             return
-        os.makedirs(versionDir, exist_ok=True)
-        versionFileName = os.path.join(versionDir, f"{timestamp}.txt")
+        if self.addVersionEntry(digest, message) and started is not None:
+            recorder.recordDuration("commit", started)
 
+    def addVersionEntry(self, digest, message):
+        # Records an object already in the version store as the newest version.
+        if isinstance(self.versionHistory, list):
+            # Opened tabs load their history after the first paint; commits can come sooner.
+            self.loadVersionHistory()
+            if isinstance(self.versionHistory, list):
+                QMessageBox.warning(self, "Error", "No file selected for version control.")
+                return None
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         try:
-            with open(versionFileName, 'w', encoding='utf-8') as versionFile:
-                versionFile.write(content)
+            entry = self.versionHistory.append(timestamp, message, digest)
+            versionCache.invalidate(versionKey(entry))
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to save version:\n{str(e)}")
+            return None
+        if self.historyModel is not None:
+            self.historyModel.versionAdded(entry)
+        self.refreshBlame()
+        return entry
+
+    def amendVersion(self, index, content, message):
+        started = time.perf_counter() if recorder.enabled else None
+        try:
+            from version_store import defaultStore
+            from blame_engine import invalidateBlame
+            digest = defaultStore.put(content, parent=self.latestVersionHash())
+            versionCache.invalidate(versionKey(self.versionHistory[index]))
+            entry = self.versionHistory.update(index, message=message, digest=digest)
+            invalidateBlame(self.currentFile, index)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to commit changes:\n{str(e)}")
+            return False
+        if self.historyModel is not None:
+            self.historyModel.versionUpdated(entry)
+        self.refreshBlame()
+        if started is not None:
+            recorder.recordDuration("commit", started)
+        return True
+
+    def setBlameVisible(self, visible):
+        self.blameVisible = visible
+        if visible:
+            self.refreshBlame()
+            return
+        if self.blameWorker is not None:
+            self.blameWorker.cancel()
+        self.blamePending = False
+        self.editor.clearBlameAnnotations()
+
+    def refreshBlame(self, *args):
+        # Recomputed on a worker after commits and edit bursts; requests made
+        # while one is running collapse into a single follow-up.
+        if not self.blameVisible or not self.currentFile or self.loading:
             return
+        if self.blameWorker is not None:
+            self.blamePending = True
+            return
+        from blame_worker import BlameWorker
+        self.blameWorker = BlameWorker(self.currentFile, self.editor.toPlainText(), self)
+        self.blameWorker.blameReady.connect(self.onBlameReady)
+        self.blameWorker.blameFailed.connect(self.onBlameFailed)
+        self.blameWorker.finished.connect(self.onBlameWorkerFinished)
+        self.blameWorker.start()
+
+    def onBlameReady(self, origins):
+        if self.blameVisible:
+            self.editor.setBlameAnnotations(origins, self.blameLabel)
+
+    def onBlameFailed(self, error):
+        self.setBlameVisible(False)
+        QMessageBox.warning(self, "Error", f"Failed to compute blame:\n{error}")
+
+    def onBlameWorkerFinished(self):
+        self.blameWorker.deleteLater()
+        self.blameWorker = None
+        if self.blamePending:
+            self.blamePending = False
+            self.refreshBlame()
+
+    def blameLabel(self, seq):
+        if seq < 0:
+            return "Not committed"
+        entry = self.versionHistory[seq]
+        return f"{self.getReadableTimestamp(entry['timestamp'])[:10]} {entry['message']}"
+
+    def latestVersionHash(self):
+        latest = self.versionHistory.latest() if self.versionHistory else None
+        return latest["hash"] if latest else None
+
+    def readVersion(self, entry):
+        return self.getCachedVersion(entry).content
+
+    def getCachedVersion(self, entry):
+        return versionCache.get(versionKey(entry), lambda: self.loadVersionContent(entry))
 
-        versionInfo = {"timestamp": timestamp, "message": message}
-        self.versionHistory.append(versionInfo)
-        self.updateVersionHistory(self.versionHistory)
+    def loadVersionContent(self, entry):
+        # Entries written before the version store only have a plain {timestamp}.txt copy.
+        from version_store import defaultStore, readLegacySnapshot
+        if entry.get("hash"):
+            return defaultStore.get(entry["hash"])
+        return readLegacySnapshot(entry.get("legacyDir") or self.getVersionDirectory(), entry["timestamp"])
 
     def getReadableTimestamp(self, timestamp):
         try:
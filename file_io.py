@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+
+
+def atomicWrite(filePath, content, encoding='utf-8', newline=None):
+    # Write next to the target, fsync, then rename over it: a crash leaves either
+    # the old file or the new one, never a truncated mix.
+    directory = os.path.dirname(os.path.abspath(filePath))
+    fd, tempPath = tempfile.mkstemp(prefix=".~", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline=newline) as tempFile:
+            tempFile.write(content)
+            tempFile.flush()
+            os.fsync(tempFile.fileno())
+        if os.path.exists(filePath):
+            shutil.copymode(filePath, tempPath)
+        os.replace(tempPath, filePath)
+    except BaseException:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
+
+    if hasattr(os, 'O_DIRECTORY'):
+        dirFd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dirFd)
+        finally:
+            os.close(dirFd)
+
+
+def replaceFile(filePath, data):
+    # Bytes written to a uniquely named temp file beside the target, then renamed
+    # over it, so concurrent writers in any thread never share a temp file. No
+    # fsync: for store objects and caches that can be written again.
+    fd, tempPath = tempfile.mkstemp(prefix=".~", suffix=".tmp", dir=os.path.dirname(os.path.abspath(filePath)))
+    try:
+        with os.fdopen(fd, 'wb') as tempFile:
+            tempFile.write(data)
+        os.replace(tempPath, filePath)
+    except BaseException:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
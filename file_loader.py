@@ -0,0 +1,50 @@
+import os
+from PyQt5.QtCore import QThread, QSemaphore, pyqtSignal
+
+CHUNK_CHARS = 1 << 20
+MAX_PENDING_CHUNKS = 4
+ASYNC_LOAD_THRESHOLD = 4 << 20
+
+
+class FileLoadWorker(QThread):
+    chunkLoaded = pyqtSignal(str)
+    progressChanged = pyqtSignal(int, int)
+    loadFailed = pyqtSignal(str)
+    loadFinished = pyqtSignal(bool)
+
+    def __init__(self, filePath, parent=None, encoding='utf-8', chunkChars=CHUNK_CHARS):
+        super().__init__(parent)
+        self.filePath = filePath
+        self.encoding = encoding
+        self.chunkChars = chunkChars
+        self.cancelled = False
+        # Bounds how far the reader may run ahead of the GUI thread, so at most a
+        # few decoded chunks exist outside the document at any time.
+        self.pendingChunks = QSemaphore(MAX_PENDING_CHUNKS)
+
+    def cancel(self):
+        self.cancelled = True
+        self.pendingChunks.release(MAX_PENDING_CHUNKS)
+
+    def chunkConsumed(self):
+        self.pendingChunks.release()
+
+    def run(self):
+        try:
+            total = os.path.getsize(self.filePath)
+            # Text mode decodes incrementally and normalises newlines split across chunks.
+            with open(self.filePath, 'r', encoding=self.encoding) as file:
+                while not self.cancelled:
+                    text = file.read(self.chunkChars)
+                    if not text:
+                        break
+                    self.pendingChunks.acquire()
+                    if self.cancelled:
+                        break
+                    self.chunkLoaded.emit(text)
+                    self.progressChanged.emit(file.buffer.tell(), total)
+        except Exception as e:
+            self.loadFailed.emit(str(e))
+            self.loadFinished.emit(False)
+            return
+        self.loadFinished.emit(not self.cancelled)
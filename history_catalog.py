@@ -0,0 +1,274 @@
+import os
+import json
+import sqlite3
+from collections.abc import Sequence
+from store_paths import STORE_ROOT
+from version_store import defaultStore, readLegacySnapshot
+
+CATALOG_PATH = os.path.join(STORE_ROOT, "catalog.sqlite3")
+PAGE_SIZE = 256
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        versionCount INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS versions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        path TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        timestamp TEXT NOT NULL,
+        message TEXT NOT NULL,
+        hash TEXT,
+        legacyDir TEXT
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS versions_path_seq ON versions(path, seq);
+    CREATE INDEX IF NOT EXISTS versions_path_timestamp ON versions(path, timestamp);
+    CREATE INDEX IF NOT EXISTS versions_path_message ON versions(path, message);
+    CREATE TABLE IF NOT EXISTS legacyImports (
+        legacyDir TEXT PRIMARY KEY,
+        path TEXT NOT NULL
+    );
+"""
+
+COLUMNS = ("id", "seq", "timestamp", "message", "hash", "legacyDir")
+SELECT_VERSIONS = f"SELECT {', '.join(COLUMNS)} FROM versions"
+
+
+def legacyVersionDirectory(filePath):
+    return os.path.join(STORE_ROOT, os.path.basename(filePath))
+
+
+def readEntryContent(filePath, entry):
+    # Entries written before the version store only have a plain {timestamp}.txt copy.
+    if entry.get("hash"):
+        return defaultStore.get(entry["hash"])
+    return readLegacySnapshot(entry.get("legacyDir") or legacyVersionDirectory(filePath), entry["timestamp"])
+
+
+class HistoryCatalog:
+    # One SQLite database for every tracked file, keyed by absolute path. Each
+    # commit is a single-row insert, so history size never affects commit cost.
+    def __init__(self, path=None):
+        self.path = path or CATALOG_PATH
+        self.connection = None
+
+    def connect(self):
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    @staticmethod
+    def normalizePath(filePath):
+        return os.path.abspath(filePath)
+
+    @staticmethod
+    def toEntry(row):
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def history(self, filePath, create=True):
+        # create=False neither registers the file nor imports its legacy history.
+        return VersionHistory(self, self.normalizePath(filePath), create)
+
+    def emptyHistory(self, filePath):
+        # Stand-in when the real history could not be read; appends still reach the catalog.
+        return VersionHistory(self, self.normalizePath(filePath), length=0)
+
+    def ensureFile(self, path):
+        connection = self.connect()
+        row = connection.execute("SELECT versionCount FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            return row[0]
+        with connection:
+            connection.execute("INSERT INTO files (path, versionCount) VALUES (?, 0)", (path,))
+            self.importLegacyHistory(path)
+        return self.count(path)
+
+    def importLegacyHistory(self, path):
+        # history.json lived in a directory named after the file's basename. The
+        # first file to claim such a directory inherits its entries.
+        legacyDir = legacyVersionDirectory(path)
+        historyFileName = os.path.join(legacyDir, "history.json")
+        if not os.path.exists(historyFileName):
+            return
+        connection = self.connect()
+        claimed = connection.execute(
+            "SELECT 1 FROM legacyImports WHERE legacyDir = ?", (legacyDir,)).fetchone()
+        if claimed:
+            return
+        try:
+            with open(historyFileName, 'r', encoding='utf-8') as historyFile:
+                legacyHistory = json.load(historyFile)
+        except (OSError, ValueError):
+            return
+        connection.execute("INSERT INTO legacyImports (legacyDir, path) VALUES (?, ?)", (legacyDir, path))
+        for entry in legacyHistory:
+            self.insertVersion(path, entry.get("timestamp", ""), entry.get("message", ""),
+                               entry.get("hash"), None if entry.get("hash") else legacyDir)
+
+    def insertVersion(self, path, timestamp, message, digest, legacyDir=None):
+        connection = self.connect()
+        seq = connection.execute("SELECT versionCount FROM files WHERE path = ?", (path,)).fetchone()[0]
+        cursor = connection.execute(
+            "INSERT INTO versions (path, seq, timestamp, message, hash, legacyDir) VALUES (?, ?, ?, ?, ?, ?)",
+            (path, seq, timestamp, message, digest, legacyDir))
+        connection.execute("UPDATE files SET versionCount = ? WHERE path = ?", (seq + 1, path))
+        return {"id": cursor.lastrowid, "seq": seq, "timestamp": timestamp,
+                "message": message, "hash": digest, "legacyDir": legacyDir}
+
+    def append(self, path, timestamp, message, digest):
+        self.ensureFile(path)
+        with self.connect():
+            return self.insertVersion(path, timestamp, message, digest)
+
+    def appendMany(self, versions):
+        # (path, timestamp, message, digest) tuples, committed as one transaction.
+        for path in {version[0] for version in versions}:
+            self.ensureFile(path)
+        with self.connect():
+            return [self.insertVersion(*version) for version in versions]
+
+    def updateVersion(self, versionId, message=None, digest=None):
+        connection = self.connect()
+        with connection:
+            if message is not None:
+                connection.execute("UPDATE versions SET message = ? WHERE id = ?", (message, versionId))
+            if digest is not None:
+                connection.execute(
+                    "UPDATE versions SET hash = ?, legacyDir = NULL WHERE id = ?", (digest, versionId))
+
+    def count(self, path):
+        row = self.connect().execute("SELECT versionCount FROM files WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else 0
+
+    def entryAt(self, path, seq):
+        row = self.connect().execute(
+            f"{SELECT_VERSIONS} WHERE path = ? AND seq = ?", (path, seq)).fetchone()
+        return self.toEntry(row)
+
+    def latest(self, path):
+        row = self.connect().execute(
+            f"{SELECT_VERSIONS} WHERE path = ? ORDER BY seq DESC LIMIT 1", (path,)).fetchone()
+        return self.toEntry(row)
+
+    def page(self, path, offset, limit, newestFirst=False):
+        if newestFirst:
+            total = self.count(path)
+            high = total - offset
+            rows = self.connect().execute(
+                f"{SELECT_VERSIONS} WHERE path = ? AND seq >= ? AND seq < ? ORDER BY seq DESC",
+                (path, max(0, high - limit), high)).fetchall()
+        else:
+            rows = self.connect().execute(
+                f"{SELECT_VERSIONS} WHERE path = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (path, offset, offset + limit)).fetchall()
+        return [self.toEntry(row) for row in rows]
+
+    def findByTimestamp(self, path, timestamp):
+        rows = self.connect().execute(
+            f"{SELECT_VERSIONS} WHERE path = ? AND timestamp = ? ORDER BY seq", (path, timestamp)).fetchall()
+        return [self.toEntry(row) for row in rows]
+
+    def findByMessage(self, path, message, prefix=False, limit=PAGE_SIZE):
+        if prefix:
+            # A half-open range keeps the (path, message) index usable, unlike LIKE.
+            rows = self.connect().execute(
+                f"{SELECT_VERSIONS} WHERE path = ? AND message >= ? AND message < ? ORDER BY seq DESC LIMIT ?",
+                (path, message, message + "\U0010ffff", limit)).fetchall()
+        else:
+            rows = self.connect().execute(
+                f"{SELECT_VERSIONS} WHERE path = ? AND message = ? ORDER BY seq DESC LIMIT ?",
+                (path, message, limit)).fetchall()
+        return [self.toEntry(row) for row in rows]
+
+    def referencedHashes(self):
+        rows = self.connect().execute("SELECT DISTINCT hash FROM versions WHERE hash IS NOT NULL")
+        return {row[0] for row in rows}
+
+    def legacyPaths(self):
+        rows = self.connect().execute("SELECT DISTINCT path FROM versions WHERE legacyDir IS NOT NULL")
+        return [row[0] for row in rows]
+
+    def legacyReferences(self):
+        # legacyDir -> timestamps of the plain snapshots catalog entries still point at.
+        references = {}
+        for legacyDir, timestamp in self.connect().execute(
+                "SELECT legacyDir, timestamp FROM versions WHERE legacyDir IS NOT NULL"):
+            references.setdefault(legacyDir, set()).add(timestamp)
+        return references
+
+    def claimedLegacyDirs(self):
+        return {row[0] for row in self.connect().execute("SELECT legacyDir FROM legacyImports")}
+
+
+class VersionHistory(Sequence):
+    # List-like view of one file's history that fetches pages on demand.
+    def __init__(self, catalog, path, create=True, length=None):
+        self.catalog = catalog
+        self.path = path
+        if length is None:
+            length = catalog.ensureFile(path) if create else catalog.count(path)
+        self.length = length
+        self.pages = {}
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("version index out of range")
+        pageNumber, offset = divmod(index, PAGE_SIZE)
+        page = self.pages.get(pageNumber)
+        if page is None:
+            page = self.catalog.page(self.path, pageNumber * PAGE_SIZE, PAGE_SIZE)
+            self.pages[pageNumber] = page
+        return page[offset]
+
+    def latest(self):
+        return self[-1] if self.length else None
+
+    def recent(self, limit, offset=0):
+        return self.catalog.page(self.path, offset, limit, newestFirst=True)
+
+    def append(self, timestamp, message, digest):
+        entry = self.catalog.append(self.path, timestamp, message, digest)
+        if entry["seq"] != self.length:
+            # The catalog held versions this view never counted (e.g. a legacy import).
+            self.pages = {}
+        page = self.pages.get(entry["seq"] // PAGE_SIZE)
+        if page is not None:
+            page.append(entry)
+        self.length = entry["seq"] + 1
+        return entry
+
+    def update(self, index, message=None, digest=None):
+        entry = self[index]
+        self.catalog.updateVersion(entry["id"], message, digest)
+        if message is not None:
+            entry["message"] = message
+        if digest is not None:
+            entry["hash"] = digest
+            entry["legacyDir"] = None
+        return entry
+
+    def findByTimestamp(self, timestamp):
+        return self.catalog.findByTimestamp(self.path, timestamp)
+
+    def findByMessage(self, message, prefix=False):
+        return self.catalog.findByMessage(self.path, message, prefix)
+
+
+defaultCatalog = HistoryCatalog()
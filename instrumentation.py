@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import threading
+from array import array
+
+RING_SIZE = 4096
+PERCENTILES = (50, 95, 99)
+
+
+class RingBuffer:
+    # The last `size` samples as (start, value) pairs in two preallocated arrays.
+    def __init__(self, size=RING_SIZE):
+        self.size = size
+        self.starts = array('d', bytes(8 * size))
+        self.values = array('d', bytes(8 * size))
+        self.next = 0
+        self.count = 0
+        self.total = 0
+
+    def add(self, start, value):
+        self.starts[self.next] = start
+        self.values[self.next] = value
+        self.next = (self.next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.total += 1
+
+    def samples(self):
+        # Oldest first.
+        first = (self.next - self.count) % self.size
+        for offset in range(self.count):
+            position = (first + offset) % self.size
+            yield self.starts[position], self.values[position]
+
+
+def percentile(sortedValues, rank):
+    # Nearest-rank percentile of an already sorted sequence.
+    if not sortedValues:
+        return 0.0
+    index = max(0, min(len(sortedValues) - 1, -(-rank * len(sortedValues) // 100) - 1))
+    return sortedValues[index]
+
+
+class Recorder:
+    # Per-event timings kept in one ring buffer per metric. Durations are in
+    # milliseconds; other metrics record plain values in their own unit. Call
+    # sites test `enabled` before taking a timestamp, so a disabled recorder
+    # costs one attribute lookup per event.
+    def __init__(self, size=RING_SIZE):
+        self.enabled = False
+        self.size = size
+        self.metrics = {}
+        self.units = {}
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+
+    def buffer(self, name, unit):
+        ring = self.metrics.get(name)
+        if ring is None:
+            with self.lock:
+                ring = self.metrics.setdefault(name, RingBuffer(self.size))
+                self.units[name] = unit
+        return ring
+
+    def recordDuration(self, name, start, end=None):
+        # `start` and `end` come from time.perf_counter().
+        end = time.perf_counter() if end is None else end
+        ring = self.buffer(name, "ms")
+        with self.lock:
+            ring.add(start, (end - start) * 1000)
+
+    def recordValue(self, name, value, unit):
+        ring = self.buffer(name, unit)
+        with self.lock:
+            ring.add(time.perf_counter(), value)
+
+    def reset(self):
+        with self.lock:
+            self.metrics = {}
+            self.units = {}
+
+    def summary(self):
+        # name -> {unit, count, total, mean, max, p50, p95, p99} over the samples still held.
+        summaries = {}
+        with self.lock:
+            snapshot = {name: (ring.total, sorted(value for _, value in ring.samples()))
+                        for name, ring in self.metrics.items()}
+        for name, (total, values) in sorted(snapshot.items()):
+            summary = {"unit": self.units[name], "count": len(values), "total": total,
+                       "mean": sum(values) / len(values) if values else 0.0,
+                       "max": values[-1] if values else 0.0}
+            for rank in PERCENTILES:
+                summary[f"p{rank}"] = percentile(values, rank)
+            summaries[name] = summary
+        return summaries
+
+    def exportJson(self, fileName):
+        with self.lock:
+            samples = {name: [{"at": (start - self.origin) * 1000, "value": value}
+                              for start, value in ring.samples()]
+                       for name, ring in self.metrics.items()}
+        with open(fileName, 'w', encoding='utf-8') as output:
+            json.dump({"summary": self.summary(), "samples": samples}, output, indent=1)
+
+    def exportChromeTrace(self, fileName):
+        # Loadable in chrome://tracing or Perfetto: each duration metric gets a
+        # track of complete ("X") events, values become counter ("C") tracks.
+        pid = os.getpid()
+        events = []
+        with self.lock:
+            for track, (name, ring) in enumerate(sorted(self.metrics.items()), 1):
+                unit = self.units[name]
+                if unit == "ms":
+                    events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": track,
+                                   "args": {"name": name}})
+                for start, value in ring.samples():
+                    timestamp = (start - self.origin) * 1e6
+                    if unit == "ms":
+                        events.append({"name": name, "ph": "X", "ts": timestamp, "dur": value * 1000,
+                                       "pid": pid, "tid": track})
+                    else:
+                        events.append({"name": name, "ph": "C", "ts": timestamp, "pid": pid,
+                                       "args": {unit: value}})
+        events.sort(key=lambda event: event.get("ts", 0))
+        with open(fileName, 'w', encoding='utf-8') as output:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, output)
+
+
+recorder = Recorder()
+if os.environ.get("TRACKTEXT_INSTRUMENT"):
+    recorder.setEnabled(True)
@@ -0,0 +1,83 @@
+from PyQt5.QtWidgets import (
+    QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, QCheckBox,
+    QPushButton, QFileDialog, QMessageBox, QHeaderView
+)
+from PyQt5.QtCore import Qt, QTimer
+from instrumentation import recorder, PERCENTILES
+
+REFRESH_INTERVAL = 1000
+COLUMNS = ["Metric", "Count"] + [f"p{rank}" for rank in PERCENTILES] + ["Max", "Unit"]
+
+
+class InstrumentationDock(QDockWidget):
+    # Small overlay with the recorder's percentiles. The table is refreshed
+    # once a second, and only while the dock is visible.
+    def __init__(self, parent=None):
+        super().__init__("Performance", parent)
+        self.setFeatures(QDockWidget.DockWidgetClosable | QDockWidget.DockWidgetMovable
+                         | QDockWidget.DockWidgetFloatable)
+        panel = QWidget(self)
+        layout = QVBoxLayout(panel)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        controls = QHBoxLayout()
+        self.recordCheck = QCheckBox("Record", panel)
+        self.recordCheck.setChecked(recorder.enabled)
+        self.recordCheck.toggled.connect(recorder.setEnabled)
+        resetButton = QPushButton("Reset", panel)
+        resetButton.clicked.connect(self.reset)
+        jsonButton = QPushButton("Export JSON...", panel)
+        jsonButton.clicked.connect(lambda: self.export(recorder.exportJson, "JSON (*.json)"))
+        traceButton = QPushButton("Export Trace...", panel)
+        traceButton.clicked.connect(lambda: self.export(recorder.exportChromeTrace, "Chrome trace (*.json)"))
+        controls.addWidget(self.recordCheck)
+        controls.addStretch()
+        for button in (resetButton, jsonButton, traceButton):
+            controls.addWidget(button)
+        layout.addLayout(controls)
+
+        self.table = QTableWidget(0, len(COLUMNS), panel)
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+        self.setWidget(panel)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.onVisibilityChanged)
+
+    def onVisibilityChanged(self, visible):
+        if visible:
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        summary = recorder.summary()
+        self.table.setRowCount(len(summary))
+        for row, (name, values) in enumerate(summary.items()):
+            cells = [name, str(values["count"])]
+            cells += [f"{values[f'p{rank}']:.1f}" for rank in PERCENTILES]
+            cells += [f"{values['max']:.1f}", values["unit"]]
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+    def reset(self):
+        recorder.reset()
+        self.refresh()
+
+    def export(self, write, fileFilter):
+        fileName, _ = QFileDialog.getSaveFileName(self, "Export Timings", "", fileFilter)
+        if not fileName:
+            return
+        try:
+            write(fileName)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Failed to export timings:\n{str(e)}")
@@ -0,0 +1,376 @@
+import mmap
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QAbstractScrollArea, QLineEdit, QPushButton, QLabel, QMessageBox
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter, QFont, QFontMetrics
+
+LARGE_FILE_THRESHOLD = 256 << 20
+INDEX_BLOCK_SIZE = 1 << 14
+MAX_RENDERED_LINE_BYTES = 4096
+SEARCH_SLICE = 8 << 20
+DIFF_READ_SIZE = 1 << 20
+
+
+class LineIndex:
+    # Sparse line index: for every INDEX_BLOCK_SIZE bytes of the file we keep the
+    # number of newlines that precede the block, i.e. one integer per 16 KB.
+    # Finding a line is a bisect over that array plus a scan of one block.
+    def __init__(self, data):
+        self.data = data
+        self.blockNewlines = array('Q')
+        self.newlineCount = 0
+        self.indexedBytes = 0
+        self.complete = False
+
+    def lineCount(self):
+        return self.newlineCount + 1 if self.complete else max(self.newlineCount, 1)
+
+    def addBlock(self, newlines):
+        self.blockNewlines.append(self.newlineCount)
+        self.newlineCount += newlines
+        self.indexedBytes = min(len(self.blockNewlines) * INDEX_BLOCK_SIZE, len(self.data))
+
+    def lineStart(self, line):
+        if line <= 0:
+            return 0
+        block = bisect_right(self.blockNewlines, line - 1) - 1
+        position = block * INDEX_BLOCK_SIZE
+        for _ in range(line - self.blockNewlines[block]):
+            position = self.data.find(b"\n", position) + 1
+            if position == 0:
+                return None
+        return position
+
+    def lineOfOffset(self, offset):
+        block = offset // INDEX_BLOCK_SIZE
+        start = block * INDEX_BLOCK_SIZE
+        return self.blockNewlines[block] + self.data[start:offset].count(b"\n")
+
+
+class MappedLines(Sequence):
+    # The lines of a fully indexed mapping, split like str.splitlines() on
+    # "\n", so line_diff can run over the file without reading it into a str.
+    # Iteration reads the mapping in DIFF_READ_SIZE pieces; indexing and
+    # slicing go through the line index.
+    def __init__(self, index):
+        self.index = index
+        data = index.data
+        self.length = index.newlineCount + (1 if len(data) and data[-1:] != b"\n" else 0)
+
+    @staticmethod
+    def decode(raw):
+        return raw.decode('utf-8', 'replace').rstrip('\r')
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        data = self.index.data
+        tail = b""
+        for start in range(0, len(data), DIFF_READ_SIZE):
+            pieces = (tail + data[start:start + DIFF_READ_SIZE]).split(b"\n")
+            tail = pieces.pop()
+            for piece in pieces:
+                yield self.decode(piece)
+        if tail:
+            yield self.decode(tail)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.length)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            data = self.index.data
+            position = self.index.lineStart(start) if start < stop else None
+            lines = []
+            for _ in range(start, stop):
+                end = data.find(b"\n", position)
+                if end == -1:
+                    end = len(data)
+                lines.append(self.decode(data[position:end]))
+                position = end + 1
+            return lines
+        if item < 0:
+            item += self.length
+        if not 0 <= item < self.length:
+            raise IndexError("line index out of range")
+        return self[item:item + 1][0]
+
+
+class LineIndexer(QThread):
+    progressChanged = pyqtSignal(int, int)
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        data = self.index.data
+        size = len(data)
+        for start in range(0, size, INDEX_BLOCK_SIZE):
+            if self.cancelled:
+                return
+            self.index.addBlock(data[start:start + INDEX_BLOCK_SIZE].count(b"\n"))
+            if len(self.index.blockNewlines) % 1024 == 0:
+                self.progressChanged.emit(self.index.indexedBytes, size)
+        self.index.complete = True
+        self.progressChanged.emit(size, size)
+
+
+class FileSearcher(QThread):
+    # Finds the next occurrence of `needle` after `start`, wrapping around to the
+    # top. The mapping is searched a slice at a time so a cancel takes effect
+    # quickly; a slice overlaps the next by len(needle) - 1 bytes.
+    progressChanged = pyqtSignal(int, int)
+    searchFinished = pyqtSignal(int)
+
+    def __init__(self, data, needle, start, parent=None):
+        super().__init__(parent)
+        self.data = data
+        self.needle = needle
+        self.startOffset = start
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        data = self.data
+        size = len(data)
+        overlap = len(self.needle) - 1
+        searched = 0
+        for begin, end in ((self.startOffset, size), (0, min(self.startOffset + overlap, size))):
+            for position in range(begin, end, SEARCH_SLICE):
+                if self.cancelled:
+                    return
+                match = data.find(self.needle, position, min(end, position + SEARCH_SLICE + overlap))
+                if match != -1:
+                    self.searchFinished.emit(match)
+                    return
+                searched += min(SEARCH_SLICE, end - position)
+                self.progressChanged.emit(searched, size)
+        self.searchFinished.emit(-1)
+
+
+class LargeFileView(QAbstractScrollArea):
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.highlightLine = -1
+        self.setFont(QFont("Consolas", 10))
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.horizontalScrollBar().setRange(0, MAX_RENDERED_LINE_BYTES)
+        self.updateMetrics()
+
+    def updateMetrics(self):
+        metrics = QFontMetrics(self.font())
+        self.lineHeight = metrics.height()
+        self.ascent = metrics.ascent()
+        self.charWidth = metrics.horizontalAdvance("9")
+
+    def visibleLineCount(self):
+        return max(1, self.viewport().height() // self.lineHeight)
+
+    def gutterWidth(self):
+        return 10 + self.charWidth * len(str(self.index.lineCount()))
+
+    def updateScrollRange(self):
+        scrollBar = self.verticalScrollBar()
+        scrollBar.setRange(0, max(0, self.index.lineCount() - self.visibleLineCount()))
+        scrollBar.setPageStep(self.visibleLineCount())
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.updateScrollRange()
+
+    def scrollToLine(self, line):
+        self.highlightLine = line
+        self.verticalScrollBar().setValue(max(0, line - self.visibleLineCount() // 2))
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        rect = self.viewport().rect()
+        painter.fillRect(rect, QColor(30, 30, 30))
+        gutterWidth = self.gutterWidth()
+
+        data = self.index.data
+        firstLine = self.verticalScrollBar().value()
+        firstColumn = self.horizontalScrollBar().value()
+        position = self.index.lineStart(firstLine)
+        lineNumberColor = QColor(128, 128, 128)
+        textColor = QColor(223, 255, 255)
+        painter.setClipRect(gutterWidth, 0, rect.width() - gutterWidth, rect.height())
+
+        top = 0
+        line = firstLine
+        rows = []
+        while position is not None and top < rect.height() and position <= len(data):
+            end = data.find(b"\n", position)
+            if end == -1:
+                end = len(data)
+            raw = data[position:min(end, position + MAX_RENDERED_LINE_BYTES)]
+            text = raw.decode('utf-8', 'replace').rstrip('\r').expandtabs(4)
+            if line == self.highlightLine:
+                painter.fillRect(gutterWidth, top, rect.width(), self.lineHeight, QColor(38, 79, 120))
+            painter.setPen(textColor)
+            painter.drawText(gutterWidth + 4 - firstColumn * self.charWidth, top + self.ascent, text)
+            rows.append((top, line))
+            top += self.lineHeight
+            line += 1
+            position = end + 1
+
+        painter.setClipping(False)
+        painter.setPen(lineNumberColor)
+        for rowTop, rowLine in rows:
+            painter.drawText(0, rowTop, gutterWidth - 6, self.lineHeight,
+                             Qt.AlignRight | Qt.AlignVCenter, str(rowLine + 1))
+
+    def keyPressEvent(self, event):
+        scrollBar = self.verticalScrollBar()
+        actions = {
+            Qt.Key_Up: scrollBar.SliderSingleStepSub,
+            Qt.Key_Down: scrollBar.SliderSingleStepAdd,
+            Qt.Key_PageUp: scrollBar.SliderPageStepSub,
+            Qt.Key_PageDown: scrollBar.SliderPageStepAdd,
+        }
+        if event.key() in actions:
+            scrollBar.triggerAction(actions[event.key()])
+        elif event.key() == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            scrollBar.setValue(0)
+        elif event.key() == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            scrollBar.setValue(scrollBar.maximum())
+        else:
+            super().keyPressEvent(event)
+
+
+class LargeFileTab(QWidget):
+    # Read-only tab for files too large for QPlainTextEdit. The file is mapped,
+    # never read into memory, and only the lines in the viewport are decoded.
+    # Diffs read the lines from the mapping through MappedLines.
+    def __init__(self, parent=None, filePath=None):
+        super().__init__(parent)
+        self.currentFile = filePath
+        self.file = open(filePath, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = LineIndex(self.data)
+        self.lastMatch = -1
+        self.searcher = None
+
+        self.layout = QVBoxLayout(self)
+        self.setupSearchBar()
+        self.view = LargeFileView(self.index, self)
+        self.layout.addWidget(self.view)
+        self.setLayout(self.layout)
+
+        self.indexer = LineIndexer(self.index, self)
+        self.indexer.progressChanged.connect(self.onIndexProgress)
+        self.indexer.start()
+
+    def setupSearchBar(self):
+        searchBar = QWidget(self)
+        barLayout = QHBoxLayout(searchBar)
+        barLayout.setContentsMargins(0, 0, 0, 0)
+        self.searchInput = QLineEdit(searchBar)
+        self.searchInput.setPlaceholderText("Find")
+        self.searchInput.returnPressed.connect(self.findNext)
+        findButton = QPushButton("Find Next", searchBar)
+        findButton.clicked.connect(self.findNext)
+        self.cancelSearchButton = QPushButton("Cancel", searchBar)
+        self.cancelSearchButton.clicked.connect(self.cancelSearch)
+        self.cancelSearchButton.hide()
+        self.gotoInput = QLineEdit(searchBar)
+        self.gotoInput.setPlaceholderText("Go to line")
+        self.gotoInput.setMaximumWidth(120)
+        self.gotoInput.returnPressed.connect(self.gotoLine)
+        self.statusLabel = QLabel("Indexing...", searchBar)
+        barLayout.addWidget(self.searchInput)
+        barLayout.addWidget(findButton)
+        barLayout.addWidget(self.cancelSearchButton)
+        barLayout.addWidget(self.gotoInput)
+        barLayout.addWidget(self.statusLabel)
+        self.layout.addWidget(searchBar)
+
+    def onIndexProgress(self, done, total):
+        self.view.updateScrollRange()
+        if self.searcher is not None:
+            return
+        if self.index.complete:
+            self.statusLabel.setText(f"{self.index.lineCount():,} lines (read-only)")
+        else:
+            self.statusLabel.setText(f"Indexing... {done * 100 // max(total, 1)}%")
+
+    def findNext(self):
+        needle = self.searchInput.text().encode('utf-8')
+        if not needle:
+            return
+        self.cancelSearch()
+        self.searcher = FileSearcher(self.data, needle, self.lastMatch + 1, self)
+        self.searcher.progressChanged.connect(self.onSearchProgress)
+        self.searcher.searchFinished.connect(self.onSearchFinished)
+        self.cancelSearchButton.show()
+        self.statusLabel.setText("Searching...")
+        self.searcher.start()
+
+    def cancelSearch(self):
+        if self.searcher is None:
+            return
+        # A cancelled search stops within one slice; waiting for it means no
+        # thread is left reading the mapping.
+        self.searcher.cancel()
+        self.searcher.wait()
+        self.searcher.deleteLater()
+        self.searcher = None
+        self.cancelSearchButton.hide()
+        self.onIndexProgress(self.index.indexedBytes, len(self.data))
+
+    def onSearchProgress(self, done, total):
+        if self.searcher is None or self.sender() is not self.searcher:
+            return
+        self.statusLabel.setText(f"Searching... {done * 100 // max(total, 1)}%")
+
+    def onSearchFinished(self, match):
+        if self.searcher is None or self.sender() is not self.searcher:
+            return
+        # searchFinished is the last thing run() does, so this wait is brief;
+        # it keeps a closing tab from destroying a still running thread.
+        self.searcher.wait()
+        self.searcher.deleteLater()
+        self.searcher = None
+        self.cancelSearchButton.hide()
+        self.onIndexProgress(self.index.indexedBytes, len(self.data))
+        if match == -1:
+            QMessageBox.information(self, "Find", "No matches found.")
+            return
+        if match >= self.index.indexedBytes:
+            QMessageBox.information(self, "Find", "The match lies beyond the indexed part of the file.")
+            return
+        self.lastMatch = match
+        self.view.scrollToLine(self.index.lineOfOffset(match))
+
+    def diffLines(self):
+        # None until the line index is complete.
+        return MappedLines(self.index) if self.index.complete else None
+
+    def gotoLine(self):
+        try:
+            line = int(self.gotoInput.text()) - 1
+        except ValueError:
+            return
+        self.view.scrollToLine(max(0, min(line, self.index.lineCount() - 1)))
+
+    def closeFile(self):
+        self.cancelSearch()
+        self.indexer.cancel()
+        self.indexer.wait()
+        self.data.close()
+        self.file.close()
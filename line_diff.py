@@ -0,0 +1,293 @@
+from itertools import chain, count
+from collections import Counter
+from bisect import bisect_left
+
+PREFIX_CHUNK = 1024
+MYERS_MAX_COST = 2000
+
+
+class DiffCancelled(Exception):
+    pass
+
+
+def internLines(a, b):
+    # Map every distinct line to a small integer so the algorithm compares ints,
+    # never strings, and repeated lines hash exactly once.
+    table = dict(zip(dict.fromkeys(chain(a, b)), count()))
+    return list(map(table.__getitem__, a)), list(map(table.__getitem__, b))
+
+
+def commonPrefix(a, b, a0, a1, b0, b1):
+    limit = min(a1 - a0, b1 - b0)
+    length = 0
+    # Compare whole slices first; list equality runs in C.
+    while length + PREFIX_CHUNK <= limit and \
+            a[a0 + length:a0 + length + PREFIX_CHUNK] == b[b0 + length:b0 + length + PREFIX_CHUNK]:
+        length += PREFIX_CHUNK
+    while length < limit and a[a0 + length] == b[b0 + length]:
+        length += 1
+    return length
+
+
+def commonSuffix(a, b, a0, a1, b0, b1):
+    limit = min(a1 - a0, b1 - b0)
+    length = 0
+    while length + PREFIX_CHUNK <= limit and \
+            a[a1 - length - PREFIX_CHUNK:a1 - length] == b[b1 - length - PREFIX_CHUNK:b1 - length]:
+        length += PREFIX_CHUNK
+    while length < limit and a[a1 - length - 1] == b[b1 - length - 1]:
+        length += 1
+    return length
+
+
+def uniqueAnchors(a, b, a0, a1, b0, b1):
+    # Patience diff: lines occurring exactly once on both sides, reduced to their
+    # longest increasing subsequence, are safe alignment points.
+    countsA = Counter(a[a0:a1])
+    countsB = Counter(b[b0:b1])
+    unique = [value for value, count in countsB.items() if count == 1 and countsA.get(value) == 1]
+    if not unique:
+        return []
+    allPositionsB = dict(zip(b[b0:b1], range(b0, b1)))
+    positionsB = {value: allPositionsB[value] for value in unique}
+    pairs = [(i, positionsB[value]) for i, value in enumerate(a[a0:a1], a0) if value in positionsB]
+    targets = [j for _, j in pairs]
+    if targets == sorted(targets):
+        return pairs
+
+    tails = []
+    tailIndex = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        slot = bisect_left(tails, j)
+        if slot == len(tails):
+            tails.append(j)
+            tailIndex.append(index)
+        else:
+            tails[slot] = j
+            tailIndex[slot] = index
+        previous[index] = tailIndex[slot - 1] if slot else -1
+
+    anchors = []
+    index = tailIndex[-1]
+    while index != -1:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def myersMatches(a, b, a0, a1, b0, b1, matches, maxCost=MYERS_MAX_COST):
+    # Classic O((N+M)D) Myers search used for regions without unique lines.
+    # Regions needing more than maxCost edits are left unmatched (a replace).
+    n = a1 - a0
+    m = b1 - b0
+    maxD = min(n + m, maxCost)
+    offset = maxD + 1
+    v = [0] * (2 * maxD + 3)
+    trace = []
+    for d in range(maxD + 1):
+        trace.append(v[:])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a0 + x] == b[b0 + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                backtrackMyers(trace, d, n, m, offset, a0, b0, matches)
+                return True
+    return False
+
+
+def backtrackMyers(trace, finalD, x, y, offset, a0, b0, matches):
+    for d in range(finalD, 0, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+            previousK = k + 1
+            snakeX = v[offset + previousK]
+        else:
+            previousK = k - 1
+            snakeX = v[offset + previousK] + 1
+        if x > snakeX:
+            matches.append((a0 + snakeX, b0 + snakeX - k, x - snakeX))
+        x = v[offset + previousK]
+        y = x - previousK
+    if x > 0:
+        matches.append((a0, b0, x))
+
+
+def iterMatchingBlocks(a, b, isCancelled=None):
+    # Regions are processed left to right: a region's suffix match is pushed
+    # beneath its middle, so matches come out in order and callers can stream them.
+    stack = [(0, len(a), 0, len(b))]
+    pending = None
+    while stack:
+        if isCancelled is not None and isCancelled():
+            raise DiffCancelled()
+        item = stack.pop()
+        if len(item) == 3:
+            found = [item]
+        else:
+            a0, a1, b0, b1 = item
+            found = []
+            prefix = commonPrefix(a, b, a0, a1, b0, b1)
+            if prefix:
+                found.append((a0, b0, prefix))
+                a0 += prefix
+                b0 += prefix
+            suffix = commonSuffix(a, b, a0, a1, b0, b1)
+            if suffix:
+                stack.append((a1 - suffix, b1 - suffix, suffix))
+                a1 -= suffix
+                b1 -= suffix
+            if a0 < a1 and b0 < b1:
+                anchors = uniqueAnchors(a, b, a0, a1, b0, b1)
+                if anchors:
+                    stack.extend(reversed(anchorItems(a, b, anchors, a0, a1, b0, b1)))
+                else:
+                    myersFound = []
+                    myersMatches(a, b, a0, a1, b0, b1, myersFound)
+                    found.extend(sorted(myersFound))
+
+        for i, j, n in found:
+            if pending and pending[0] + pending[2] == i and pending[1] + pending[2] == j:
+                pending = (pending[0], pending[1], pending[2] + n)
+            else:
+                if pending:
+                    yield pending
+                pending = (i, j, n)
+    if pending:
+        yield pending
+    yield (len(a), len(b), 0)
+
+
+def anchorItems(a, b, anchors, a0, a1, b0, b1):
+    # Runs of adjacent anchors (or anchors separated by identical gaps) become
+    # one match; only the gaps between runs are searched again.
+    items = []
+    previousA, previousB = a0, b0
+    runStart = None
+    for i, j in anchors:
+        if runStart is not None and i - previousA == j - previousB and \
+                a[previousA:i] == b[previousB:j]:
+            previousA, previousB = i + 1, j + 1
+            continue
+        if runStart is not None:
+            items.append((runStart[0], runStart[1], previousA - runStart[0]))
+        if i > previousA or j > previousB:
+            items.append((previousA, i, previousB, j))
+        runStart = (i, j)
+        previousA, previousB = i + 1, j + 1
+    items.append((runStart[0], runStart[1], previousA - runStart[0]))
+    if a1 > previousA or b1 > previousB:
+        items.append((previousA, a1, previousB, b1))
+    return items
+
+
+def matchingBlocks(a, b, isCancelled=None):
+    return list(iterMatchingBlocks(a, b, isCancelled))
+
+
+def iterOpcodes(a, b, isCancelled=None):
+    # Same tuples as difflib.SequenceMatcher.get_opcodes(), on the original lines.
+    a, b = internLines(a, b)
+    i = j = 0
+    for ai, bj, size in iterMatchingBlocks(a, b, isCancelled):
+        tag = ''
+        if i < ai and j < bj:
+            tag = 'replace'
+        elif i < ai:
+            tag = 'delete'
+        elif j < bj:
+            tag = 'insert'
+        if tag:
+            yield (tag, i, ai, j, bj)
+        i, j = ai + size, bj + size
+        if size:
+            yield ('equal', ai, i, bj, j)
+
+
+def getOpcodes(a, b, isCancelled=None):
+    return list(iterOpcodes(a, b, isCancelled))
+
+
+def groupOpcodes(opcodes, n=3):
+    # Streaming port of difflib.SequenceMatcher.get_grouped_opcodes(): the first
+    # and last equal runs are trimmed to n lines of context.
+    nn = n + n
+    group = []
+    previous = None
+    isFirst = True
+    for code in chain(opcodes, [None]):
+        if previous is None:
+            previous = code
+            continue
+        tag, i1, i2, j1, j2 = previous
+        if tag == 'equal' and isFirst:
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        if tag == 'equal' and code is None:
+            i2, j2 = min(i2, i1 + n), min(j2, j1 + n)
+        isFirst = False
+        previous = code
+
+        if tag == 'equal' and i2 - i1 > nn:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+
+def formatRangeUnified(start, stop):
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def hunkLines(a, b, group, lineterm='\n'):
+    first, last = group[0], group[-1]
+    file1Range = formatRangeUnified(first[1], last[2])
+    file2Range = formatRangeUnified(first[3], last[4])
+    yield f"@@ -{file1Range} +{file2Range} @@{lineterm}"
+    for tag, i1, i2, j1, j2 in group:
+        if tag == 'equal':
+            for line in a[i1:i2]:
+                yield ' ' + line
+            continue
+        if tag in {'replace', 'delete'}:
+            for line in a[i1:i2]:
+                yield '-' + line
+        if tag in {'replace', 'insert'}:
+            for line in b[j1:j2]:
+                yield '+' + line
+
+
+def unifiedDiff(a, b, fromfile='', tofile='', fromfiledate='', tofiledate='', n=3, lineterm='\n',
+                isCancelled=None):
+    # Drop-in replacement for difflib.unified_diff() producing the same format.
+    yield from formatUnified(a, b, iterOpcodes(a, b, isCancelled), fromfile, tofile,
+                             fromfiledate, tofiledate, n, lineterm)
+
+
+def formatUnified(a, b, opcodes, fromfile='', tofile='', fromfiledate='', tofiledate='', n=3, lineterm='\n'):
+    started = False
+    for group in groupOpcodes(opcodes, n):
+        if not started:
+            started = True
+            fromdate = f"\t{fromfiledate}" if fromfiledate else ''
+            todate = f"\t{tofiledate}" if tofiledate else ''
+            yield f"--- {fromfile}{fromdate}{lineterm}"
+            yield f"+++ {tofile}{todate}{lineterm}"
+        yield from hunkLines(a, b, group, lineterm)
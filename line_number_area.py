@@ -11,3 +11,15 @@ class LineNumberArea(QWidget):
 
     def paintEvent(self, event):
         self.editor.lineNumberAreaPaintEvent(event)
+
+
+class BlameArea(QWidget):
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+
+    def sizeHint(self):
+        return QSize(self.editor.blameWidth, 0)
+
+    def paintEvent(self, event):
+        self.editor.blameAreaPaintEvent(event)
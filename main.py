@@ -1,15 +1,67 @@
 import sys
+import time
+STARTED = time.perf_counter()
+import argparse
 from PyQt5.QtWidgets import QApplication
-from text_editor import TextEditor
+
+
+class StartupProfile:
+    # Wall-clock time spent in each startup phase, reported on stderr once
+    # the work deferred past the first paint has run.
+    def __init__(self, start):
+        self.last = start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        print(f"{'phase':<20}{'ms':>10}{'total ms':>12}", file=sys.stderr)
+        total = 0.0
+        for phase, seconds in self.phases:
+            total += seconds
+            print(f"{phase:<20}{seconds * 1000:>10.1f}{total * 1000:>12.1f}", file=sys.stderr)
+
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    editor = TextEditor()
+    parser = argparse.ArgumentParser(description="TrackText editor")
+    parser.add_argument("file", nargs="?", help="file to open")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print a breakdown of startup time up to the first paint")
+    parser.add_argument("--eager-startup", action="store_true",
+                        help="build the terminal and history panel before showing the window")
+    parser.add_argument("--no-session", action="store_true",
+                        help="neither restore nor save the open tabs")
+    parser.add_argument("--instrument", action="store_true",
+                        help="record latency timings from startup (see Tools > Performance Overlay)")
+    args, qtArgs = parser.parse_known_args()
+
+    if args.instrument:
+        from instrumentation import recorder
+        recorder.setEnabled(True)
+
+    profile = StartupProfile(STARTED)
+    profile.mark("Qt import")
+    app = QApplication(sys.argv[:1] + qtArgs)
+    profile.mark("QApplication")
+    from text_editor import TextEditor
+    from session import SESSION_PATH
+    profile.mark("editor imports")
+    editor = TextEditor(lazyStartup=not args.eager_startup,
+                        sessionPath=None if args.no_session else SESSION_PATH)
+    profile.mark("main window")
 
     # Check if a file path was passed as a command-line argument
-    if len(sys.argv) > 1:
-        file_path = sys.argv[1]
-        editor.openFile(file_path)
+    if args.file:
+        editor.openFile(args.file)
+        profile.mark("open file")
+
+    if args.startup_profile:
+        editor.firstPainted.connect(lambda: profile.mark("first paint"))
+        editor.startupFinished.connect(lambda: (profile.mark("deferred work"), profile.report()))
 
     editor.show()
+    profile.mark("show")
     sys.exit(app.exec_())
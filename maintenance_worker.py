@@ -0,0 +1,19 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from store_maintenance import compactStore
+
+
+class CompactionWorker(QThread):
+    compactionFinished = pyqtSignal(object)
+    compactionFailed = pyqtSignal(str)
+
+    def __init__(self, collectGarbage, parent=None):
+        super().__init__(parent)
+        self.collectGarbage = collectGarbage
+
+    def run(self):
+        try:
+            stats = compactStore(collectGarbage=self.collectGarbage)
+        except Exception as e:
+            self.compactionFailed.emit(str(e))
+            return
+        self.compactionFinished.emit(stats)
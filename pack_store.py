@@ -0,0 +1,149 @@
+import os
+import mmap
+import struct
+import hashlib
+import tempfile
+
+PACK_MAGIC = b"TTPACK1\n"
+INDEX_MAGIC = b"TTIDX1\n\0"
+INDEX_HEADER = struct.Struct("<8sI")
+INDEX_ENTRY = struct.Struct("<32sQQ")
+DIGEST_SIZE = 32
+
+
+class PackError(Exception):
+    pass
+
+
+class Pack:
+    # A pack is the concatenation of object records plus an index of
+    # (digest, offset, length) sorted by digest. Both files are mapped, so a
+    # lookup is a binary search over the index and a record is a memoryview
+    # into the pack: nothing is read or copied until it is decompressed.
+    def __init__(self, packPath):
+        self.packPath = packPath
+        self.indexPath = packPath[:-len(".pack")] + ".idx"
+        self.packFile = open(packPath, 'rb')
+        self.indexFile = open(self.indexPath, 'rb')
+        try:
+            self.data = mmap.mmap(self.packFile.fileno(), 0, access=mmap.ACCESS_READ)
+            self.index = mmap.mmap(self.indexFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            self.close()
+            raise PackError(f"Cannot map pack {packPath}") from e
+        magic, self.count = INDEX_HEADER.unpack_from(self.index, 0)
+        if (magic != INDEX_MAGIC or self.data[:len(PACK_MAGIC)] != PACK_MAGIC
+                or len(self.index) != INDEX_HEADER.size + self.count * INDEX_ENTRY.size):
+            self.close()
+            raise PackError(f"Corrupt pack {packPath}")
+        self.view = memoryview(self.data)
+
+    def digestAt(self, position):
+        start = INDEX_HEADER.size + position * INDEX_ENTRY.size
+        return self.index[start:start + DIGEST_SIZE]
+
+    def find(self, digest):
+        # Returns (offset, length) of the record, or None.
+        key = bytes.fromhex(digest)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.digestAt(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.digestAt(low) == key:
+            _, offset, length = INDEX_ENTRY.unpack_from(self.index, INDEX_HEADER.size + low * INDEX_ENTRY.size)
+            return offset, length
+        return None
+
+    def record(self, digest):
+        location = self.find(digest)
+        if location is None:
+            return None
+        offset, length = location
+        return self.view[offset:offset + length]
+
+    def digests(self):
+        for position in range(self.count):
+            yield self.digestAt(position).hex()
+
+    def close(self):
+        # Records handed out keep the mapping alive; it is released with the last of them.
+        if getattr(self, "view", None) is not None:
+            self.view.release()
+        for mapped in (getattr(self, "data", None), getattr(self, "index", None)):
+            if mapped is not None:
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass
+        self.view = self.data = self.index = None
+        self.packFile.close()
+        self.indexFile.close()
+
+
+def writePack(packDir, records):
+    # records: iterable of (digest, record bytes). The pack is written first and
+    # the index last, so a pack only becomes visible once it is complete.
+    os.makedirs(packDir, exist_ok=True)
+    entries = []
+    checksum = hashlib.sha256()
+    # Temp files are unique per writer, so concurrent writers in one process
+    # never share one, like the loose objects written through replaceFile.
+    fd, tempPack = tempfile.mkstemp(prefix="incoming.", suffix=".pack.tmp", dir=packDir)
+    try:
+        with os.fdopen(fd, 'wb') as packFile:
+            packFile.write(PACK_MAGIC)
+            offset = len(PACK_MAGIC)
+            for digest, record in records:
+                packFile.write(record)
+                entries.append((bytes.fromhex(digest), offset, len(record)))
+                checksum.update(bytes.fromhex(digest))
+                offset += len(record)
+            packFile.flush()
+            os.fsync(packFile.fileno())
+        if not entries:
+            os.remove(tempPack)
+            return None
+
+        entries.sort()
+        name = os.path.join(packDir, f"pack-{checksum.hexdigest()[:24]}")
+        os.replace(tempPack, f"{name}.pack")
+    except BaseException:
+        if os.path.exists(tempPack):
+            os.remove(tempPack)
+        raise
+
+    fd, tempIndex = tempfile.mkstemp(prefix="incoming.", suffix=".idx.tmp", dir=packDir)
+    try:
+        with os.fdopen(fd, 'wb') as indexFile:
+            indexFile.write(INDEX_HEADER.pack(INDEX_MAGIC, len(entries)))
+            for entry in entries:
+                indexFile.write(INDEX_ENTRY.pack(*entry))
+            indexFile.flush()
+            os.fsync(indexFile.fileno())
+        os.replace(tempIndex, f"{name}.idx")
+    except BaseException:
+        if os.path.exists(tempIndex):
+            os.remove(tempIndex)
+        raise
+    return f"{name}.pack"
+
+
+def listPacks(packDir):
+    try:
+        names = os.listdir(packDir)
+    except OSError:
+        return []
+    return sorted(os.path.join(packDir, name) for name in names
+                  if name.endswith(".pack") and os.path.exists(os.path.join(packDir, name[:-5] + ".idx")))
+
+
+def removePack(packPath):
+    # The index goes first so a half-removed pack is never picked up again.
+    for fileName in (packPath[:-len(".pack")] + ".idx", packPath):
+        try:
+            os.remove(fileName)
+        except OSError:
+            pass
@@ -0,0 +1,90 @@
+import time
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from file_io import atomicWrite
+from instrumentation import recorder
+
+
+class SaveWorker(QThread):
+    saveFinished = pyqtSignal(str, str)
+
+    def __init__(self, filePath, content, parent=None):
+        super().__init__(parent)
+        self.filePath = filePath
+        self.content = content
+        # Also kept here for waitForAll, which runs without an event loop.
+        self.error = ""
+
+    def run(self):
+        try:
+            atomicWrite(self.filePath, self.content)
+        except Exception as e:
+            self.error = str(e)
+        self.saveFinished.emit(self.filePath, self.error)
+
+
+class SaveQueue(QObject):
+    saveCompleted = pyqtSignal(str)
+    saveFailed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.activeWorkers = {}
+        self.pendingSnapshots = {}
+        self.saveStarted = {}
+
+    def save(self, filePath, snapshot):
+        # `snapshot` returns the text to write. While a write to the same path is
+        # in flight, further requests only replace the pending snapshot, so a
+        # burst of Ctrl+S presses costs one extra write and one extra copy.
+        if filePath in self.activeWorkers:
+            self.pendingSnapshots[filePath] = snapshot
+            return
+        self.startWorker(filePath, snapshot())
+
+    def isSaving(self, filePath):
+        return filePath in self.activeWorkers
+
+    def startWorker(self, filePath, content):
+        if recorder.enabled:
+            self.saveStarted[filePath] = time.perf_counter()
+        worker = SaveWorker(filePath, content, self)
+        worker.saveFinished.connect(self.onSaveFinished)
+        self.activeWorkers[filePath] = worker
+        worker.start()
+
+    def onSaveFinished(self, filePath, error):
+        worker = self.activeWorkers.pop(filePath, None)
+        if worker is None:
+            return
+        worker.wait()
+        worker.deleteLater()
+        started = self.saveStarted.pop(filePath, None)
+        if started is not None and not error:
+            recorder.recordDuration("save", started)
+
+        # A failed write is reported even when a newer snapshot follows it.
+        if error:
+            self.saveFailed.emit(filePath, error)
+        snapshot = self.pendingSnapshots.pop(filePath, None)
+        if snapshot is not None:
+            self.startWorker(filePath, snapshot())
+        elif not error:
+            self.saveCompleted.emit(filePath)
+
+    def waitForAll(self):
+        # Used on shutdown: finish in-flight writes and flush pending snapshots
+        # synchronously instead of starting new workers. Returns the
+        # (filePath, error) of every write that failed.
+        failures = []
+        activeWorkers, self.activeWorkers = self.activeWorkers, {}
+        for filePath, worker in activeWorkers.items():
+            worker.wait()
+            if worker.error:
+                failures.append((filePath, worker.error))
+            snapshot = self.pendingSnapshots.pop(filePath, None)
+            if snapshot is not None:
+                try:
+                    atomicWrite(filePath, snapshot())
+                except Exception as e:
+                    failures.append((filePath, str(e)))
+        return failures
@@ -0,0 +1,192 @@
+import os
+import re
+import sqlite3
+from store_paths import STORE_ROOT
+from history_catalog import HistoryCatalog, readEntryContent
+
+SEARCH_INDEX_PATH = os.path.join(STORE_ROOT, "search.sqlite3")
+RESULT_LIMIT = 500
+QUERY_CHUNK = 500
+TOKEN_PATTERN = re.compile(r"\w+")
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS lines (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        path TEXT NOT NULL,
+        text TEXT NOT NULL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS lines_path_text ON lines(path, text);
+    CREATE TABLE IF NOT EXISTS postings (
+        path TEXT NOT NULL,
+        token TEXT NOT NULL,
+        lineId INTEGER NOT NULL,
+        PRIMARY KEY (path, token, lineId)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS spans (
+        lineId INTEGER NOT NULL,
+        firstSeq INTEGER NOT NULL,
+        endSeq INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS spans_line ON spans(lineId, endSeq);
+    CREATE INDEX IF NOT EXISTS spans_first ON spans(firstSeq);
+    CREATE TABLE IF NOT EXISTS indexedFiles (
+        path TEXT PRIMARY KEY,
+        versionCount INTEGER NOT NULL
+    );
+"""
+
+
+def tokenize(text):
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+
+def chunks(items, size=QUERY_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SearchIndex:
+    # Inverted index over every version of every tracked file. Postings map a
+    # token to the distinct lines containing it; spans record the half-open
+    # range of versions [firstSeq, endSeq) in which each line is present. A
+    # commit only touches the lines it added or removed, so indexing cost
+    # follows the size of the change, not the number of versions.
+    def __init__(self, path=None, catalog=None):
+        self.path = path or SEARCH_INDEX_PATH
+        self.catalog = catalog
+        self.connection = None
+
+    def connect(self):
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        if self.catalog is not None:
+            self.catalog.close()
+
+    def getCatalog(self):
+        # Each SearchIndex opens its own catalog connection, so an index built on
+        # a worker thread never shares a sqlite3 connection with the GUI thread.
+        if self.catalog is None:
+            self.catalog = HistoryCatalog()
+        return self.catalog
+
+    def indexedCount(self, path):
+        row = self.connect().execute(
+            "SELECT versionCount FROM indexedFiles WHERE path = ?",
+            (HistoryCatalog.normalizePath(path),)).fetchone()
+        return row[0] if row else 0
+
+    def invalidateFrom(self, path, seq):
+        # Rolls the index back to the state after version seq - 1, so an amended
+        # version and everything after it is indexed again.
+        path = HistoryCatalog.normalizePath(path)
+        connection = self.connect()
+        if self.indexedCount(path) <= seq:
+            return
+        with connection:
+            lineIds = "SELECT id FROM lines WHERE path = ?"
+            connection.execute(f"DELETE FROM spans WHERE firstSeq >= ? AND lineId IN ({lineIds})", (seq, path))
+            connection.execute(
+                f"UPDATE spans SET endSeq = NULL WHERE endSeq >= ? AND lineId IN ({lineIds})", (seq, path))
+            connection.execute("UPDATE indexedFiles SET versionCount = ? WHERE path = ?", (seq, path))
+
+    def update(self, path, isCancelled=None):
+        path = HistoryCatalog.normalizePath(path)
+        catalog = self.getCatalog()
+        total = catalog.count(path)
+        done = self.indexedCount(path)
+        if done >= total:
+            return 0
+
+        previous = set(self.readLines(path, catalog.entryAt(path, done - 1))) if done else set()
+        for entry in catalog.page(path, done, total - done):
+            if isCancelled and isCancelled():
+                break
+            current = set(self.readLines(path, entry))
+            self.indexVersion(path, entry["seq"], previous, current)
+            previous = current
+        return self.indexedCount(path) - done
+
+    def indexVersion(self, path, seq, previous, current):
+        connection = self.connect()
+        with connection:
+            for text in current - previous:
+                tokens = tokenize(text)
+                if tokens:
+                    connection.execute("INSERT INTO spans (lineId, firstSeq) VALUES (?, ?)",
+                                       (self.lineId(path, text, tokens), seq))
+            # Lines without tokens were never added, so these updates match nothing.
+            connection.executemany(
+                "UPDATE spans SET endSeq = ? WHERE endSeq IS NULL AND "
+                "lineId = (SELECT id FROM lines WHERE path = ? AND text = ?)",
+                ((seq, path, text) for text in previous - current))
+            connection.execute(
+                "INSERT INTO indexedFiles (path, versionCount) VALUES (?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET versionCount = excluded.versionCount", (path, seq + 1))
+
+    def lineId(self, path, text, tokens):
+        connection = self.connect()
+        row = connection.execute("SELECT id FROM lines WHERE path = ? AND text = ?", (path, text)).fetchone()
+        if row:
+            return row[0]
+        lineId = connection.execute("INSERT INTO lines (path, text) VALUES (?, ?)", (path, text)).lastrowid
+        connection.executemany("INSERT INTO postings (path, token, lineId) VALUES (?, ?, ?)",
+                               ((path, token, lineId) for token in tokens))
+        return lineId
+
+    @staticmethod
+    def readLines(path, entry):
+        return readEntryContent(path, entry).splitlines()
+
+    def search(self, path, phrase, limit=RESULT_LIMIT):
+        # Returns {"text", "firstSeq", "lastSeq"} for each line containing the
+        # phrase, most recently present first. Words must match whole tokens,
+        # except the last one, which may be a prefix.
+        path = HistoryCatalog.normalizePath(path)
+        needle = phrase.strip().lower()
+        words = TOKEN_PATTERN.findall(needle)
+        if not words:
+            return []
+
+        connection = self.connect()
+        candidates = None
+        for position, word in enumerate(words):
+            if position == len(words) - 1:
+                rows = connection.execute(
+                    "SELECT lineId FROM postings WHERE path = ? AND token >= ? AND token < ?",
+                    (path, word, word + "\U0010ffff"))
+            else:
+                rows = connection.execute(
+                    "SELECT lineId FROM postings WHERE path = ? AND token = ?", (path, word))
+            lineIds = {row[0] for row in rows}
+            candidates = lineIds if candidates is None else candidates & lineIds
+            if not candidates:
+                return []
+
+        texts = {}
+        for chunk in chunks(candidates):
+            marks = ",".join("?" * len(chunk))
+            for lineId, text in connection.execute(f"SELECT id, text FROM lines WHERE id IN ({marks})", chunk):
+                if needle in text.lower():
+                    texts[lineId] = text
+
+        newest = self.indexedCount(path) - 1
+        results = []
+        for chunk in chunks(texts):
+            marks = ",".join("?" * len(chunk))
+            for lineId, firstSeq, endSeq in connection.execute(
+                    f"SELECT lineId, firstSeq, endSeq FROM spans WHERE lineId IN ({marks})", chunk):
+                results.append({"text": texts[lineId], "firstSeq": firstSeq,
+                                "lastSeq": newest if endSeq is None else endSeq - 1})
+        results.sort(key=lambda result: (result["lastSeq"], result["firstSeq"]), reverse=True)
+        return results[:limit]
@@ -0,0 +1,76 @@
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from search_index import SearchIndex
+
+
+class SearchIndexWorker(QThread):
+    indexFailed = pyqtSignal(str, str)
+
+    def __init__(self, requests, parent=None):
+        super().__init__(parent)
+        # path -> first version to re-index, or None to only catch up.
+        self.requests = requests
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        index = SearchIndex()
+        try:
+            for filePath, invalidFrom in self.requests.items():
+                if self.cancelled:
+                    break
+                try:
+                    if invalidFrom is not None:
+                        index.invalidateFrom(filePath, invalidFrom)
+                    index.update(filePath, lambda: self.cancelled)
+                except Exception as e:
+                    self.indexFailed.emit(filePath, str(e))
+        finally:
+            index.close()
+
+
+class SearchIndexQueue(QObject):
+    indexUpdated = pyqtSignal()
+    indexFailed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.worker = None
+        self.pendingRequests = {}
+
+    def schedule(self, filePath, invalidFrom=None):
+        # Requests made while a worker runs are merged and handled by the next one.
+        if filePath in self.pendingRequests and self.pendingRequests[filePath] is not None:
+            current = self.pendingRequests[filePath]
+            invalidFrom = current if invalidFrom is None else min(current, invalidFrom)
+        self.pendingRequests[filePath] = invalidFrom
+        if self.worker is None:
+            self.startWorker()
+
+    def isIndexing(self):
+        return self.worker is not None
+
+    def startWorker(self):
+        self.worker = SearchIndexWorker(self.pendingRequests, self)
+        self.pendingRequests = {}
+        self.worker.indexFailed.connect(self.indexFailed)
+        self.worker.finished.connect(self.onWorkerFinished)
+        self.worker.start()
+
+    def onWorkerFinished(self):
+        if self.worker is None:
+            return
+        self.worker.deleteLater()
+        self.worker = None
+        self.indexUpdated.emit()
+        if self.pendingRequests:
+            self.startWorker()
+
+    def shutdown(self):
+        # The index is rebuilt from the catalog, so unfinished work can simply be dropped.
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker = None
+        self.pendingRequests = {}
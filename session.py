@@ -0,0 +1,91 @@
+import os
+import json
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt5.QtCore import Qt, QThread
+from store_paths import STORE_ROOT
+from file_io import atomicWrite
+from file_loader import ASYNC_LOAD_THRESHOLD
+
+SESSION_PATH = os.path.join(STORE_ROOT, "session.json")
+SESSION_FORMAT = 1
+
+
+def readSession(path=SESSION_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as sessionFile:
+            session = json.load(sessionFile)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(session, dict) or session.get("format") != SESSION_FORMAT:
+        return None
+    return session
+
+
+def writeSession(tabs, activeIndex, path=SESSION_PATH):
+    # tabs: dicts with "path" and optionally "cursor" and "scroll".
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    session = {"format": SESSION_FORMAT, "activeIndex": activeIndex, "tabs": tabs}
+    atomicWrite(path, json.dumps(session, indent=1))
+
+
+class PrefetchWorker(QThread):
+    # Reads a small file in the background so activating its tab only has to
+    # hand the text to the editor.
+    def __init__(self, filePath, parent=None):
+        super().__init__(parent)
+        self.filePath = filePath
+        self.content = None
+        self.mtime = None
+
+    def run(self):
+        try:
+            mtime = os.stat(self.filePath).st_mtime_ns
+            with open(self.filePath, 'r', encoding='utf-8') as file:
+                self.content = file.read()
+            self.mtime = mtime
+        except (OSError, ValueError):
+            self.content = None
+
+
+class TabPlaceholder(QWidget):
+    # Stands in for a restored tab until it is first activated. Only the path
+    # and the saved view state are kept; nothing is read from disk.
+    def __init__(self, parent=None, filePath=None, cursorPosition=0, scrollPosition=0):
+        super().__init__(parent)
+        self.currentFile = filePath
+        self.cursorPosition = cursorPosition
+        self.scrollPosition = scrollPosition
+        self.prefetchWorker = None
+
+        layout = QVBoxLayout(self)
+        label = QLabel(f"Loading {os.path.basename(filePath)}…", self)
+        label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(label)
+
+    def sessionState(self):
+        return {"path": self.currentFile, "cursor": self.cursorPosition, "scroll": self.scrollPosition}
+
+    def prefetch(self):
+        if self.prefetchWorker is not None:
+            return
+        try:
+            if os.path.getsize(self.currentFile) >= ASYNC_LOAD_THRESHOLD:
+                return
+        except OSError:
+            return
+        self.prefetchWorker = PrefetchWorker(self.currentFile, self)
+        self.prefetchWorker.start()
+
+    def takePrefetched(self):
+        # The prefetched text is only used if the file has not changed since.
+        worker = self.prefetchWorker
+        if worker is None:
+            return None
+        worker.wait()
+        self.prefetchWorker = None
+        try:
+            if worker.content is None or os.stat(self.currentFile).st_mtime_ns != worker.mtime:
+                return None
+        except OSError:
+            return None
+        return worker.content
@@ -0,0 +1,83 @@
+import os
+import json
+from store_paths import STORE_ROOT
+from version_store import VersionStore, readLegacySnapshot
+from history_catalog import HistoryCatalog, PAGE_SIZE
+
+AUTO_PACK_THRESHOLD = 512
+# Directories under STORE_ROOT that belong to the store itself, not to a legacy history.
+STORE_DIRECTORIES = {"objects", "packs", "blame", "recovery"}
+
+
+def migrateLegacySnapshots(catalog, store):
+    # Plain {timestamp}.txt snapshots the catalog still points at are moved into
+    # the store, chained to their predecessor so they compress as deltas.
+    migrated = 0
+    for path in catalog.legacyPaths():
+        parent = None
+        for offset in range(0, catalog.count(path), PAGE_SIZE):
+            for entry in catalog.page(path, offset, PAGE_SIZE):
+                if entry["hash"]:
+                    parent = entry["hash"]
+                    continue
+                try:
+                    content = readLegacySnapshot(entry["legacyDir"], entry["timestamp"])
+                except (OSError, ValueError):
+                    # Missing or not UTF-8: left as a plain snapshot.
+                    continue
+                parent = store.put(content, parent=parent)
+                catalog.updateVersion(entry["id"], digest=parent)
+                migrated += 1
+    return migrated
+
+
+def legacyDirectories(root):
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    return [os.path.join(root, name) for name in names
+            if name not in STORE_DIRECTORIES and os.path.isfile(os.path.join(root, name, "history.json"))]
+
+
+def removeOrphanedSnapshots(catalog, root):
+    # A claimed directory's snapshots are referenced by the catalog; one nobody
+    # has opened since the upgrade is still described by its history.json.
+    references = catalog.legacyReferences()
+    claimed = catalog.claimedLegacyDirs()
+    removed = 0
+    for legacyDir in legacyDirectories(root):
+        if legacyDir in claimed:
+            referenced = references.get(legacyDir, set())
+        else:
+            try:
+                with open(os.path.join(legacyDir, "history.json"), 'r', encoding='utf-8') as historyFile:
+                    referenced = {entry.get("timestamp") for entry in json.load(historyFile)
+                                  if not entry.get("hash")}
+            except (OSError, ValueError):
+                continue
+        for name in os.listdir(legacyDir):
+            if name.endswith(".txt") and name[:-4] not in referenced:
+                try:
+                    os.remove(os.path.join(legacyDir, name))
+                    removed += 1
+                except OSError:
+                    pass
+    return removed
+
+
+def compactStore(root=None, collectGarbage=True):
+    # Returns counts of what was migrated, packed and removed.
+    root = root or STORE_ROOT
+    store = VersionStore(root)
+    catalog = HistoryCatalog(os.path.join(root, "catalog.sqlite3"))
+    try:
+        stats = {"migrated": 0, "removedObjects": 0, "removedSnapshots": 0}
+        if collectGarbage:
+            stats["migrated"] = migrateLegacySnapshots(catalog, store)
+            stats["removedObjects"] = store.collectGarbage(catalog.referencedHashes())
+            stats["removedSnapshots"] = removeOrphanedSnapshots(catalog, root)
+        stats["packed"] = store.pack()
+        return stats
+    finally:
+        catalog.close()
@@ -0,0 +1,5 @@
+import os
+
+# Everything the editor keeps besides the edited files lives under this
+# directory. It is kept free of imports so any module can use it cheaply.
+STORE_ROOT = os.path.expanduser("~/.version_control_text_editor")
@@ -0,0 +1,192 @@
+import time
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QTextCursor, QColor, QFont
+
+IDLE_BUDGET = 0.008
+IDLE_BATCH_BLOCKS = 256
+UNHIGHLIGHTED = -1
+
+TOKEN_STYLES = {
+    "keyword": ("#569cd6", QFont.Bold, False),
+    "builtin": ("#4ec9b0", QFont.Normal, False),
+    "constant": ("#569cd6", QFont.Normal, False),
+    "string": ("#ce9178", QFont.Normal, False),
+    "number": ("#b5cea8", QFont.Normal, False),
+    "comment": ("#6a9955", QFont.Normal, True),
+    "decorator": ("#c586c0", QFont.Normal, False),
+    "function": ("#dcdcaa", QFont.Normal, False),
+}
+tokenFormats = {}
+
+
+def formatFor(tokenType):
+    # One shared QTextCharFormat per token type.
+    textFormat = tokenFormats.get(tokenType)
+    if textFormat is None:
+        color, weight, italic = TOKEN_STYLES[tokenType]
+        textFormat = QTextCharFormat()
+        textFormat.setForeground(QColor(color))
+        textFormat.setFontWeight(weight)
+        textFormat.setFontItalic(italic)
+        tokenFormats[tokenType] = textFormat
+    return textFormat
+
+
+def toUtf16Spans(text, spans):
+    # Qt offsets count UTF-16 code units, so characters outside the BMP count twice.
+    units = [0]
+    for character in text:
+        units.append(units[-1] + (2 if character > "\uffff" else 1))
+    return [(units[start], units[start + length] - units[start], tokenType) for start, length, tokenType in spans]
+
+
+class SyntaxHighlighter(QSyntaxHighlighter):
+    # Each block's state is the tokenizer state at its end, so after an edit
+    # QSyntaxHighlighter only moves on to the next block while that state
+    # changes. Blocks are first highlighted by an in-order pass run in idle
+    # slices; `frontier` marks how far it got. Blocks past it are skipped when
+    # Qt reformats them (a load, say) unless they are visible, in which case
+    # they are highlighted right away from the best state known.
+    def __init__(self, editor):
+        super().__init__(editor.document())
+        self.editor = editor
+        self.language = None
+        self.frontier = QTextCursor(editor.document())
+        self.frontier.setKeepPositionOnInsert(True)
+        self.forceEnd = -1
+        self.highlightedEnd = 0
+        self.complete = True
+        self.idlePending = False
+        self.inViewportPass = False
+        self.inIdlePass = False
+
+        self.idleTimer = QTimer(self)
+        self.idleTimer.setSingleShot(True)
+        self.idleTimer.setInterval(0)
+        self.idleTimer.timeout.connect(self.highlightPending)
+        editor.updateRequest.connect(self.onUpdateRequest)
+
+    def setLanguage(self, language):
+        if language is self.language:
+            return
+        previous = self.language
+        self.language = language
+        self.frontier.setPosition(0)
+        if language is None:
+            self.complete = True
+            if previous is not None:
+                self.rehighlight()
+            return
+        self.highlightViewport(force=True)
+        self.scheduleIdle()
+
+    def scheduleIdle(self):
+        self.complete = False
+        if not self.idlePending:
+            self.idlePending = True
+            self.idleTimer.start()
+
+    def highlightBlock(self, text):
+        language = self.language
+        if language is None:
+            return
+        block = self.currentBlock()
+        position = block.position()
+        if (position >= self.frontier.position() and position >= self.forceEnd
+                and block.userState() == UNHIGHLIGHTED):
+            # Leaving the state untouched also stops Qt's cascade here.
+            self.scheduleIdle()
+            return
+
+        spans, state = language.tokenizeLine(text, max(self.previousBlockState(), 0))
+        if spans and not text.isascii() and max(text) > "\uffff":
+            spans = toUtf16Spans(text, spans)
+        for start, length, tokenType in spans:
+            self.setFormat(start, length, formatFor(tokenType))
+        self.setCurrentBlockState(state)
+        self.highlightedEnd = position + block.length()
+
+    def nextPendingBlock(self):
+        position = self.frontier.position()
+        block = self.document().findBlock(position)
+        if block.isValid() and block.position() < position:
+            block = block.next()
+        return block
+
+    def highlightPending(self):
+        # One idle slice of the in-order pass, in batches of blocks that the
+        # state cascade carries through with a single rehighlightBlock call.
+        self.idlePending = False
+        if self.language is None:
+            return
+        deadline = time.perf_counter() + IDLE_BUDGET
+        block = self.nextPendingBlock()
+        self.inIdlePass = True
+        try:
+            block = self.highlightBatches(block, deadline)
+        finally:
+            self.inIdlePass = False
+        if block.isValid():
+            self.scheduleIdle()
+        else:
+            self.complete = True
+
+    def highlightBatches(self, block, deadline):
+        document = self.document()
+        while block.isValid():
+            last = block
+            for _ in range(IDLE_BATCH_BLOCKS):
+                following = last.next()
+                if not following.isValid():
+                    break
+                last = following
+            self.forceEnd = last.position() + last.length()
+            while block.isValid() and block.position() < self.forceEnd:
+                self.highlightedEnd = block.position()
+                self.rehighlightBlock(block)
+                # Continue after the last block the cascade reached.
+                if self.highlightedEnd >= document.characterCount():
+                    block = document.lastBlock().next()
+                else:
+                    following = document.findBlock(self.highlightedEnd)
+                    block = following if following.position() > block.position() else block.next()
+            self.forceEnd = -1
+            self.frontier.setPosition(min(self.highlightedEnd, document.characterCount() - 1))
+            if time.perf_counter() > deadline:
+                break
+        return block
+
+    def onUpdateRequest(self, *args):
+        if not self.complete:
+            self.highlightViewport()
+
+    def highlightViewport(self, force=False):
+        # Visible blocks the pass has not reached yet, so that what is on
+        # screen is highlighted before the rest of a large file.
+        # Every block an idle slice formats emits updateRequest; that slice
+        # repaints what it reaches and the next paint brings the viewport in.
+        if self.language is None or self.inViewportPass or self.inIdlePass:
+            return
+        editor = self.editor
+        block = editor.firstVisibleBlock()
+        top = editor.blockBoundingGeometry(block).translated(editor.contentOffset()).top()
+        bottom = editor.viewport().height()
+        visible = []
+        while block.isValid() and top <= bottom:
+            visible.append(block)
+            top += editor.blockBoundingRect(block).height()
+            block = block.next()
+        if not visible:
+            return
+
+        frontier = self.frontier.position()
+        previousForceEnd = self.forceEnd
+        self.inViewportPass = True
+        self.forceEnd = max(previousForceEnd, visible[-1].position() + visible[-1].length())
+        try:
+            for block in visible:
+                if block.position() >= frontier and (force or block.userState() == UNHIGHLIGHTED):
+                    self.rehighlightBlock(block)
+        finally:
+            self.forceEnd = previousForceEnd
+            self.inViewportPass = False
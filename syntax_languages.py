@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import threading
+from store_paths import STORE_ROOT
+
+LANGUAGE_DIR = os.path.join(STORE_ROOT, "languages")
+TOKEN_TYPES = ("keyword", "builtin", "constant", "string", "number", "comment", "decorator", "function")
+
+
+class LanguageError(Exception):
+    pass
+
+
+class LanguageDefinition:
+    # rules: (tokenType, regex) tried leftmost-first, earlier rules winning ties.
+    # blocks: (tokenType, startRegex, endRegex) for constructs that may span
+    # lines, such as block comments and triple-quoted strings. Patterns must
+    # not rely on their own group numbers.
+    def __init__(self, name, extensions, rules, blocks=(), flags=0):
+        self.name = name
+        self.extensions = [extension.lower() for extension in extensions]
+        self.rules = list(rules)
+        self.blocks = list(blocks)
+        self.flags = flags
+
+    @classmethod
+    def fromJson(cls, data):
+        flags = re.IGNORECASE if data.get("ignoreCase") else 0
+        return cls(data["name"], data.get("extensions", []), [tuple(rule) for rule in data.get("rules", [])],
+                   [tuple(block) for block in data.get("blocks", [])], flags)
+
+
+class CompiledLanguage:
+    # All rules and block openers are joined into one alternation, so a line is
+    # tokenized with one regex scan instead of one scan per rule. Block state
+    # n > 0 means the line starts inside blocks[n - 1].
+    def __init__(self, definition):
+        self.name = definition.name
+        alternatives = []
+        self.groupTypes = {}
+        self.groupBlocks = {}
+        for index, (tokenType, pattern) in enumerate(definition.rules):
+            alternatives.append(f"(?P<r{index}>{pattern})")
+            self.groupTypes[f"r{index}"] = self.checkType(tokenType)
+        self.blockTypes = []
+        self.blockEnds = []
+        for index, (tokenType, start, end) in enumerate(definition.blocks):
+            alternatives.append(f"(?P<b{index}>{start})")
+            self.groupBlocks[f"b{index}"] = index
+            self.blockTypes.append(self.checkType(tokenType))
+            self.blockEnds.append(re.compile(end, definition.flags))
+        # Blocks are listed first so that e.g. ''' is not read as an empty string.
+        alternatives = alternatives[len(definition.rules):] + alternatives[:len(definition.rules)]
+        try:
+            self.pattern = re.compile("|".join(alternatives), definition.flags) if alternatives else None
+        except re.error as e:
+            raise LanguageError(f"Invalid pattern in language {definition.name}: {e}") from e
+
+    @staticmethod
+    def checkType(tokenType):
+        if tokenType not in TOKEN_TYPES:
+            raise LanguageError(f"Unknown token type {tokenType}")
+        return tokenType
+
+    def tokenizeLine(self, text, state=0):
+        # Returns ([(start, length, tokenType)], endState).
+        spans = []
+        position = 0
+        if state > 0:
+            end = self.blockEnds[state - 1].search(text)
+            tokenType = self.blockTypes[state - 1]
+            if end is None:
+                return [(0, len(text), tokenType)] if text else [], state
+            spans.append((0, end.end(), tokenType))
+            position = end.end()
+        if self.pattern is None:
+            return spans, 0
+
+        search = self.pattern.search
+        length = len(text)
+        while position < length:
+            match = search(text, position)
+            if match is None:
+                break
+            group = match.lastgroup
+            start, stop = match.span()
+            block = self.groupBlocks.get(group)
+            if block is not None:
+                end = self.blockEnds[block].search(text, stop)
+                if end is None:
+                    spans.append((start, length - start, self.blockTypes[block]))
+                    return spans, block + 1
+                stop = end.end()
+                spans.append((start, stop - start, self.blockTypes[block]))
+            elif stop > start:
+                spans.append((start, stop - start, self.groupTypes[group]))
+            position = stop if stop > start else stop + 1
+        return spans, 0
+
+
+def words(names):
+    return r"\b(?:" + "|".join(sorted(names.split(), key=len, reverse=True)) + r")\b"
+
+
+NUMBER = r"\b(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+|\d[\d_]*\.?[\d_]*(?:[eE][+-]?\d+)?)[jJlLuUfF]*\b"
+C_KEYWORDS = """auto break case char const continue default do double else enum extern float for goto if
+    inline int long register restrict return short signed sizeof static struct switch typedef union unsigned
+    void volatile while class namespace template typename public private protected virtual override final
+    new delete this throw try catch using operator friend explicit constexpr noexcept nullptr bool
+    static_cast dynamic_cast reinterpret_cast const_cast import package extends implements interface
+    abstract synchronized throws instanceof super finally native transient"""
+JS_KEYWORDS = """break case catch class const continue debugger default delete do else export extends finally
+    for function if import in instanceof let new return super switch this throw try typeof var void while
+    with yield async await of static get set from as interface type enum implements declare readonly
+    public private protected abstract keyof namespace"""
+PYTHON_KEYWORDS = """and as assert async await break class continue def del elif else except finally for from
+    global if import in is lambda nonlocal not or pass raise return try while with yield match case"""
+PYTHON_BUILTINS = """abs all any bin bool bytearray bytes callable chr classmethod compile dict dir divmod
+    enumerate eval exec filter float format frozenset getattr globals hasattr hash help hex id input int
+    isinstance issubclass iter len list locals map max memoryview min next object oct open ord pow print
+    property range repr reversed round set setattr slice sorted staticmethod str sum super tuple type vars
+    zip self cls Exception ValueError TypeError KeyError IndexError OSError RuntimeError"""
+SHELL_KEYWORDS = """if then else elif fi case esac for while until do done in function select time return
+    exit export local readonly declare set unset source alias echo cd shift trap eval exec"""
+
+BUILTIN_LANGUAGES = [
+    LanguageDefinition("Python", [".py", ".pyw", ".pyi"], [
+        ("comment", r"#.*"),
+        ("string", r"""(?i:[rbuf]{0,2})(?:"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?)"""),
+        ("decorator", r"^\s*@[\w.]+"),
+        ("keyword", words(PYTHON_KEYWORDS)),
+        ("constant", words("True False None NotImplemented Ellipsis __name__ __file__")),
+        ("builtin", words(PYTHON_BUILTINS)),
+        ("function", r"(?<=\bdef )\w+|(?<=\bclass )\w+"),
+        ("number", NUMBER),
+    ], [
+        ("string", r"(?i:[rbuf]{0,2})\"\"\"", r"(?<!\\)\"\"\""),
+        ("string", r"(?i:[rbuf]{0,2})'''", r"(?<!\\)'''"),
+    ]),
+    LanguageDefinition("C", [".c", ".h", ".cpp", ".cc", ".cxx", ".hpp", ".hh", ".java", ".cs", ".go", ".rs",
+                             ".swift", ".kt"], [
+        ("comment", r"//.*"),
+        ("decorator", r"^\s*#\s*\w+|@\w+"),
+        ("string", r"\"(?:[^\"\\]|\\.)*\"?|'(?:[^'\\]|\\.)*'?"),
+        ("keyword", words(C_KEYWORDS)),
+        ("constant", words("true false NULL null nil")),
+        ("number", NUMBER),
+        ("function", r"\b[A-Za-z_]\w*(?=\s*\()"),
+    ], [
+        ("comment", r"/\*", r"\*/"),
+    ]),
+    LanguageDefinition("JavaScript", [".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"], [
+        ("comment", r"//.*"),
+        ("string", r"\"(?:[^\"\\]|\\.)*\"?|'(?:[^'\\]|\\.)*'?"),
+        ("keyword", words(JS_KEYWORDS)),
+        ("constant", words("true false null undefined NaN Infinity")),
+        ("builtin", words("console window document Math JSON Object Array Promise String Number Map Set")),
+        ("number", NUMBER),
+        ("function", r"\b[A-Za-z_$][\w$]*(?=\s*\()"),
+        ("decorator", r"@\w+"),
+    ], [
+        ("comment", r"/\*", r"\*/"),
+        ("string", r"`", r"(?<!\\)`"),
+    ]),
+    LanguageDefinition("JSON", [".json", ".jsonl", ".geojson"], [
+        ("function", r"\"(?:[^\"\\]|\\.)*\"(?=\s*:)"),
+        ("string", r"\"(?:[^\"\\]|\\.)*\"?"),
+        ("constant", words("true false null")),
+        ("number", r"-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+    ]),
+    LanguageDefinition("Shell", [".sh", ".bash", ".zsh"], [
+        ("comment", r"(?<![\w$])#.*"),
+        ("string", r"\"(?:[^\"\\]|\\.)*\"?|'[^']*'?"),
+        ("builtin", r"\$\{[^}]*\}|\$\w+|\$[?#@*$!0-9]"),
+        ("keyword", words(SHELL_KEYWORDS)),
+        ("number", r"\b\d+\b"),
+    ]),
+]
+
+languages = {}
+extensionLanguages = {}
+compiledLanguages = {}
+registryLock = threading.Lock()
+languageFilesLoaded = False
+
+
+def registerLanguage(definition):
+    # Plugins call this to add a language or replace one of the same name.
+    with registryLock:
+        languages[definition.name] = definition
+        compiledLanguages.pop(definition.name, None)
+        for extension in definition.extensions:
+            extensionLanguages[extension] = definition.name
+
+
+def loadLanguageFiles(directory=LANGUAGE_DIR):
+    # *.json definitions in the user's language directory; a broken file is
+    # skipped rather than taking the editor down with it.
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    loaded = []
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as languageFile:
+                definition = LanguageDefinition.fromJson(json.load(languageFile))
+            CompiledLanguage(definition)
+        except (OSError, ValueError, KeyError, TypeError, LanguageError):
+            continue
+        registerLanguage(definition)
+        loaded.append(definition.name)
+    return loaded
+
+
+def compiledLanguage(name):
+    # Each language is compiled on first use and shared by every tab.
+    compiled = compiledLanguages.get(name)
+    if compiled is None:
+        with registryLock:
+            compiled = compiledLanguages.get(name)
+            if compiled is None and name in languages:
+                compiled = compiledLanguages[name] = CompiledLanguage(languages[name])
+    return compiled
+
+
+def languageForFile(filePath):
+    global languageFilesLoaded
+    if not languageFilesLoaded:
+        languageFilesLoaded = True
+        loadLanguageFiles()
+    if not filePath:
+        return None
+    name = extensionLanguages.get(os.path.splitext(filePath)[1].lower())
+    return compiledLanguage(name) if name else None
+
+
+for builtinLanguage in BUILTIN_LANGUAGES:
+    registerLanguage(builtinLanguage)
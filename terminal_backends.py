@@ -0,0 +1,241 @@
+import os
+import re
+import struct
+import subprocess
+from PyQt5.QtCore import QObject, QProcess, QSocketNotifier, QTimer, pyqtSignal
+
+if os.name == "posix":
+    import fcntl
+    import termios
+
+READ_SIZE = 1 << 16
+MAX_READ_PER_EVENT = 1 << 20
+EXIT_POLL_INTERVAL = 50
+DEFAULT_COLUMNS = 80
+DEFAULT_ROWS = 24
+MAX_ESCAPE_LENGTH = 256
+
+# The widget edits the command line itself, so shells are started without their
+# own line editor; it would otherwise redraw the line with cursor sequences.
+NO_EDITING_ARGS = {"bash": ["--noediting"], "zsh": ["+Z"]}
+
+ESCAPE_PATTERN = re.compile(
+    r"\x1b(?:\[[0-9;?<=>]*[ -/]*[@-~]"
+    r"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    r"|[()*+][0-~]"
+    r"|[@-Z\\^_=>78c])")
+CLEAR_PATTERN = re.compile(r"\x1b(?:\[[23][ -/]*J|c)")
+# Every C0 control except newline and tab is dropped once escapes are handled.
+CONTROL_CHARACTERS = dict.fromkeys(c for c in range(32) if c not in (9, 10))
+
+
+class AnsiFilter:
+    # Strips the escape sequences shells and common tools emit. Screen clears
+    # are reported so the widget can drop its scrollback; colours, cursor
+    # movement and titles are discarded. Sequences split across reads are held
+    # back until the rest arrives.
+    def __init__(self):
+        self.pending = ""
+
+    def feed(self, text):
+        # Returns (text, cleared): the text after the last screen clear, made
+        # of whole sequences only but not stripped yet, so that output the
+        # scrollback cap would drop is never filtered.
+        text = self.pending + text
+        self.pending = ""
+        escape = text.rfind("\x1b")
+        if escape == -1:
+            return text, False
+        if not ESCAPE_PATTERN.match(text, escape) and len(text) - escape < MAX_ESCAPE_LENGTH:
+            self.pending = text[escape:]
+            text = text[:escape]
+        cleared = False
+        for match in CLEAR_PATTERN.finditer(text):
+            cleared = True
+            last = match.end()
+        return (text[last:] if cleared else text), cleared
+
+    @staticmethod
+    def strip(text):
+        # One pass over the text for the escapes, one for the control characters.
+        if "\x1b" in text:
+            text = "".join(ESCAPE_PATTERN.split(text))
+        return text.translate(CONTROL_CHARACTERS)
+
+
+class ProcessBackend(QObject):
+    # cmd.exe through QProcess. The shell echoes each command line itself.
+    started = pyqtSignal()
+    dataReceived = pyqtSignal(bytes)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    echoesInput = True
+    lineEnding = b"\r\n"
+
+    def __init__(self, program="cmd.exe", parent=None):
+        super().__init__(parent)
+        self.process = QProcess(self)
+        self.process.setProgram(program)
+        self.process.setProcessChannelMode(QProcess.MergedChannels)
+        self.process.readyRead.connect(self.onReadyRead)
+        self.process.started.connect(self.started)
+        self.process.finished.connect(lambda exitCode, exitStatus: self.finished.emit(exitCode))
+        self.process.errorOccurred.connect(self.onError)
+
+    def start(self):
+        self.process.start()
+
+    def onReadyRead(self):
+        self.dataReceived.emit(bytes(self.process.readAll()))
+
+    def onError(self, error):
+        if error == QProcess.FailedToStart:
+            self.failed.emit(self.process.errorString())
+
+    def write(self, data):
+        self.process.write(data)
+
+    def interrupt(self):
+        pass
+
+    def resize(self, columns, rows):
+        pass
+
+
+class PtyBackend(QObject):
+    # The user's $SHELL on a pseudo-terminal. The master side is non-blocking
+    # and driven by QSocketNotifier, so the GUI thread never waits on the shell.
+    started = pyqtSignal()
+    dataReceived = pyqtSignal(bytes)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    echoesInput = False
+    lineEnding = b"\n"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.process = None
+        self.masterFd = None
+        self.readNotifier = None
+        self.writeNotifier = None
+        self.pendingWrite = bytearray()
+        self.windowSize = (DEFAULT_COLUMNS, DEFAULT_ROWS)
+        self.exitTimer = QTimer(self)
+        self.exitTimer.setInterval(EXIT_POLL_INTERVAL)
+        self.exitTimer.timeout.connect(self.checkExited)
+
+    def start(self):
+        shell = os.environ.get("SHELL") or "/bin/sh"
+        args = [shell] + NO_EDITING_ARGS.get(os.path.basename(shell), [])
+        masterFd, slaveFd = os.openpty()
+        try:
+            # Typed text is already shown by the widget.
+            attributes = termios.tcgetattr(slaveFd)
+            attributes[3] &= ~termios.ECHO
+            termios.tcsetattr(slaveFd, termios.TCSANOW, attributes)
+            self.process = subprocess.Popen(
+                args, stdin=slaveFd, stdout=slaveFd, stderr=slaveFd,
+                env=dict(os.environ, TERM="dumb"), start_new_session=True,
+                preexec_fn=acquireControllingTerminal)
+        except OSError as e:
+            os.close(masterFd)
+            self.failed.emit(f"{shell}: {e}")
+            return
+        finally:
+            os.close(slaveFd)
+
+        os.set_blocking(masterFd, False)
+        self.masterFd = masterFd
+        self.applyWindowSize()
+        self.readNotifier = QSocketNotifier(masterFd, QSocketNotifier.Read, self)
+        self.readNotifier.activated.connect(self.onReadable)
+        self.writeNotifier = QSocketNotifier(masterFd, QSocketNotifier.Write, self)
+        self.writeNotifier.setEnabled(False)
+        self.writeNotifier.activated.connect(self.flushWrites)
+        self.started.emit()
+
+    def onReadable(self):
+        # Drain what is available, but yield back to the event loop after
+        # MAX_READ_PER_EVENT so a chatty command cannot starve painting.
+        chunks = []
+        total = 0
+        hungUp = False
+        while total < MAX_READ_PER_EVENT:
+            try:
+                data = os.read(self.masterFd, READ_SIZE)
+            except BlockingIOError:
+                break
+            except OSError:
+                # EIO: every process holding the slave side has exited.
+                data = b""
+            if not data:
+                hungUp = True
+                break
+            chunks.append(data)
+            total += len(data)
+        if chunks:
+            self.dataReceived.emit(b"".join(chunks))
+        if hungUp:
+            self.closeMaster()
+            self.checkExited()
+
+    def checkExited(self):
+        exitCode = self.process.poll()
+        if exitCode is None:
+            self.exitTimer.start()
+            return
+        self.exitTimer.stop()
+        self.finished.emit(exitCode)
+
+    def closeMaster(self):
+        if self.masterFd is None:
+            return
+        self.readNotifier.setEnabled(False)
+        self.writeNotifier.setEnabled(False)
+        os.close(self.masterFd)
+        self.masterFd = None
+        self.pendingWrite.clear()
+
+    def write(self, data):
+        if self.masterFd is None:
+            return
+        self.pendingWrite += data
+        self.flushWrites()
+
+    def flushWrites(self):
+        try:
+            while self.pendingWrite:
+                written = os.write(self.masterFd, self.pendingWrite)
+                del self.pendingWrite[:written]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.pendingWrite.clear()
+        self.writeNotifier.setEnabled(bool(self.pendingWrite))
+
+    def interrupt(self):
+        # The line discipline turns VINTR into SIGINT for the foreground job.
+        self.write(b"\x03")
+
+    def resize(self, columns, rows):
+        self.windowSize = (max(1, columns), max(1, rows))
+        self.applyWindowSize()
+
+    def applyWindowSize(self):
+        if self.masterFd is None:
+            return
+        columns, rows = self.windowSize
+        fcntl.ioctl(self.masterFd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, columns, 0, 0))
+
+
+def acquireControllingTerminal():
+    # Runs in the child after setsid(); stdin is the pty slave.
+    fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+
+def createBackend(parent=None):
+    if os.name == "posix":
+        return PtyBackend(parent)
+    return ProcessBackend(parent=parent)
@@ -1,6 +1,19 @@
-from PyQt5.QtWidgets import QPlainTextEdit
-from PyQt5.QtCore import QProcess, Qt
+import time
+import codecs
+from collections import deque
+from PyQt5.QtWidgets import QPlainTextEdit, QAction
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QTextCursor, QCursor
+from terminal_backends import AnsiFilter, createBackend
+from instrumentation import recorder
+
+OUTPUT_FLUSH_INTERVAL = 16
+# Under a flood the next flush waits this many times as long as the last one
+# took, so layout stays a bounded share of the time and each flush inserts at
+# most one scrollback's worth of lines.
+FLUSH_BACKOFF = 4
+DEFAULT_SCROLLBACK_LINES = 10000
+COMMAND_HISTORY_SIZE = 500
 
 class TerminalWidget(QPlainTextEdit):
     def __init__(self, parent=None):
@@ -16,70 +29,215 @@ class TerminalWidget(QPlainTextEdit):
         """)
         self.setCursor(QCursor(Qt.IBeamCursor))
         self.setUndoRedoEnabled(False)
+        self.setScrollbackLines(DEFAULT_SCROLLBACK_LINES)
 
-        self.process = QProcess(self)
-        self.process.setProgram("cmd.exe")
-        self.process.setProcessChannelMode(QProcess.MergedChannels)
+        # Start of the command being typed; everything before it is shell output.
+        self.setInputStart(0)
+        self.commandHistory = deque(maxlen=COMMAND_HISTORY_SIZE)
+        self.historyIndex = None
+        self.historyDraft = ""
 
-        # Connect signals
-        self.process.readyRead.connect(self.readOutput)
-        self.process.started.connect(self.onProcessStarted)
-        self.process.finished.connect(self.onProcessFinished)
+        # Output is decoded incrementally (multibyte characters may be split
+        # across reads) and appended at most once per OUTPUT_FLUSH_INTERVAL.
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.ansiFilter = AnsiFilter()
+        self.pendingOutput = []
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushInterval = OUTPUT_FLUSH_INTERVAL
+        self.flushTimer.timeout.connect(self.flushOutput)
 
-        # Start cmd.exe
-        self.process.start()
+        # A pseudo-terminal running $SHELL on POSIX, cmd.exe elsewhere.
+        self.backend = createBackend(self)
+        self.backend.dataReceived.connect(self.readOutput)
+        self.backend.started.connect(self.onProcessStarted)
+        self.backend.finished.connect(self.onProcessFinished)
+        self.backend.failed.connect(self.onProcessFailed)
+        self.backend.start()
 
     def onProcessStarted(self):
+        self.updateWindowSize()
         self.moveCursor(QTextCursor.End)
         self.setFocus()
 
-    def onProcessFinished(self, exitCode, exitStatus):
-        self.insertPlainText(f"\nTerminal exited with code {exitCode}.\n")
+    def onProcessFailed(self, message):
+        self.pendingOutput.append(f"Failed to start terminal: {message}\n")
+        self.flushOutput()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.updateWindowSize()
+
+    def updateWindowSize(self):
+        metrics = self.fontMetrics()
+        viewport = self.viewport()
+        self.backend.resize(viewport.width() // max(1, metrics.horizontalAdvance("M")),
+                            viewport.height() // max(1, metrics.lineSpacing()))
+
+    def setScrollbackLines(self, lines):
+        # 0 keeps every line. Trimming is done by flushOutput in the same edit
+        # block as the insert, which is much cheaper than setMaximumBlockCount.
+        self.scrollbackLines = lines
+
+    def onProcessFinished(self, exitCode):
+        self.pendingOutput.append(self.decoder.decode(b"", final=True))
+        self.pendingOutput.append(f"\nTerminal exited with code {exitCode}.\n")
+        self.flushOutput()
+
+    def readOutput(self, data):
+        if recorder.enabled:
+            recorder.recordValue("terminalReadBytes", len(data), "bytes")
+        text, cleared = self.ansiFilter.feed(self.decoder.decode(data))
+        if cleared:
+            self.pendingOutput = []
+            self.clearOutput()
+        if text:
+            self.pendingOutput.append(text)
+            if not self.flushTimer.isActive():
+                self.flushTimer.start(self.flushInterval)
+
+    def flushOutput(self):
+        self.flushTimer.stop()
+        if not self.pendingOutput:
+            self.flushInterval = OUTPUT_FLUSH_INTERVAL
+            return
+        started = time.perf_counter()
+        pieces = self.pendingOutput
+        self.pendingOutput = []
+
+        # Only the tail that the scrollback cap keeps is joined and inserted.
+        limit = self.scrollbackLines
+        if limit > 0:
+            lines = 0
+            first = len(pieces)
+            while first > 0 and lines < limit:
+                first -= 1
+                lines += pieces[first].count("\n")
+            pieces = pieces[first:]
+        text = self.ansiFilter.strip("".join(pieces))
+        newLines = text.count("\n")
+        if limit > 0 and newLines >= limit:
+            cut = len(text)
+            for _ in range(limit):
+                cut = text.rfind("\n", 0, cut)
+            text = text[cut + 1:]
+            newLines = limit - 1
+
+        document = self.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        excess = document.blockCount() + newLines - limit if limit > 0 else 0
+        if excess > 0:
+            # Old output the new lines push out of the scrollback.
+            block = document.findBlockByNumber(excess)
+            end = min(block.position(), self.inputStart()) if block.isValid() else self.inputStart()
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+        # Output goes in front of whatever the user has typed so far.
+        cursor.setPosition(self.inputStart())
+        cursor.insertText(text)
+        cursor.endEditBlock()
+        self.setInputStart(cursor.position())
         self.moveCursor(QTextCursor.End)
+        elapsed = int((time.perf_counter() - started) * 1000)
+        self.flushInterval = max(OUTPUT_FLUSH_INTERVAL, elapsed * FLUSH_BACKOFF)
+
+    def clearOutput(self):
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(self.inputStart(), QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self.setInputStart(0)
+
+    def inputStart(self):
+        return self.inputAnchor.position()
+
+    def setInputStart(self, position):
+        # The anchor keeps its position when text is typed right at it, yet
+        # still shifts when scrollback is trimmed from the top.
+        self.inputAnchor = QTextCursor(self.document())
+        self.inputAnchor.setPosition(position)
+        self.inputAnchor.setKeepPositionOnInsert(True)
 
-    def readOutput(self):
-        data = self.process.readAll()
-        text = bytes(data).decode('utf-8')
-        self.insertPlainText(text)
+    def inputCursor(self):
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(self.inputStart())
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        return cursor
+
+    def currentInput(self):
+        return self.inputCursor().selectedText()
+
+    def replaceInput(self, text):
+        self.inputCursor().insertText(text)
         self.moveCursor(QTextCursor.End)
 
     def keyPressEvent(self, event):
-        cursor = self.textCursor()
-        block = cursor.block()
-        blockStart = block.position()
-        blockText = block.text()
+        key = event.key()
+        modifiers = event.modifiers()
+        if modifiers == Qt.ControlModifier and key == Qt.Key_C:
+            if self.textCursor().hasSelection():
+                self.copy()
+            else:
+                self.backend.interrupt()
+            return
 
-        if cursor.position() < blockStart + len(blockText):
+        start = self.inputStart()
+        cursor = self.textCursor()
+        if cursor.selectionStart() < start:
             self.moveCursor(QTextCursor.End)
-            return
+            cursor = self.textCursor()
 
-        if event.key() == Qt.Key_Backspace:
-            if cursor.position() > blockStart:
+        if key == Qt.Key_Backspace:
+            if cursor.hasSelection() or cursor.position() > start:
+                super().keyPressEvent(event)
+        elif key == Qt.Key_Left:
+            if cursor.position() > start:
                 super().keyPressEvent(event)
-        elif event.key() in (Qt.Key_Return, Qt.Key_Enter):
+        elif key == Qt.Key_Home:
+            cursor.setPosition(start)
+            self.setTextCursor(cursor)
+        elif key == Qt.Key_Up:
+            self.showHistoryEntry(-1)
+        elif key == Qt.Key_Down:
+            self.showHistoryEntry(1)
+        elif key in (Qt.Key_Return, Qt.Key_Enter):
             self.executeCommand()
-        elif event.modifiers() == Qt.ControlModifier and event.key() == Qt.Key_C:
-            self.copy()
-        elif event.modifiers() == Qt.ControlModifier and event.key() == Qt.Key_V:
+        elif modifiers == Qt.ControlModifier and key == Qt.Key_V:
             self.paste()
         else:
             super().keyPressEvent(event)
 
-    def executeCommand(self):
-        cursor = self.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        text = self.toPlainText()
-        last_prompt_index = text.rfind('>')
-        if last_prompt_index == -1:
-            command = text.strip()
-            self.setPlainText('')
+    def showHistoryEntry(self, step):
+        if not self.commandHistory:
+            return
+        if self.historyIndex is None:
+            if step > 0:
+                return
+            self.historyDraft = self.currentInput()
+            self.historyIndex = len(self.commandHistory)
+        index = max(0, min(len(self.commandHistory), self.historyIndex + step))
+        if index == len(self.commandHistory):
+            self.historyIndex = None
+            self.replaceInput(self.historyDraft)
         else:
-            command = text[last_prompt_index + 1:].strip()
-            cursor.setPosition(last_prompt_index + 1)
-            cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+            self.historyIndex = index
+            self.replaceInput(self.commandHistory[index])
+
+    def executeCommand(self):
+        cursor = self.inputCursor()
+        command = cursor.selectedText().strip()
+        if self.backend.echoesInput:
             cursor.removeSelectedText()
-        if command:
-            self.process.write((command + '\r\n').encode())
+        else:
+            # The typed line stays in the scrollback; output continues below it.
+            cursor.clearSelection()
+            cursor.insertText("\n")
+            self.setInputStart(cursor.position())
+        self.historyIndex = None
+        self.historyDraft = ""
+        if command and (not self.commandHistory or self.commandHistory[-1] != command):
+            self.commandHistory.append(command)
+        self.backend.write(command.encode() + self.backend.lineEnding)
         self.moveCursor(QTextCursor.End)
 
     def contextMenuEvent(self, event):
@@ -0,0 +1,110 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+import autosave
+from autosave import AutosaveWorker, listRecoveryFiles, pathKey, readRecovery, recoveryFileName, writeRecovery
+
+
+def waitFor(qapp, condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        qapp.processEvents()
+        time.sleep(0.001)
+
+
+@pytest.fixture(autouse=True)
+def recoveryDir(tmp_path, monkeypatch):
+    directory = tmp_path / "recovery"
+    monkeypatch.setattr(autosave, "RECOVERY_DIR", str(directory))
+    return directory
+
+
+@pytest.fixture
+def tab(qapp, tmp_path):
+    from editor_tab import EditorTab
+    filePath = tmp_path / "notes.txt"
+    filePath.write_text("saved\n")
+    tab = EditorTab(filePath=str(filePath))
+    tab.editor.setPlainText("saved\n")
+    tab.editor.setCoalesceInterval(0)
+    tab.autosaver.markClean()
+    tab.autosaver.timer.setInterval(50)
+    yield tab
+    tab.autosaver.shutdown()
+
+
+def typeText(tab, text):
+    cursor = tab.editor.textCursor()
+    cursor.insertText(text)
+
+
+def test_edits_are_debounced_into_one_recovery_write(qapp, tab, monkeypatch):
+    written = []
+    monkeypatch.setattr(autosave, "writeRecovery", lambda key, filePath, content: written.append(content))
+    for character in "abc":
+        typeText(tab, character)
+        qapp.processEvents()
+    assert written == []
+    waitFor(qapp, lambda: written and tab.autosaver.worker is None)
+    time.sleep(0.1)
+    qapp.processEvents()
+    assert written == ["abcsaved\n"]
+
+
+def test_recovery_file_is_written_and_removed_when_clean(qapp, tab):
+    typeText(tab, "draft ")
+    fileName = recoveryFileName(pathKey(tab.currentFile))
+    waitFor(qapp, lambda: os.path.exists(fileName) and tab.autosaver.worker is None)
+    header, content = readRecovery(fileName)
+    assert header["path"] == tab.currentFile and content == "draft saved\n"
+
+    tab.autosaver.markClean()
+    assert not os.path.exists(fileName)
+    # An unchanged revision is not written again.
+    tab.autosaver.autosave()
+    assert tab.autosaver.worker is None and not os.path.exists(fileName)
+
+
+def test_snapshot_skips_unchanged_content(qapp):
+    from version_store import defaultStore
+    content = "same text\n"
+    stored = []
+    worker = AutosaveWorker("key", None, content, 1, False, defaultStore.hashContent(content), True)
+    worker.snapshotStored.connect(stored.append)
+    worker.run()
+    assert stored == []
+
+    worker = AutosaveWorker("key", None, content + "more\n", 2, False, defaultStore.hashContent(content), True)
+    worker.snapshotStored.connect(stored.append)
+    worker.run()
+    assert stored == [defaultStore.hashContent(content + "more\n")]
+
+
+def test_offer_recovery_keeps_only_stale_files(qapp, tmp_path, monkeypatch):
+    import text_editor
+    unchangedPath = tmp_path / "unchanged.txt"
+    unchangedPath.write_text("same\n")
+    changedPath = tmp_path / "changed.txt"
+    changedPath.write_text("on disk\n")
+    writeRecovery(pathKey(str(unchangedPath)), str(unchangedPath), "same\n")
+    writeRecovery(pathKey(str(changedPath)), str(changedPath), "unsaved edit\n")
+
+    prompts = []
+
+    def exec_(box):
+        prompts.append(box.text())
+        return text_editor.QMessageBox.Discard
+
+    monkeypatch.setattr(text_editor.QMessageBox, "exec_", exec_)
+    window = text_editor.TextEditor(lazyStartup=False, sessionPath=None)
+    try:
+        window.offerRecovery()
+        assert len(prompts) == 1
+        assert "changed.txt" in prompts[0] and "unchanged.txt" not in prompts[0]
+        assert listRecoveryFiles() == []
+    finally:
+        window.close()
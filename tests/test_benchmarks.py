@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = {"openFile", "saveFile", "saveVersion", "compareWithVersion", "updateVersionHistoryPanel",
+              "gutterPaint", "terminalOutput"}
+
+
+def runScript(script, *args):
+    return subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", script), *args], cwd=ROOT,
+                          capture_output=True, text=True, timeout=600,
+                          env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+
+
+def test_editor_benchmark_smoke(tmp_path):
+    # Every benchmark once on tiny inputs, so the suite keeps running on the current tree.
+    pytest.importorskip("PyQt5")
+    output = str(tmp_path / "results.json")
+    result = runScript("bench_editor.py", "--sizes", "1K,64K", "--repeat", "1", "--edits", "10",
+                       "--history-entries", "300", "--terminal-mb", "1",
+                       "--data-dir", str(tmp_path / "data"), "--output", output)
+    assert result.returncode == 0, result.stderr
+    with open(output) as resultFile:
+        results = json.load(resultFile)["results"]
+    assert {entry["name"] for entry in results} == BENCHMARKS
+
+    compared = runScript("bench_editor.py", "--compare", output, output)
+    assert compared.returncode == 0, compared.stderr
+
+
+def test_line_diff_benchmark_smoke():
+    result = runScript("bench_line_diff.py", "--sizes", "2000", "--edits", "20")
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+import blame_engine
+from blame_engine import UNCOMMITTED, BlameEngine, invalidateBlame
+from history_catalog import HistoryCatalog
+from version_store import defaultStore
+
+
+class Chain:
+    # Versions of a file whose lines are all distinct, so the origin of every
+    # line is known from how the versions were built.
+    def __init__(self, tmp_path, name, seed=0):
+        self.catalog = HistoryCatalog(str(tmp_path / "catalog.sqlite3"))
+        self.path = self.catalog.normalizePath(str(tmp_path / name))
+        self.random = random.Random(seed)
+        self.nextLine = 0
+        self.versions = []
+
+    def newLine(self, seq):
+        self.nextLine += 1
+        return (f"line {self.nextLine}", seq)
+
+    def edit(self, lines, seq):
+        lines = list(lines)
+        for _ in range(self.random.randrange(1, 4)):
+            position = self.random.randrange(len(lines) + 1)
+            action = self.random.randrange(3)
+            if action == 0 or position == len(lines):
+                lines.insert(position, self.newLine(seq))
+            elif action == 1 and len(lines) > 1:
+                del lines[position]
+            else:
+                lines[position] = self.newLine(seq)
+        return lines
+
+    def commit(self, lines):
+        seq = len(self.versions)
+        content = "".join(f"{text}\n" for text, _ in lines)
+        self.catalog.append(self.path, f"20240101{seq:06d}", f"v{seq}", defaultStore.put(content))
+        self.versions.append(lines)
+
+    def build(self, count):
+        lines = [self.newLine(0) for _ in range(20)]
+        self.commit(lines)
+        while len(self.versions) < count:
+            lines = self.edit(lines, len(self.versions))
+            self.commit(lines)
+
+    def expected(self, seq):
+        return [origin for _, origin in self.versions[seq]]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return lambda chain: BlameEngine(str(tmp_path / "blame"), chain.catalog)
+
+
+def test_origins_follow_the_version_chain(tmp_path, engine):
+    chain = Chain(tmp_path, "chain.txt")
+    chain.build(30)
+    blame = engine(chain)
+    for seq in (0, 1, 7, 29, 12):
+        origins, lines = blame.originsAt(chain.path, seq)
+        assert list(origins) == chain.expected(seq)
+        assert lines == [text for text, _ in chain.versions[seq]]
+    with pytest.raises(IndexError):
+        blame.originsAt(chain.path, 30)
+
+
+def test_buffer_lines_are_blamed_against_the_newest_version(tmp_path, engine):
+    chain = Chain(tmp_path, "buffer.txt")
+    chain.build(5)
+    lines = [text for text, _ in chain.versions[-1]]
+    origins = engine(chain).blameLines(chain.path, ["new"] + lines[1:])
+    assert list(origins) == [UNCOMMITTED] + chain.expected(4)[1:]
+    assert list(engine(chain).blameLines(str(tmp_path / "untracked.txt"), ["a", "b"])) == [UNCOMMITTED] * 2
+
+
+def test_resumes_from_a_checkpoint(tmp_path, engine, monkeypatch):
+    monkeypatch.setattr(blame_engine, "CHECKPOINT_INTERVAL", 4)
+    chain = Chain(tmp_path, "checkpoints.txt")
+    chain.build(20)
+    engine(chain).originsAt(chain.path, 19)
+    assert [seq for seq, _, _ in engine(chain).storedOrigins(chain.path)] == [19, 16, 12, 8, 4, 0]
+
+    blame_engine.latestOrigins.clear()
+    reads = []
+    readEntryContent = blame_engine.readEntryContent
+    monkeypatch.setattr(blame_engine, "readEntryContent",
+                        lambda path, entry: reads.append(entry["seq"]) or readEntryContent(path, entry))
+    origins, _ = engine(chain).originsAt(chain.path, 10)
+    assert list(origins) == chain.expected(10)
+    assert reads == [8, 9, 10]
+
+
+def test_invalidate_after_amend_and_new_commit(tmp_path, engine, monkeypatch):
+    monkeypatch.setattr(blame_engine, "CHECKPOINT_INTERVAL", 4)
+    chain = Chain(tmp_path, "amend.txt")
+    chain.build(12)
+    blame = engine(chain)
+    assert list(blame.originsAt(chain.path, 11)[0]) == chain.expected(11)
+
+    # Amend version 5 to drop a line that older versions introduced and later
+    # ones keep: from version 6 on, that line now comes from version 6.
+    kept = {text for text, _ in chain.versions[11]}
+    dropped = next(text for text, origin in chain.versions[5] if text in kept and origin < 5)
+    amended = [line for line in chain.versions[5] if line[0] != dropped]
+    content = "".join(f"{text}\n" for text, _ in amended)
+    entry = chain.catalog.entryAt(chain.path, 5)
+    chain.catalog.updateVersion(entry["id"], digest=defaultStore.put(content))
+    chain.versions[5] = amended
+    for seq in range(6, 12):
+        chain.versions[seq] = [(text, 6 if text == dropped else origin) for text, origin in chain.versions[seq]]
+    invalidateBlame(chain.path, 5, blame.root)
+    assert [seq for seq, _, _ in blame.storedOrigins(chain.path)] == [4, 0]
+    assert list(blame.originsAt(chain.path, 11)[0]) == chain.expected(11)
+    assert list(blame.originsAt(chain.path, 5)[0]) == chain.expected(5)
+
+    chain.commit(chain.edit(chain.versions[-1], 12))
+    assert list(blame.originsAt(chain.path, 12)[0]) == chain.expected(12)
+    assert list(engine(chain).originsAt(chain.path, 11)[0]) == chain.expected(11)
@@ -0,0 +1,154 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+
+
+def test_construct(qapp):
+    from code_editor import CodeEditor
+    editor = CodeEditor()
+    editor.setPlainText("one\ntwo\nthree")
+    editor.highlightCurrentLine()
+    assert len(editor.extraSelections()) == 1
+    assert editor.blockCount() == 3
+
+
+def test_blame_paint_leaves_selections_alone(qapp):
+    from code_editor import CodeEditor
+    editor = CodeEditor()
+    editor.setPlainText("one\ntwo")
+    editor.setExtraSelections([])
+    editor.setBlameAnnotations([1, 2], str)
+    editor.resize(400, 300)
+    editor.show()
+    editor.blameArea.repaint()
+    assert editor.extraSelections() == []
+    editor.clearBlameAnnotations()
+
+
+def recordCoalesced(editor):
+    # Drop whatever setPlainText left pending so only the test's edits are seen.
+    editor.flushChanges()
+    batches = []
+    editor.changesCoalescedSignal.connect(lambda changes, first, last: batches.append((changes, first, last)))
+    return batches
+
+
+def test_adjacent_edits_coalesce_into_one_batch(qapp):
+    from PyQt5.QtGui import QTextCursor
+    from code_editor import CodeEditor, TextChange
+    editor = CodeEditor()
+    editor.setPlainText("one\ntwo\nthree\nfour")
+    editor.setCoalesceInterval(10000)
+    batches = recordCoalesced(editor)
+
+    cursor = QTextCursor(editor.document())
+    cursor.setPosition(7)
+    for character in "xy":
+        cursor.insertText(character)
+    cursor.deletePreviousChar()
+    cursor.setPosition(8)
+    cursor.insertText("\nz")
+    assert batches == []
+    assert editor.coalesceTimer.isActive()
+
+    editor.flushChanges()
+    assert batches == [([
+        TextChange(7, 0, 1, "x"),
+        TextChange(8, 0, 1, "y"),
+        TextChange(8, 1, 0, ""),
+        TextChange(8, 0, 2, "\nz"),
+    ], 1, 2)]
+    assert editor.toPlainText() == "one\ntwox\nz\nthree\nfour"
+    assert not editor.coalesceTimer.isActive()
+
+    # Nothing is pending any more, so flushing again emits nothing.
+    editor.flushChanges()
+    assert len(batches) == 1
+
+
+def test_block_range_spans_every_edit_in_the_burst(qapp):
+    from PyQt5.QtGui import QTextCursor
+    from code_editor import CodeEditor
+    editor = CodeEditor()
+    editor.setPlainText("\n".join(f"line {number}" for number in range(10)))
+    editor.setCoalesceInterval(10000)
+    batches = recordCoalesced(editor)
+
+    cursor = QTextCursor(editor.document())
+    cursor.setPosition(editor.document().findBlockByNumber(8).position())
+    cursor.insertText("late ")
+    cursor.setPosition(editor.document().findBlockByNumber(2).position())
+    cursor.insertText("early ")
+    editor.flushChanges()
+    (changes, firstBlock, lastBlock), = batches
+    assert [change.text for change in changes] == ["late ", "early "]
+    assert (firstBlock, lastBlock) == (2, 8)
+
+
+def test_burst_flushes_after_the_interval(qapp):
+    from PyQt5.QtTest import QTest
+    from PyQt5.QtGui import QTextCursor
+    from code_editor import CodeEditor
+    editor = CodeEditor()
+    editor.setPlainText("abc")
+    editor.setCoalesceInterval(20)
+    batches = recordCoalesced(editor)
+
+    cursor = QTextCursor(editor.document())
+    cursor.movePosition(QTextCursor.End)
+    cursor.insertText("d")
+    cursor.insertText("e")
+    assert batches == []
+    QTest.qWait(200)
+    assert len(batches) == 1
+    assert [change.text for change in batches[0][0]] == ["d", "e"]
+
+    editor.setCoalesceInterval(0)
+    cursor.insertText("f")
+    cursor.deletePreviousChar()
+    assert [[change.position for change in changes] for changes, _, _ in batches[1:]] == [[5], [5]]
+
+
+def test_untracked_changes_are_not_signalled(qapp):
+    from PyQt5.QtGui import QTextCursor
+    from code_editor import CodeEditor
+    editor = CodeEditor()
+    editor.setCoalesceInterval(0)
+    batches = recordCoalesced(editor)
+    editor.setChangeTracking(False)
+    editor.setPlainText("bulk load")
+    editor.setChangeTracking(True)
+    assert batches == []
+    QTextCursor(editor.document()).insertText(">")
+    assert batches == [([(0, 0, 1, ">")], 0, 0)]
+
+
+def test_gutter_grows_with_digit_count(qapp):
+    from PyQt5.QtGui import QTextCursor
+    from code_editor import CodeEditor, GUTTER_PADDING
+    editor = CodeEditor()
+    editor.resize(400, 300)
+
+    def widthFor(digits):
+        return 2 * GUTTER_PADDING + editor.gutterDigitWidth * digits
+
+    assert editor.gutterWidth == widthFor(3)
+    editor.setPlainText("\n" * 9998)
+    assert editor.blockCount() == 9999
+    assert editor.gutterWidth == widthFor(4)
+    assert editor.lineNumberArea.width() == widthFor(4)
+
+    cursor = QTextCursor(editor.document())
+    cursor.movePosition(QTextCursor.End)
+    cursor.insertText("\n")
+    assert editor.blockCount() == 10000
+    assert editor.gutterWidth == widthFor(5)
+    assert editor.viewportMargins().left() == widthFor(5)
+    assert editor.lineNumberArea.width() == widthFor(5)
+
+    cursor.insertText("\n" * 90000)
+    assert editor.blockCount() == 100000
+    assert editor.gutterWidth == widthFor(6)
+
+    cursor.deletePreviousChar()
+    assert editor.gutterWidth == widthFor(5)
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+from line_diff import getOpcodes
+
+
+def render(oldLines, newLines, sideBySide=True, folding=False):
+    from diff_viewer import DiffView
+    view = DiffView()
+    view.sideBySideCheck.setChecked(sideBySide)
+    view.foldingEnabled = folding
+    view.oldLines, view.newLines = oldLines, newLines
+    view.opcodes = getOpcodes(oldLines, newLines)
+    view.rebuild()
+    return view
+
+
+def rows(textView):
+    return textView.toPlainText().split("\n")
+
+
+def test_insert_at_top_keeps_panes_aligned(qapp):
+    oldLines = [f"line {i}" for i in range(7)]
+    view = render(oldLines, ["new"] + oldLines)
+    assert rows(view.leftView) == [""] + oldLines
+    assert rows(view.rightView) == ["new"] + oldLines
+
+
+def test_empty_first_line_is_kept(qapp):
+    view = render(["", "a"], ["", "b"], sideBySide=False)
+    assert rows(view.inlineView) == [" ", "-a", "+b"]
+    view = render(["", "a"], ["", "a", "b"])
+    assert rows(view.leftView) == ["", "a", ""]
+    assert rows(view.rightView) == ["", "a", "b"]
+
+
+def test_expand_fold_in_both_panes(qapp):
+    oldLines = [f"line {i}" for i in range(40)]
+    newLines = ["new"] + oldLines
+    view = render(oldLines, newLines, folding=True)
+    assert view.leftView.blockCount() == view.rightView.blockCount()
+    marker = next(block for block in range(view.leftView.blockCount())
+                  if view.leftView.document().findBlockByNumber(block).userState() >= 0)
+    view.expandFold(0, marker)
+    assert rows(view.leftView) == [""] + oldLines
+    assert rows(view.rightView) == newLines
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+import diff_worker
+from diff_worker import DiffWorker
+from line_diff import getOpcodes, iterOpcodes, DiffCancelled
+
+
+def sampleLines():
+    old = [f"line {i}" for i in range(5000)]
+    new = [f"changed {i}" if i % 10 == 0 else line for i, line in enumerate(old)]
+    return old, "\n".join(new)
+
+
+def runWorker(worker):
+    events = []
+    worker.linesReady.connect(lambda old, new: events.append(("lines", len(old), len(new))))
+    worker.opcodesReady.connect(lambda opcodes: events.append(("opcodes", list(opcodes))))
+    worker.diffFailed.connect(lambda message: events.append(("failed", message)))
+    worker.diffFinished.connect(lambda completed: events.append(("finished", completed)))
+    worker.run()
+    return events
+
+
+def test_opcodes_stream_in_file_order(qapp, monkeypatch):
+    # Flush on every opcode so the test sees many separate batches.
+    monkeypatch.setattr(diff_worker, "BATCH_INTERVAL", 0)
+    old, new = sampleLines()
+    events = runWorker(DiffWorker(lambda: old, new))
+    assert events[0] == ("lines", 5000, 5000)
+    assert events[-1] == ("finished", True)
+    batches = [event[1] for event in events[1:-1]]
+    assert all(event[0] == "opcodes" for event in events[1:-1])
+    assert len(batches) > 100
+    # The first change goes out on its own, ahead of any later batch.
+    assert batches[0][-1][0] != 'equal'
+    assert [opcode for batch in batches for opcode in batch] == getOpcodes(old, new.splitlines())
+
+
+def test_cancel_mid_diff_stops_emitting(qapp, monkeypatch):
+    monkeypatch.setattr(diff_worker, "BATCH_INTERVAL", 0)
+    old, new = sampleLines()
+    worker = DiffWorker(lambda: old, new)
+    batches = []
+
+    def onOpcodes(opcodes):
+        batches.append(opcodes)
+        if len(batches) == 3:
+            worker.cancel()
+
+    worker.opcodesReady.connect(onOpcodes)
+    finished = []
+    worker.diffFinished.connect(finished.append)
+    worker.run()
+    assert len(batches) == 3
+    assert finished == [False]
+
+
+def test_cancel_raises_from_the_opcode_stream():
+    old, new = sampleLines()
+    cancelled = []
+    opcodes = iterOpcodes(old, new.splitlines(), lambda: bool(cancelled))
+    next(opcodes)
+    cancelled.append(True)
+    with pytest.raises(DiffCancelled):
+        list(opcodes)
+
+
+def test_failed_load_reports_the_error(qapp):
+    def loadOldLines():
+        raise OSError("version missing")
+
+    assert runWorker(DiffWorker(loadOldLines, "text")) == [("failed", "version missing"), ("finished", False)]
@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+
+
+def waitFor(qapp, condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        qapp.processEvents()
+        time.sleep(0.001)
+
+
+def test_async_load_is_not_tracked_as_edits(qapp, tmp_path):
+    from editor_tab import EditorTab
+    filePath = tmp_path / "big.txt"
+    filePath.write_text("".join(f"line {i}\n" for i in range(50000)))
+    tab = EditorTab(filePath=str(filePath))
+    coalesced = []
+    tab.editor.changesCoalescedSignal.connect(lambda changes, first, last: coalesced.append(changes))
+    tab.loadFileAsync(str(filePath))
+    waitFor(qapp, lambda: not tab.loading)
+    tab.editor.flushChanges()
+    assert tab.editor.blockCount() == 50001
+    assert tab.editor.pendingChanges == []
+    assert coalesced == []
+
+    cursor = tab.editor.textCursor()
+    cursor.insertText("x")
+    tab.editor.flushChanges()
+    assert [change.text for change in coalesced[0]] == ["x"]
+
+
+def test_commit_before_history_loads(qapp, tmp_path):
+    from editor_tab import EditorTab
+    filePath = tmp_path / "early.txt"
+    filePath.write_text("hello\n")
+    tab = EditorTab(filePath=str(filePath))
+    assert tab.versionHistory == []
+    tab.saveVersion("hello\n", "first")
+    assert [entry["message"] for entry in tab.versionHistory] == ["first"]
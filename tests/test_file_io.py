@@ -0,0 +1,46 @@
+import os
+import stat
+
+import pytest
+
+from file_io import atomicWrite, replaceFile
+
+
+def tempFiles(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+def test_atomic_write_keeps_mode_and_replaces(tmp_path):
+    filePath = tmp_path / "script.sh"
+    filePath.write_text("old\n")
+    os.chmod(filePath, 0o751)
+    before = os.stat(filePath).st_ino
+    with open(filePath, encoding='utf-8') as reader:
+        atomicWrite(str(filePath), "new\n")
+        # The old file was renamed over, not rewritten in place.
+        assert reader.read() == "old\n"
+    assert filePath.read_text() == "new\n"
+    assert stat.S_IMODE(os.stat(filePath).st_mode) == 0o751
+    assert os.stat(filePath).st_ino != before
+    assert tempFiles(tmp_path) == []
+
+
+def test_failed_atomic_write_leaves_the_old_file(tmp_path):
+    filePath = tmp_path / "notes.txt"
+    filePath.write_text("keep\n")
+    with pytest.raises(UnicodeEncodeError):
+        atomicWrite(str(filePath), "bad \ud800")
+    assert filePath.read_text() == "keep\n"
+    assert tempFiles(tmp_path) == []
+
+
+def test_atomic_write_creates_a_new_file(tmp_path):
+    atomicWrite(str(tmp_path / "new.txt"), "text")
+    assert (tmp_path / "new.txt").read_text() == "text"
+
+
+def test_replace_file(tmp_path):
+    replaceFile(str(tmp_path / "object"), b"one")
+    replaceFile(str(tmp_path / "object"), b"two")
+    assert (tmp_path / "object").read_bytes() == b"two"
+    assert tempFiles(tmp_path) == []
@@ -0,0 +1,101 @@
+import json
+import os
+
+import pytest
+
+import history_catalog
+from history_catalog import HistoryCatalog, legacyVersionDirectory, readEntryContent
+
+
+def makeCatalog(tmp_path):
+    return HistoryCatalog(str(tmp_path / "catalog.sqlite3"))
+
+
+def test_empty_history_appends_to_the_catalog(tmp_path):
+    catalog = makeCatalog(tmp_path)
+    history = catalog.emptyHistory(str(tmp_path / "notes.txt"))
+    assert len(history) == 0 and not history
+
+    entry = history.append("20240101000000", "first", "a" * 64)
+    assert entry["seq"] == 0
+    assert list(history) == [entry]
+    assert len(catalog.history(str(tmp_path / "notes.txt"))) == 1
+
+
+def test_empty_history_resyncs_after_a_legacy_import(tmp_path):
+    catalog = makeCatalog(tmp_path)
+    filePath = str(tmp_path / "legacy-resync.txt")
+    legacyDir = legacyVersionDirectory(filePath)
+    os.makedirs(legacyDir, exist_ok=True)
+    with open(os.path.join(legacyDir, "history.json"), "w", encoding="utf-8") as historyFile:
+        json.dump([{"timestamp": "20200101000000", "message": "old"}], historyFile)
+
+    history = catalog.emptyHistory(filePath)
+    history.append("20240101000000", "new", "b" * 64)
+    assert len(history) == 2
+    assert [entry["message"] for entry in history] == ["old", "new"]
+
+
+def test_history_pages_and_lookups(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_catalog, "PAGE_SIZE", 4)
+    catalog = makeCatalog(tmp_path)
+    filePath = str(tmp_path / "paged.txt")
+    history = catalog.history(filePath)
+    for version in range(10):
+        history.append(f"2024010100{version:04d}", f"commit {version % 3}", f"{version:064x}")
+
+    reopened = catalog.history(filePath)
+    assert len(reopened) == 10
+    assert [entry["seq"] for entry in reopened] == list(range(10))
+    assert reopened[-1]["hash"] == f"{9:064x}"
+    assert [entry["seq"] for entry in reopened[2:7]] == [2, 3, 4, 5, 6]
+    assert [entry["seq"] for entry in reopened.recent(3)] == [9, 8, 7]
+    with pytest.raises(IndexError):
+        reopened[10]
+
+    path = catalog.normalizePath(filePath)
+    assert [entry["seq"] for entry in catalog.findByMessage(path, "commit 1")] == [7, 4, 1]
+    assert [entry["seq"] for entry in catalog.findByMessage(path, "commit", prefix=True, limit=2)] == [9, 8]
+    assert catalog.findByTimestamp(path, "20240101000003")[0]["seq"] == 3
+    assert catalog.latest(path)["seq"] == 9
+
+
+def test_update_changes_one_entry(tmp_path):
+    catalog = makeCatalog(tmp_path)
+    history = catalog.history(str(tmp_path / "amend.txt"))
+    history.append("20240101000000", "first", "a" * 64)
+    history.append("20240101000001", "second", "b" * 64)
+    history.update(0, message="amended", digest="c" * 64)
+    reopened = catalog.history(str(tmp_path / "amend.txt"))
+    assert [(entry["message"], entry["hash"]) for entry in reopened] == \
+        [("amended", "c" * 64), ("second", "b" * 64)]
+    assert catalog.referencedHashes() == {"b" * 64, "c" * 64}
+
+
+def test_read_only_history_does_not_register_the_file(tmp_path):
+    catalog = makeCatalog(tmp_path)
+    history = catalog.history(str(tmp_path / "unknown.txt"), create=False)
+    assert len(history) == 0
+    assert catalog.connect().execute("SELECT COUNT(*) FROM files").fetchone()[0] == 0
+
+
+def test_legacy_history_is_imported_once(tmp_path):
+    catalog = makeCatalog(tmp_path)
+    filePath = str(tmp_path / "legacy-import.txt")
+    legacyDir = legacyVersionDirectory(filePath)
+    os.makedirs(legacyDir, exist_ok=True)
+    with open(os.path.join(legacyDir, "20200101000000.txt"), "w", encoding="utf-8") as snapshot:
+        snapshot.write("old text\n")
+    with open(os.path.join(legacyDir, "history.json"), "w", encoding="utf-8") as historyFile:
+        json.dump([{"timestamp": "20200101000000", "message": "plain"},
+                   {"timestamp": "20200102000000", "message": "stored", "hash": "d" * 64}], historyFile)
+
+    history = catalog.history(filePath)
+    assert [entry["message"] for entry in history] == ["plain", "stored"]
+    assert history[0]["legacyDir"] == legacyDir and history[1]["legacyDir"] is None
+    assert readEntryContent(filePath, history[0]) == "old text\n"
+    assert catalog.claimedLegacyDirs() == {legacyDir}
+
+    # Another file with the same basename does not inherit the entries again.
+    otherPath = str(tmp_path / "other" / "legacy-import.txt")
+    assert len(catalog.history(otherPath)) == 0
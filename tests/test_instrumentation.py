@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from instrumentation import Recorder, RingBuffer, percentile
+
+
+def test_nearest_rank_percentiles():
+    values = list(range(1, 101))
+    assert [percentile(values, rank) for rank in (50, 95, 99)] == [50, 95, 99]
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
+    assert [percentile([1, 2, 3, 4], rank) for rank in (25, 50, 75, 100)] == [1, 2, 3, 4]
+
+
+def test_summary_of_known_samples():
+    recorder = Recorder()
+    for value in range(1, 201):
+        recorder.recordDuration("save", 10.0, 10.0 + value / 1000)
+    recorder.recordValue("memory", 42, "MB")
+    summary = recorder.summary()
+    save = summary["save"]
+    assert save["unit"] == "ms" and save["count"] == save["total"] == 200
+    assert save["p50"] == pytest.approx(100) and save["p95"] == pytest.approx(190)
+    assert save["p99"] == pytest.approx(198) and save["max"] == pytest.approx(200)
+    assert save["mean"] == pytest.approx(100.5)
+    assert summary["memory"]["p50"] == 42 and summary["memory"]["unit"] == "MB"
+
+
+def test_ring_buffer_wraps_at_capacity():
+    ring = RingBuffer(4)
+    for value in range(10):
+        ring.add(float(value), value * 10.0)
+    assert ring.count == 4 and ring.total == 10
+    assert list(ring.samples()) == [(6.0, 60.0), (7.0, 70.0), (8.0, 80.0), (9.0, 90.0)]
+
+    recorder = Recorder(size=3)
+    for value in range(5):
+        recorder.recordValue("lines", value, "lines")
+    summary = recorder.summary()["lines"]
+    assert summary["count"] == 3 and summary["total"] == 5 and summary["p50"] == 3
+
+
+def test_chrome_trace_is_valid_trace_event_json(tmp_path):
+    recorder = Recorder()
+    recorder.recordDuration("diff", recorder.origin + 0.5, recorder.origin + 0.75)
+    recorder.recordDuration("save", recorder.origin + 0.25, recorder.origin + 0.3)
+    recorder.recordValue("memory", 12.5, "MB")
+    fileName = tmp_path / "trace.json"
+    recorder.exportChromeTrace(str(fileName))
+
+    trace = json.loads(fileName.read_text())
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    for event in events:
+        assert {"name", "ph", "pid"} <= event.keys()
+        assert event["ph"] in {"M", "X", "C"}
+    complete = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert complete["diff"]["ts"] == pytest.approx(500000) and complete["diff"]["dur"] == pytest.approx(250000)
+    assert complete["save"]["ts"] == pytest.approx(250000) and complete["save"]["dur"] == pytest.approx(50000)
+    assert complete["diff"]["tid"] != complete["save"]["tid"]
+    names = {event["tid"]: event["args"]["name"] for event in events if event["ph"] == "M"}
+    assert names == {complete["diff"]["tid"]: "diff", complete["save"]["tid"]: "save"}
+    counters = [event for event in events if event["ph"] == "C"]
+    assert len(counters) == 1 and counters[0]["args"] == {"MB": 12.5}
+    timestamps = [event.get("ts", 0) for event in events]
+    assert timestamps == sorted(timestamps)
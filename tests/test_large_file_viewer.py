@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+import large_file_viewer
+from large_file_viewer import FileSearcher, LineIndex, MappedLines, INDEX_BLOCK_SIZE
+
+
+def search(data, needle, start):
+    searcher = FileSearcher(data, needle, start)
+    found = []
+    searcher.searchFinished.connect(found.append)
+    searcher.run()
+    return found[0]
+
+
+@pytest.mark.parametrize("slice", [1, 3, 7, 1 << 20])
+def test_search_slices_and_wraps(qapp, monkeypatch, slice):
+    monkeypatch.setattr(large_file_viewer, "SEARCH_SLICE", slice)
+    data = b"abc needle xyz needle end"
+    assert search(data, b"needle", 0) == 4
+    assert search(data, b"needle", 5) == 15
+    assert search(data, b"needle", 16) == 4
+    assert search(data, b"missing", 0) == -1
+    assert search(data, b"end", 23) == 22
+
+
+def test_cancelled_search_reports_nothing(qapp):
+    searcher = FileSearcher(b"x" * 100, b"y", 0)
+    found = []
+    searcher.searchFinished.connect(found.append)
+    searcher.cancel()
+    searcher.run()
+    assert found == []
+
+
+def buildIndex(data):
+    index = LineIndex(data)
+    for start in range(0, len(data), INDEX_BLOCK_SIZE):
+        index.addBlock(data[start:start + INDEX_BLOCK_SIZE].count(b"\n"))
+    index.complete = True
+    return index
+
+
+def test_line_index():
+    data = b"".join(b"line %d\n" % i for i in range(10000))
+    index = buildIndex(data)
+    assert index.lineCount() == 10001
+    for line in (0, 1, 2500, 9999):
+        start = index.lineStart(line)
+        assert data[start:data.index(b"\n", start)] == b"line %d" % line
+        assert index.lineOfOffset(start) == line
+
+
+def test_find_next_runs_off_the_gui_thread(qapp, tmp_path, monkeypatch):
+    monkeypatch.setattr(large_file_viewer.QMessageBox, "information", lambda *args: None)
+    filePath = tmp_path / "big.log"
+    filePath.write_bytes(b"".join(b"entry %d\n" % i for i in range(100000)))
+    tab = large_file_viewer.LargeFileTab(filePath=str(filePath))
+    try:
+        deadline = time.monotonic() + 30
+        while not tab.index.complete:
+            assert time.monotonic() < deadline
+            qapp.processEvents()
+        tab.searchInput.setText("entry 77777\n")
+        tab.findNext()
+        assert tab.searcher is not None
+        while tab.searcher is not None:
+            assert time.monotonic() < deadline
+            qapp.processEvents()
+        assert tab.view.highlightLine == 77777
+    finally:
+        tab.closeFile()
+
+
+@pytest.mark.parametrize("text", ["", "\n", "one", "one\n", "a\r\nb\n\nc", "".join(f"row {i}\n" for i in range(5000))])
+def test_mapped_lines_split_like_splitlines(monkeypatch, text):
+    monkeypatch.setattr(large_file_viewer, "DIFF_READ_SIZE", 7)
+    lines = MappedLines(buildIndex(text.encode()))
+    expected = text.splitlines()
+    assert len(lines) == len(expected)
+    assert list(lines) == expected
+    assert lines[0:len(expected)] == expected
+    assert lines[2:5] == expected[2:5]
+    if expected:
+        assert lines[-1] == expected[-1]
+
+
+def test_diff_against_mapped_lines(qapp, tmp_path):
+    from diff_worker import DiffWorker
+    new = "".join(f"entry {i}\n" if i % 1000 else "changed\n" for i in range(20000))
+    old = "".join(f"entry {i}\n" for i in range(20000))
+    filePath = tmp_path / "big.log"
+    filePath.write_text(new)
+    tab = large_file_viewer.LargeFileTab(filePath=str(filePath))
+    try:
+        deadline = time.monotonic() + 30
+        while tab.diffLines() is None:
+            assert time.monotonic() < deadline
+            qapp.processEvents()
+        worker = DiffWorker(old.splitlines, tab.diffLines())
+        opcodes = []
+        worker.opcodesReady.connect(opcodes.extend)
+        worker.run()
+        changes = [opcode for opcode in opcodes if opcode[0] != 'equal']
+        assert [(i1, i2, j1, j2) for _, i1, i2, j1, j2 in changes] == \
+            [(i, i + 1, i, i + 1) for i in range(0, 20000, 1000)]
+        assert worker.newContent[1000] == "changed"
+    finally:
+        tab.closeFile()
@@ -0,0 +1,120 @@
+import difflib
+import random
+
+import pytest
+
+from line_diff import DiffCancelled, formatUnified, getOpcodes, groupOpcodes, matchingBlocks, unifiedDiff
+
+
+def lines(text):
+    return text.splitlines(keepends=True)
+
+
+def applyOpcodes(a, b, opcodes):
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+    return result
+
+
+def randomPair(seed):
+    generator = random.Random(seed)
+    vocabulary = [f"line {i}\n" for i in range(12)] + ["\n", "}\n"]
+    a = [generator.choice(vocabulary) for _ in range(generator.randrange(0, 60))]
+    b = list(a)
+    for _ in range(generator.randrange(0, 8)):
+        position = generator.randrange(0, len(b) + 1)
+        action = generator.randrange(3)
+        if action == 0:
+            b.insert(position, generator.choice(vocabulary))
+        elif b and position < len(b):
+            if action == 1:
+                del b[position]
+            else:
+                b[position] = generator.choice(vocabulary)
+    return a, b
+
+
+CASES = [
+    ("", ""),
+    ("a\n", ""),
+    ("", "a\n"),
+    ("a\nb\nc\n", "a\nb\nc\n"),
+    ("a\nb\nc\n", "a\nx\nc\n"),
+    ("a\nb\nc\nd\n", "a\nd\n"),
+    ("a\nb\n", "a\nb\nc\nd\n"),
+    ("x\na\nb\n", "a\nb\n"),
+]
+
+
+@pytest.mark.parametrize("a, b", CASES)
+def test_opcodes_match_difflib_on_unambiguous_edits(a, b):
+    a, b = lines(a), lines(b)
+    assert getOpcodes(a, b) == difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_opcodes_rebuild_the_new_text(seed):
+    a, b = randomPair(seed)
+    opcodes = getOpcodes(a, b)
+    assert applyOpcodes(a, b, opcodes) == b
+    # Opcodes tile both sides without gaps and alternate with equal runs.
+    assert opcodes == [] or (opcodes[0][1] == 0 and opcodes[0][3] == 0)
+    for previous, current in zip(opcodes, opcodes[1:]):
+        assert previous[2] == current[1] and previous[4] == current[3]
+        assert not (previous[0] == current[0] == 'equal')
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matching_blocks_are_increasing_and_end_with_a_sentinel(seed):
+    a, b = randomPair(seed)
+    blocks = matchingBlocks(a, b)
+    assert blocks[-1] == (len(a), len(b), 0)
+    for (i, j, n), (nextI, nextJ, _) in zip(blocks, blocks[1:]):
+        assert a[i:i + n] == b[j:j + n]
+        assert i + n <= nextI and j + n <= nextJ
+
+
+@pytest.mark.parametrize("seed", range(50))
+@pytest.mark.parametrize("context", [0, 1, 3])
+def test_group_opcodes_matches_difflib(seed, context):
+    a, b = randomPair(seed)
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    expected = list(matcher.get_grouped_opcodes(context)) if matcher.get_opcodes() else []
+    if expected and all(len(group) == 1 and group[0][0] == 'equal' for group in expected):
+        expected = []
+    assert list(groupOpcodes(matcher.get_opcodes(), context)) == expected
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_unified_format_matches_difflib(seed):
+    a, b = randomPair(seed)
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    expected = list(difflib.unified_diff(a, b, "old", "new", "2024-01-01", "2024-01-02"))
+    assert list(formatUnified(a, b, matcher.get_opcodes(), "old", "new", "2024-01-01", "2024-01-02")) == expected
+
+
+def test_unified_diff_of_identical_text_is_empty():
+    a = lines("a\nb\n")
+    assert list(unifiedDiff(a, list(a))) == []
+
+
+def test_unified_diff_matches_difflib_on_scattered_edits():
+    a = lines("".join(f"line {i}\n" for i in range(100)))
+    b = list(a)
+    b[10] = "changed\n"
+    del b[50:53]
+    b.insert(90, "added\n")
+    output = list(unifiedDiff(a, b, "a", "b"))
+    assert output == list(difflib.unified_diff(a, b, "a", "b"))
+    assert len([line for line in output if line.startswith("@@")]) == 3
+
+
+def test_cancelled_diff_raises():
+    a = lines("a\nb\n" * 10)
+    with pytest.raises(DiffCancelled):
+        getOpcodes(a, a[::-1], isCancelled=lambda: True)
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from pack_store import Pack, PackError, listPacks, removePack, writePack
+
+
+def digestOf(index):
+    return hashlib.sha256(str(index).encode()).hexdigest()
+
+
+def test_lookup_finds_every_record(tmp_path):
+    records = {digestOf(i): f"record {i}\n".encode() * (i % 7 + 1) for i in range(300)}
+    packPath = writePack(str(tmp_path), records.items())
+    assert listPacks(str(tmp_path)) == [packPath]
+
+    pack = Pack(packPath)
+    assert pack.count == 300
+    assert sorted(pack.digests()) == list(pack.digests())
+    for digest, record in records.items():
+        assert bytes(pack.record(digest)) == record
+    assert pack.record(digestOf(-1)) is None
+    assert pack.record("0" * 64) is None and pack.record("f" * 64) is None
+    pack.close()
+
+
+def test_empty_pack_is_not_written(tmp_path):
+    assert writePack(str(tmp_path), iter([])) is None
+    assert listPacks(str(tmp_path)) == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_pack_without_index_is_ignored_and_removed(tmp_path):
+    packPath = writePack(str(tmp_path), [(digestOf(1), b"one")])
+    removePack(packPath)
+    assert listPacks(str(tmp_path)) == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_corrupt_index_is_rejected(tmp_path):
+    packPath = writePack(str(tmp_path), [(digestOf(1), b"one")])
+    with open(packPath[:-len(".pack")] + ".idx", "r+b") as indexFile:
+        indexFile.write(b"garbage!")
+    with pytest.raises(PackError):
+        Pack(packPath)
+
+
+def test_records_outlive_a_closed_pack(tmp_path):
+    packPath = writePack(str(tmp_path), [(digestOf(1), b"one")])
+    pack = Pack(packPath)
+    record = pack.record(digestOf(1))
+    pack.close()
+    assert bytes(record) == b"one"
+
+
+def test_concurrent_pack_writes(tmp_path):
+    packDir = str(tmp_path)
+    errors = []
+
+    def write(group):
+        try:
+            for _ in range(20):
+                writePack(packDir, [(digestOf(group * 100 + i), b"record %d" % (group * 100 + i)) for i in range(50)])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(group % 4,)) for group in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert [name for name in os.listdir(packDir) if name.endswith(".tmp")] == []
+    packs = listPacks(packDir)
+    assert len(packs) == 4
+    for packPath in packs:
+        pack = Pack(packPath)
+        assert pack.count == 50
+        for digest in pack.digests():
+            assert pack.record(digest) is not None
+        pack.close()
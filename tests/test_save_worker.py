@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+import save_worker
+from save_worker import SaveQueue
+
+
+def waitFor(qapp, condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        qapp.processEvents()
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    # Records writes; the first one blocks until released, and content
+    # starting with "fail" raises.
+    record = {"written": [], "release": threading.Event()}
+
+    def atomicWrite(filePath, content):
+        if not record["written"]:
+            record["release"].wait(10)
+        record["written"].append(content)
+        if content.startswith("fail"):
+            raise OSError(f"cannot write {content}")
+
+    monkeypatch.setattr(save_worker, "atomicWrite", atomicWrite)
+    return record
+
+
+def makeQueue():
+    queue = SaveQueue()
+    events = []
+    queue.saveCompleted.connect(lambda filePath: events.append(("completed", filePath)))
+    queue.saveFailed.connect(lambda filePath, error: events.append(("failed", filePath, error)))
+    return queue, events
+
+
+def test_saves_during_a_write_are_coalesced(qapp, writes):
+    queue, events = makeQueue()
+    snapshots = []
+
+    def snapshot(text):
+        snapshots.append(text)
+        return text
+
+    for number in range(5):
+        queue.save("a.txt", lambda number=number: snapshot(f"v{number}"))
+    queue.save("b.txt", lambda: snapshot("b"))
+    assert queue.isSaving("a.txt")
+    writes["release"].set()
+    waitFor(qapp, lambda: not queue.isSaving("a.txt") and not queue.isSaving("b.txt"))
+    # Only the first and the newest snapshot of a.txt are taken and written.
+    assert sorted(snapshots) == ["b", "v0", "v4"]
+    assert sorted(writes["written"]) == ["b", "v0", "v4"]
+    assert sorted(events) == [("completed", "a.txt"), ("completed", "b.txt")]
+
+
+def test_failure_is_reported_before_the_pending_write(qapp, writes):
+    queue, events = makeQueue()
+    queue.save("a.txt", lambda: "fail first")
+    queue.save("a.txt", lambda: "second")
+    writes["release"].set()
+    waitFor(qapp, lambda: not queue.isSaving("a.txt"))
+    assert writes["written"] == ["fail first", "second"]
+    assert events == [("failed", "a.txt", "cannot write fail first"), ("completed", "a.txt")]
+
+
+def test_wait_for_all_returns_failures(qapp, writes):
+    queue, events = makeQueue()
+    queue.save("a.txt", lambda: "fail in flight")
+    queue.save("a.txt", lambda: "fail pending")
+    writes["release"].set()
+    assert queue.waitForAll() == [("a.txt", "cannot write fail in flight"), ("a.txt", "cannot write fail pending")]
+    assert not queue.isSaving("a.txt")
+    qapp.processEvents()
+    assert events == []
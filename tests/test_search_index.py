@@ -0,0 +1,70 @@
+from history_catalog import HistoryCatalog
+from search_index import SearchIndex
+from version_store import defaultStore
+
+
+def makeIndex(tmp_path):
+    catalog = HistoryCatalog(str(tmp_path / "catalog.sqlite3"))
+    return SearchIndex(str(tmp_path / "search.sqlite3"), catalog), catalog
+
+
+def commit(catalog, filePath, content, seq):
+    path = catalog.normalizePath(filePath)
+    return catalog.append(path, f"202401010000{seq:02d}", f"version {seq}", defaultStore.put(content))
+
+
+def test_spans_follow_lines_across_versions(tmp_path):
+    index, catalog = makeIndex(tmp_path)
+    filePath = str(tmp_path / "notes.txt")
+    commit(catalog, filePath, "alpha beta\ngamma\n", 0)
+    commit(catalog, filePath, "alpha beta\ndelta\n", 1)
+    commit(catalog, filePath, "delta\n", 2)
+    assert index.update(filePath) == 3
+    assert index.update(filePath) == 0
+
+    assert index.search(filePath, "alpha") == [{"text": "alpha beta", "firstSeq": 0, "lastSeq": 1}]
+    assert index.search(filePath, "gam") == [{"text": "gamma", "firstSeq": 0, "lastSeq": 0}]
+    assert index.search(filePath, "delta") == [{"text": "delta", "firstSeq": 1, "lastSeq": 2}]
+    assert index.search(filePath, "alpha be") == [{"text": "alpha beta", "firstSeq": 0, "lastSeq": 1}]
+    assert index.search(filePath, "beta alpha") == []
+    assert index.search(filePath, "  ") == []
+
+
+def test_indexing_resumes_with_new_versions(tmp_path):
+    index, catalog = makeIndex(tmp_path)
+    filePath = str(tmp_path / "grow.txt")
+    commit(catalog, filePath, "one\n", 0)
+    index.update(filePath)
+    commit(catalog, filePath, "one\ntwo\n", 1)
+    assert index.update(filePath) == 1
+    assert index.search(filePath, "one") == [{"text": "one", "firstSeq": 0, "lastSeq": 1}]
+    assert index.search(filePath, "two") == [{"text": "two", "firstSeq": 1, "lastSeq": 1}]
+
+
+def test_invalidate_reindexes_an_amended_version(tmp_path):
+    index, catalog = makeIndex(tmp_path)
+    filePath = str(tmp_path / "amended.txt")
+    commit(catalog, filePath, "keep\nfirst draft\n", 0)
+    entry = commit(catalog, filePath, "keep\nsecond draft\n", 1)
+    commit(catalog, filePath, "keep\nsecond draft\nthird\n", 2)
+    index.update(filePath)
+
+    catalog.updateVersion(entry["id"], digest=defaultStore.put("keep\nrewritten\n"))
+    index.invalidateFrom(filePath, 1)
+    assert index.indexedCount(filePath) == 1
+    assert index.update(filePath) == 2
+
+    assert index.search(filePath, "rewritten") == [{"text": "rewritten", "firstSeq": 1, "lastSeq": 1}]
+    assert index.search(filePath, "draft") == [
+        {"text": "second draft", "firstSeq": 2, "lastSeq": 2},
+        {"text": "first draft", "firstSeq": 0, "lastSeq": 0}]
+    assert index.search(filePath, "keep") == [{"text": "keep", "firstSeq": 0, "lastSeq": 2}]
+
+
+def test_cancelled_update_stops_early(tmp_path):
+    index, catalog = makeIndex(tmp_path)
+    filePath = str(tmp_path / "cancel.txt")
+    for seq in range(3):
+        commit(catalog, filePath, f"line {seq}\n", seq)
+    assert index.update(filePath, isCancelled=lambda: True) == 0
+    assert index.indexedCount(filePath) == 0
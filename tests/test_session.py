@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+pytest.importorskip("PyQt5")
+from session import SESSION_FORMAT, TabPlaceholder, readSession, writeSession
+
+
+def writeFiles(tmp_path, count):
+    paths = []
+    for number in range(count):
+        filePath = tmp_path / f"file{number}.txt"
+        filePath.write_text(f"content {number}\n")
+        paths.append(str(filePath))
+    return paths
+
+
+def test_session_round_trip(tmp_path):
+    sessionPath = str(tmp_path / "state" / "session.json")
+    tabs = [{"path": "/a.txt", "cursor": 3, "scroll": 1}]
+    writeSession(tabs, 0, sessionPath)
+    assert readSession(sessionPath) == {"format": SESSION_FORMAT, "activeIndex": 0, "tabs": tabs}
+    (tmp_path / "old.json").write_text('{"format": 0, "tabs": []}')
+    assert readSession(str(tmp_path / "old.json")) is None
+    assert readSession(str(tmp_path / "missing.json")) is None
+
+
+def test_restored_tabs_stay_placeholders_until_activated(qapp, tmp_path):
+    from editor_tab import EditorTab
+    from text_editor import TextEditor
+    paths = writeFiles(tmp_path, 4)
+    sessionPath = str(tmp_path / "session.json")
+    states = [{"path": path, "cursor": 2, "scroll": 0} for path in paths]
+    states.insert(1, {"path": str(tmp_path / "deleted.txt")})
+    writeSession(states, 2, sessionPath)
+
+    window = TextEditor(sessionPath=sessionPath)
+    try:
+        tabs = [window.tabWidget.widget(index) for index in range(window.tabWidget.count())]
+        # The missing file is skipped and nothing is read before the first paint.
+        assert [tab.currentFile for tab in tabs] == paths
+        assert all(isinstance(tab, TabPlaceholder) and tab.prefetchWorker is None for tab in tabs)
+        assert window.tabWidget.currentIndex() == 1
+
+        window.onTabChanged(1)
+        active = window.tabWidget.widget(1)
+        assert isinstance(active, EditorTab)
+        assert active.editor.toPlainText() == "content 1\n"
+        assert active.editor.textCursor().position() == 2
+        neighbours = [window.tabWidget.widget(index) for index in (0, 2)]
+        assert all(isinstance(tab, TabPlaceholder) and tab.prefetchWorker for tab in neighbours)
+        assert isinstance(window.tabWidget.widget(3), TabPlaceholder)
+        assert window.tabWidget.widget(3).prefetchWorker is None
+
+        window.tabWidget.setCurrentIndex(2)
+        assert window.tabWidget.widget(2).editor.toPlainText() == "content 2\n"
+
+        window.saveSession()
+        saved = readSession(sessionPath)
+        assert [tab["path"] for tab in saved["tabs"]] == paths
+        assert saved["activeIndex"] == 2
+    finally:
+        window.close()
+
+
+def test_prefetch_is_dropped_when_the_file_changed(qapp, tmp_path):
+    filePath = writeFiles(tmp_path, 1)[0]
+    placeholder = TabPlaceholder(filePath=filePath)
+    placeholder.prefetch()
+    assert placeholder.takePrefetched() == "content 0\n"
+
+    placeholder.prefetch()
+    placeholder.prefetchWorker.wait()
+    with open(filePath, 'w', encoding='utf-8') as file:
+        file.write("edited elsewhere\n")
+    stat = os.stat(filePath)
+    os.utime(filePath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert placeholder.takePrefetched() is None
+    assert placeholder.takePrefetched() is None
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_store_paths_do_not_load_the_store():
+    # Modules imported at startup only need STORE_ROOT; the store itself
+    # (and line_diff, pack_store) must stay deferred until first use.
+    code = ("import sys, text_editor, session, autosave, syntax_languages; "
+            "print(sorted(name for name in ('version_store', 'line_diff', 'pack_store', 'history_catalog') "
+            "if name in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+    if "No module named 'PyQt5'" in result.stderr:
+        return
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,48 @@
+import json
+import os
+
+import history_catalog
+from history_catalog import HistoryCatalog
+from store_maintenance import compactStore
+from version_store import VersionStore
+
+
+def writeLegacyHistory(legacyDir, snapshots):
+    os.makedirs(legacyDir)
+    history = []
+    for timestamp, content in snapshots:
+        with open(os.path.join(legacyDir, f"{timestamp}.txt"), 'wb') as snapshot:
+            snapshot.write(content)
+        history.append({"timestamp": timestamp, "message": f"at {timestamp}"})
+    with open(os.path.join(legacyDir, "history.json"), 'w', encoding='utf-8') as historyFile:
+        json.dump(history, historyFile)
+
+
+def test_compaction_migrates_legacy_snapshots(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    monkeypatch.setattr(history_catalog, "STORE_ROOT", root)
+    filePath = str(tmp_path / "work" / "notes.txt")
+    legacyDir = os.path.join(root, "notes.txt")
+    writeLegacyHistory(legacyDir, [("20200101000000", b"caf\xe9\n"), ("20200101000001", b"hello\n"),
+                                   ("20200101000002", b"hello\nworld\n")])
+    with open(os.path.join(legacyDir, "19990101000000.txt"), 'w') as orphan:
+        orphan.write("unreferenced")
+
+    catalog = HistoryCatalog(os.path.join(root, "catalog.sqlite3"))
+    assert len(catalog.history(filePath)) == 3
+    catalog.close()
+
+    # The Latin-1 snapshot cannot be decoded; it is skipped, not fatal.
+    stats = compactStore(root)
+    assert stats["migrated"] == 2
+    # The orphan and the two migrated copies.
+    assert stats["removedSnapshots"] == 3
+
+    catalog = HistoryCatalog(os.path.join(root, "catalog.sqlite3"))
+    entries = list(catalog.history(filePath))
+    catalog.close()
+    assert entries[0]["hash"] is None and entries[0]["legacyDir"] == legacyDir
+    store = VersionStore(root)
+    assert store.get(entries[1]["hash"]) == "hello\n"
+    assert store.get(entries[2]["hash"]) == "hello\nworld\n"
+    assert sorted(os.listdir(legacyDir)) == ["20200101000000.txt", "history.json"]
@@ -0,0 +1,76 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+
+
+def makeEditor(qapp, text, show=False):
+    from code_editor import CodeEditor
+    from syntax_highlighter import SyntaxHighlighter
+    from syntax_languages import compiledLanguage
+    editor = CodeEditor()
+    editor.resize(600, 400)
+    if show:
+        editor.show()
+        qapp.processEvents()
+    editor.setPlainText(text)
+    highlighter = SyntaxHighlighter(editor)
+    highlighter.setLanguage(compiledLanguage("Python"))
+    return editor, highlighter
+
+
+def finish(qapp, highlighter):
+    slices = 0
+    while not highlighter.complete:
+        highlighter.highlightPending()
+        slices += 1
+    qapp.processEvents()
+    return slices
+
+
+def states(editor):
+    block = editor.document().firstBlock()
+    result = []
+    while block.isValid():
+        result.append(block.userState())
+        block = block.next()
+    return result
+
+
+def formattedText(block):
+    return [block.text()[span.start:span.start + span.length] for span in block.layout().formats()]
+
+
+def test_block_state_spans_lines(qapp):
+    editor, highlighter = makeEditor(qapp, 'x = 1\ns = """first\nsecond\nthird"""\ny = 2\n')
+    finish(qapp, highlighter)
+    assert states(editor) == [0, 1, 1, 0, 0, 0]
+    assert formattedText(editor.document().findBlockByNumber(2)) == ["second"]
+    assert formattedText(editor.document().findBlockByNumber(4)) == ["2"]
+
+
+def test_edit_rehighlights_following_blocks(qapp):
+    from PyQt5.QtGui import QTextCursor
+    editor, highlighter = makeEditor(qapp, "".join(f"v{i} = {i}\n" for i in range(50)))
+    finish(qapp, highlighter)
+    assert set(states(editor)) == {0}
+
+    cursor = QTextCursor(editor.document().findBlockByNumber(10))
+    cursor.insertText('"""')
+    assert states(editor)[10:] == [1] * 41
+    assert formattedText(editor.document().findBlockByNumber(30)) == ["v30 = 30"]
+
+    cursor = QTextCursor(editor.document().findBlockByNumber(20))
+    cursor.insertText('"""')
+    assert states(editor)[10:20] == [1] * 10 and set(states(editor)[20:]) == {0}
+    assert formattedText(editor.document().findBlockByNumber(30)) == ["30"]
+
+
+def test_pending_pass_finishes_in_bounded_slices(qapp):
+    from syntax_highlighter import IDLE_BATCH_BLOCKS
+    text = "".join(f"def f{i}(x):\n    '''doc'''\n    return x + {i}\n" for i in range(3000))
+    editor, highlighter = makeEditor(qapp, text, show=True)
+    slices = finish(qapp, highlighter)
+    # Each slice carries at least one whole batch, even while the viewport repaints.
+    assert slices <= editor.blockCount() // IDLE_BATCH_BLOCKS + 2
+    assert states(editor)[-4:] == [0, 0, 0, 0]
+    assert formattedText(editor.document().lastBlock().previous()) == ["return", "2999"]
@@ -0,0 +1,42 @@
+import pytest
+
+from syntax_languages import CompiledLanguage, LanguageDefinition, LanguageError, compiledLanguage, languageForFile
+
+
+def tokens(text, language="Python", state=0):
+    spans, endState = compiledLanguage(language).tokenizeLine(text, state)
+    return [(text[start:start + length], tokenType) for start, length, tokenType in spans], endState
+
+
+def test_python_line():
+    assert tokens("def run(x): return None  # done") == ([
+        ("def", "keyword"), ("run", "function"), ("return", "keyword"), ("None", "constant"),
+        ("# done", "comment")], 0)
+    assert tokens("@property") == ([("@property", "decorator")], 0)
+    assert tokens("n = 0x1F + 2.5e3") == ([("0x1F", "number"), ("2.5e3", "number")], 0)
+    assert tokens("s = 'a # b'") == ([("'a # b'", "string")], 0)
+
+
+def test_block_state_is_carried_between_lines():
+    assert tokens('x = """start') == ([('"""start', "string")], 1)
+    assert tokens("still inside", state=1) == ([("still inside", "string")], 1)
+    assert tokens("", state=1) == ([], 1)
+    assert tokens('end""" + len(y)', state=1) == ([('end"""', "string"), ("len", "builtin")], 0)
+    assert tokens("x = '''one line''' if y else z") == (
+        [("'''one line'''", "string"), ("if", "keyword"), ("else", "keyword")], 0)
+    assert tokens("a = 1 /* open", "C") == ([("1", "number"), ("/* open", "comment")], 1)
+    assert tokens("close */ return", "C", state=1) == ([("close */", "comment"), ("return", "keyword")], 0)
+
+
+def test_language_lookup_by_extension():
+    assert languageForFile("script.PY").name == "Python"
+    assert languageForFile("main.rs").name == "C"
+    assert languageForFile("notes.txt") is None
+    assert languageForFile(None) is None
+
+
+def test_invalid_definitions_are_rejected():
+    with pytest.raises(LanguageError):
+        CompiledLanguage(LanguageDefinition("Bad", [".bad"], [("nonsense", "x")]))
+    with pytest.raises(LanguageError):
+        CompiledLanguage(LanguageDefinition("Bad", [".bad"], [("keyword", "(")]))
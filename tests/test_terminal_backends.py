@@ -0,0 +1,92 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("PyQt5")
+from terminal_backends import AnsiFilter, PtyBackend
+
+needsPty = pytest.mark.skipif(os.name != "posix" or not os.path.exists("/bin/sh"), reason="needs a POSIX pty")
+
+
+def filtered(ansiFilter, text):
+    raw, cleared = ansiFilter.feed(text)
+    return ansiFilter.strip(raw), cleared
+
+
+def test_strips_colours_and_controls():
+    assert filtered(AnsiFilter(), "\x1b[32mINFO\x1b[0m ok\r\n") == ("INFO ok\n", False)
+
+
+def test_strips_titles_and_charsets():
+    text = "\x1b]0;title\x07a\x1b]2;t\x1b\\b\x1b(Bc\x1b=d"
+    assert filtered(AnsiFilter(), text) == ("abcd", False)
+
+
+def test_sequence_split_across_reads():
+    ansiFilter = AnsiFilter()
+    assert filtered(ansiFilter, "red \x1b[3") == ("red ", False)
+    assert filtered(ansiFilter, "1mtext") == ("text", False)
+
+
+def test_clear_drops_earlier_text():
+    ansiFilter = AnsiFilter()
+    assert filtered(ansiFilter, "old\n\x1b[2J\x1b[Hnew\n") == ("new\n", True)
+    assert filtered(ansiFilter, "a\x1bcb") == ("b", True)
+    assert filtered(ansiFilter, "\x1b[?2J") == ("", False)
+
+
+def test_plain_text_passes_through():
+    assert filtered(AnsiFilter(), "tab\there\n") == ("tab\there\n", False)
+
+
+def waitFor(qapp, condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        qapp.processEvents()
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def shell(qapp, monkeypatch):
+    monkeypatch.setenv("SHELL", "/bin/sh")
+    backend = PtyBackend()
+    output = bytearray()
+    exitCodes = []
+    backend.dataReceived.connect(output.extend)
+    backend.finished.connect(exitCodes.append)
+    backend.start()
+    yield backend, output, exitCodes
+    if not exitCodes:
+        backend.process.kill()
+        backend.process.wait()
+    backend.closeMaster()
+
+
+@needsPty
+def test_pty_round_trip(qapp, shell):
+    backend, output, exitCodes = shell
+    backend.write(b"echo pty-$((6 * 7))\n")
+    waitFor(qapp, lambda: b"pty-42" in output)
+    # ECHO is off, so the command itself is not repeated back.
+    assert b"echo" not in output
+
+    backend.resize(100, 30)
+    backend.write(b"stty size\n")
+    waitFor(qapp, lambda: b"30 100" in output)
+
+    backend.write(b"exit 3\n")
+    waitFor(qapp, lambda: exitCodes)
+    assert exitCodes == [3]
+    assert backend.masterFd is None
+
+
+@needsPty
+def test_pty_large_write_is_flushed(qapp, shell):
+    backend, output, _ = shell
+    backend.write(b"cat > /dev/null\n" + b"x" * 200 + b"\n")
+    backend.write(b"".join(b"%d\n" % i for i in range(20000)) + b"\x04")
+    backend.write(b"echo done-$((1 + 1))\n")
+    waitFor(qapp, lambda: b"done-2" in output)
+    assert not backend.pendingWrite
@@ -0,0 +1,105 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtTest import QTest
+
+import terminal_widget
+
+
+class FakeBackend(QObject):
+    started = pyqtSignal()
+    dataReceived = pyqtSignal(bytes)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    echoesInput = False
+    lineEnding = b"\n"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.written = []
+
+    def start(self):
+        pass
+
+    def write(self, data):
+        self.written.append(data)
+
+    def interrupt(self):
+        pass
+
+    def resize(self, columns, rows):
+        pass
+
+
+@pytest.fixture
+def terminal(qapp, monkeypatch):
+    monkeypatch.setattr(terminal_widget, "createBackend", FakeBackend)
+    widget = terminal_widget.TerminalWidget()
+    widget.readOutput(b"$ ")
+    widget.flushOutput()
+    return widget
+
+
+def test_typing_keeps_input_start(terminal):
+    QTest.keyClicks(terminal, "ls -la")
+    assert terminal.inputStart() == 2
+    assert terminal.currentInput() == "ls -la"
+
+
+def test_execute_sends_typed_command(terminal):
+    QTest.keyClicks(terminal, "ls -la")
+    QTest.keyClick(terminal, Qt.Key_Return)
+    assert terminal.backend.written == [b"ls -la\n"]
+    assert terminal.currentInput() == ""
+
+
+def test_output_goes_before_input(terminal):
+    QTest.keyClicks(terminal, "pwd")
+    terminal.readOutput(b"late output\n$ ")
+    terminal.flushOutput()
+    assert terminal.currentInput() == "pwd"
+    assert terminal.toPlainText() == "$ late output\n$ pwd"
+
+
+def test_backspace_stops_at_input_start(terminal):
+    QTest.keyClicks(terminal, "a")
+    for _ in range(3):
+        QTest.keyClick(terminal, Qt.Key_Backspace)
+    assert terminal.toPlainText() == "$ "
+
+
+def test_history_recall(terminal):
+    for command in ("first", "second"):
+        QTest.keyClicks(terminal, command)
+        QTest.keyClick(terminal, Qt.Key_Return)
+    QTest.keyClick(terminal, Qt.Key_Up)
+    assert terminal.currentInput() == "second"
+    QTest.keyClick(terminal, Qt.Key_Up)
+    assert terminal.currentInput() == "first"
+    QTest.keyClick(terminal, Qt.Key_Down)
+    QTest.keyClick(terminal, Qt.Key_Down)
+    assert terminal.currentInput() == ""
+
+
+def test_scrollback_trim_moves_input_start(terminal):
+    terminal.setScrollbackLines(5)
+    QTest.keyClicks(terminal, "cmd")
+    terminal.readOutput("".join(f"line {i}\n" for i in range(20)).encode())
+    terminal.flushOutput()
+    assert terminal.currentInput() == "cmd"
+    assert terminal.blockCount() <= 5
+
+
+def test_flood_keeps_only_scrollback(terminal):
+    terminal.setScrollbackLines(100)
+    QTest.keyClicks(terminal, "cmd")
+    for chunk in range(20):
+        terminal.readOutput("".join(f"\x1b[32m{chunk}:{i}\x1b[0m\r\n" for i in range(50)).encode())
+    terminal.flushOutput()
+    lines = terminal.toPlainText().split("\n")
+    assert len(lines) == 100
+    assert lines[-2] == "19:49"
+    assert lines[-1] == "cmd"
+    assert terminal.currentInput() == "cmd"
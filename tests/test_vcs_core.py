@@ -0,0 +1,102 @@
+import os
+import sqlite3
+
+import pytest
+
+import vcs_cli
+from vcs_core import VersionControl, VersionControlError
+
+
+@pytest.fixture
+def vcs(tmp_path):
+    with VersionControl(str(tmp_path / "store")) as vcs:
+        yield vcs
+
+
+def writeFile(path, text):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def trackedPaths(vcs):
+    connection = sqlite3.connect(vcs.catalog.path)
+    try:
+        return [row[0] for row in connection.execute("SELECT path FROM files")]
+    finally:
+        connection.close()
+
+
+def test_commit_log_show_restore(vcs, tmp_path):
+    filePath = writeFile(tmp_path / "a.txt", "one\n")
+    first = vcs.commit(filePath, "first")
+    writeFile(tmp_path / "a.txt", "one\ntwo\n")
+    second = vcs.commit(filePath, "second")
+    assert vcs.commit(filePath, "again", skipUnchanged=True) is None
+
+    assert [entry["message"] for entry in vcs.log(filePath)] == ["second", "first"]
+    assert vcs.show(filePath, 0) == "one\n"
+    assert vcs.show(filePath) == "one\ntwo\n"
+    assert second["seq"] == first["seq"] + 1
+
+    vcs.restore(filePath, 0)
+    assert open(filePath, encoding='utf-8').read() == "one\n"
+    output = str(tmp_path / "copy.txt")
+    vcs.restore(filePath, -1, output)
+    assert open(output, encoding='utf-8').read() == "one\ntwo\n"
+
+
+def test_diff_against_disk_and_versions(vcs, tmp_path):
+    filePath = writeFile(tmp_path / "a.txt", "a\nb\nc\n")
+    vcs.commit(filePath, "first")
+    writeFile(tmp_path / "a.txt", "a\nB\nc\n")
+    diff = vcs.diff(filePath)
+    assert "-b\n+B\n" in diff
+    vcs.commit(filePath, "second")
+    assert vcs.diff(filePath, 0, 1) == diff.replace(filePath + "\n", filePath + "@1\n")
+    assert vcs.diff(filePath, 1, 1) == ""
+
+
+def test_reads_do_not_register_files(vcs, tmp_path):
+    filePath = writeFile(tmp_path / "untracked.txt", "x\n")
+    with pytest.raises(VersionControlError):
+        vcs.log(filePath)
+    with pytest.raises(VersionControlError):
+        vcs.show(filePath)
+    with pytest.raises(VersionControlError):
+        vcs.diff(filePath)
+    assert trackedPaths(vcs) == []
+
+
+def test_cli_log_of_unknown_path_fails(tmp_path, capsys):
+    root = str(tmp_path / "store")
+    filePath = writeFile(tmp_path / "a.txt", "x\n")
+    assert vcs_cli.main(["--root", root, "log", filePath]) == 1
+    assert "no recorded versions" in capsys.readouterr().err
+    assert vcs_cli.main(["--root", root, "commit", filePath, "-m", "first"]) == 0
+    assert vcs_cli.main(["--root", root, "log", filePath]) == 0
+    assert "first" in capsys.readouterr().out
+
+
+def test_batch_commit(vcs, tmp_path):
+    paths = [writeFile(tmp_path / f"f{i}.txt", f"file {i}\n") for i in range(5)]
+    entries, unchanged, failures = vcs.batchCommit(paths + [str(tmp_path / "missing.txt")], "batch", jobs=1)
+    assert len(entries) == 5 and unchanged == 0
+    assert [os.path.basename(path) for path, _ in failures] == ["missing.txt"]
+    writeFile(tmp_path / "f0.txt", "changed\n")
+    entries, unchanged, failures = vcs.batchCommit(paths, "again", jobs=2)
+    assert [entry["seq"] for entry in entries] == [1] and unchanged == 4 and not failures
+    assert vcs.show(paths[0]) == "changed\n"
+
+
+def test_crlf_round_trip(vcs, tmp_path):
+    filePath = tmp_path / "windows.txt"
+    original = b"first\r\nsecond\r\nmixed\nend\r\n"
+    filePath.write_bytes(original)
+    vcs.commit(str(filePath), "crlf")
+    assert vcs.show(str(filePath)) == original.decode()
+    assert vcs.diff(str(filePath)) == ""
+
+    filePath.write_bytes(b"changed\n")
+    vcs.restore(str(filePath))
+    assert filePath.read_bytes() == original
+    assert vcs.commit(str(filePath), "again", skipUnchanged=True) is None
@@ -0,0 +1,27 @@
+from version_cache import LINE_OVERHEAD, VersionCache, versionKey
+
+
+def test_lines_are_split_once_and_counted():
+    cache = VersionCache(budget=1 << 20)
+    cached = cache.get("a", lambda: "one\ntwo\n")
+    assert cached.lines is cached.lines == ["one", "two"]
+    assert cache.stats()["bytes"] == len("one\ntwo\n") + LINE_OVERHEAD + 2 * LINE_OVERHEAD
+
+
+def test_lru_eviction_within_budget():
+    cache = VersionCache(budget=3 * (100 + LINE_OVERHEAD))
+    for key in "abc":
+        cache.get(key, lambda: "x" * 100)
+    cache.get("a", lambda: "unused")
+    cache.get("d", lambda: "y" * 100)
+    assert list(cache.entries) == ["c", "a", "d"]
+    assert cache.stats()["hits"] == 1
+    assert cache.used <= cache.budget
+
+
+def test_invalidate_and_legacy_keys():
+    cache = VersionCache()
+    cache.get(versionKey({"hash": "abc"}), lambda: "text")
+    cache.invalidate("abc")
+    assert cache.stats()["entries"] == 0 and cache.used == 0
+    assert versionKey({"hash": None, "legacyDir": "/d", "timestamp": "1"}) == ("legacy", "/d", "1")
@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+from PyQt5.QtCore import Qt
+
+import version_history_model
+from history_catalog import HistoryCatalog
+from version_history_model import VersionEntryRole, VersionHistoryModel, VersionIdRole
+
+
+@pytest.fixture
+def history(tmp_path):
+    catalog = HistoryCatalog(str(tmp_path / "catalog.sqlite3"))
+    history = catalog.history(str(tmp_path / "paged.txt"))
+    for seq in range(12):
+        history.append(f"2024010100{seq:04d}", f"commit {seq}", f"{seq:064x}")
+    yield history
+    catalog.close()
+
+
+def makeModel(history):
+    model = VersionHistoryModel(history, lambda timestamp: f"t{timestamp[-2:]}")
+    inserted = []
+    changed = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    model.dataChanged.connect(lambda topLeft, bottomRight: changed.append((topLeft.row(), bottomRight.row())))
+    return model, inserted, changed
+
+
+def messages(model):
+    return [model.data(model.index(row))[5:] for row in range(model.rowCount())]
+
+
+def test_rows_are_fetched_newest_first_in_batches(qapp, history, monkeypatch):
+    monkeypatch.setattr(version_history_model, "FETCH_BATCH", 5)
+    model, inserted, _ = makeModel(history)
+    assert model.rowCount() == 0 and model.canFetchMore()
+    while model.canFetchMore():
+        model.fetchMore()
+    assert inserted == [(0, 4), (5, 9), (10, 11)]
+    assert messages(model) == [f"commit {seq}" for seq in range(11, -1, -1)]
+    assert model.data(model.index(0)) == "t11: commit 11"
+    assert model.data(model.index(0), VersionEntryRole)["seq"] == 11
+    assert model.data(model.index(11), VersionIdRole) == history[0]["id"]
+    assert model.data(model.index(12)) is None
+
+
+def test_added_version_is_inserted_at_the_top(qapp, history, monkeypatch):
+    monkeypatch.setattr(version_history_model, "FETCH_BATCH", 5)
+    model, inserted, _ = makeModel(history)
+    model.fetchMore()
+    entry = history.append("20240101000012", "commit 12", "c" * 64)
+    model.versionAdded(entry)
+    assert inserted[-1] == (0, 0)
+    assert messages(model)[:3] == ["commit 12", "commit 11", "commit 10"]
+
+    # Paging continues after the rows already shown, without duplicates.
+    while model.canFetchMore():
+        model.fetchMore()
+    assert inserted[1:] == [(0, 0), (6, 10), (11, 12)]
+    assert messages(model) == [f"commit {seq}" for seq in range(12, -1, -1)]
+
+
+def test_updated_version_changes_its_row(qapp, history):
+    model, _, changed = makeModel(history)
+    model.fetchMore()
+    entry = history.update(9, message="amended")
+    model.versionUpdated(entry)
+    assert changed == [(2, 2)]
+    assert messages(model)[2] == "amended"
+
+    added = history.append("20240101000012", "commit 12", "c" * 64)
+    model.versionAdded(added)
+    model.versionUpdated(history.update(12, message="newest amended"))
+    model.versionUpdated(history.update(0, message="oldest amended"))
+    assert changed[1:] == [(0, 0), (12, 12)]
+    assert messages(model)[0] == "newest amended" and messages(model)[-1] == "oldest amended"
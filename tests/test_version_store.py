@@ -0,0 +1,94 @@
+import os
+import threading
+
+import pytest
+
+import version_store
+from version_store import VersionStore, VersionStoreError
+
+
+def test_concurrent_writes_of_one_object(tmp_path):
+    store = VersionStore(str(tmp_path))
+    content = "shared content\n" * 1000
+    digest = store.hashContent(content)
+    errors = []
+
+    def write():
+        try:
+            for _ in range(50):
+                store.writeObject(digest, b"K\n" + content.encode())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert os.listdir(os.path.dirname(store.objectPath(digest))) == [os.path.basename(store.objectPath(digest))]
+
+
+def chain(store, count):
+    digests = []
+    parent = None
+    for version in range(count):
+        content = "".join(f"line {i}\n" for i in range(200)) + f"version {version}\n"
+        parent = store.put(content, parent=parent)
+        digests.append((parent, content))
+    return digests
+
+
+def test_round_trip_through_keyframes_and_deltas(tmp_path):
+    store = VersionStore(str(tmp_path), keyframeInterval=4)
+    digests = chain(store, 10)
+    kinds = [store.readObject(digest)[0] for digest, _ in digests]
+    assert kinds == [b"K", b"D", b"D", b"D", b"K", b"D", b"D", b"D", b"K", b"D"]
+    for digest, content in digests:
+        assert store.get(digest) == content
+    assert store.put(digests[3][1], parent=digests[9][0]) == digests[3][0]
+
+
+def test_unrelated_parent_is_stored_whole(tmp_path):
+    store = VersionStore(str(tmp_path))
+    parent = store.put("".join(f"{i}\n" for i in range(500)))
+    digest = store.put("completely different\n", parent=parent)
+    assert store.readObject(digest)[0] == b"K"
+    assert store.get(digest) == "completely different\n"
+
+
+def test_missing_object_raises(tmp_path):
+    store = VersionStore(str(tmp_path))
+    with pytest.raises(VersionStoreError):
+        store.get("0" * 64)
+
+
+def test_pack_keeps_every_object_readable(tmp_path):
+    store = VersionStore(str(tmp_path), keyframeInterval=4)
+    digests = chain(store, 10)
+    assert store.looseObjectCount() == 10
+    assert store.pack() == 10
+    assert list(store.looseObjects()) == []
+    assert store.pack() == 0
+
+    reopened = VersionStore(str(tmp_path), keyframeInterval=4)
+    for digest, content in digests:
+        assert reopened.contains(digest)
+        assert reopened.get(digest) == content
+
+
+def test_collect_garbage_keeps_delta_bases(tmp_path, monkeypatch):
+    monkeypatch.setattr(version_store, "GC_GRACE_PERIOD", -60)
+    store = VersionStore(str(tmp_path), keyframeInterval=4)
+    digests = chain(store, 6)
+    store.pack()
+    orphan = store.put("orphaned\n")
+
+    # Version 2 is a delta on version 0, so the keyframe must survive.
+    removed = store.collectGarbage([digests[2][0]])
+    assert removed == 5
+    assert store.get(digests[2][0]) == digests[2][1]
+    assert store.contains(digests[0][0])
+    assert not store.contains(digests[1][0])
+    assert not store.contains(orphan)
+    assert len(store.refreshPacks()) == 1
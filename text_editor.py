@@ -1,27 +1,80 @@
 import os
-import json
-import difflib
-from datetime import datetime
+import time
 from PyQt5.QtWidgets import (
-    QMainWindow, QTabWidget, QDockWidget, QListWidget, QVBoxLayout,
+    QMainWindow, QTabWidget, QDockWidget, QListView, QVBoxLayout, QWidget,
     QMessageBox, QInputDialog, QAction, QFileDialog, QToolBar, QPushButton
 )
-from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt  # <-- Import Qt here
-from terminal_widget import TerminalWidget
+from PyQt5.QtGui import QIcon, QTextCursor
+from PyQt5.QtCore import Qt, QEvent, QTimer, pyqtSignal  # <-- Import Qt here
 from editor_tab import EditorTab
+from file_loader import ASYNC_LOAD_THRESHOLD
+from large_file_viewer import LargeFileTab, LARGE_FILE_THRESHOLD
+from save_worker import SaveQueue
+from session import SESSION_PATH, TabPlaceholder, readSession, writeSession
+from autosave import listRecoveryFiles, readRecovery, removeRecovery
+from version_history_model import VersionHistoryModel, VersionEntryRole
 from styles import get_menu_style, get_tab_style, get_toolbar_style
+from instrumentation import recorder
+
+COMMIT_DIALOG_ENTRIES = 50
+SEARCH_RESULT_TEXT = 120
 
 class TextEditor(QMainWindow):
-    def __init__(self):
+    firstPainted = pyqtSignal()
+    startupFinished = pyqtSignal()
+
+    def __init__(self, lazyStartup=True, sessionPath=SESSION_PATH):
         super().__init__()
         self.setWindowTitle("TrackText - Pro")
         self.resize(1700, 1100)
 
+        # In lazy mode the terminal is spawned when its dock is first shown and
+        # work queued with runAfterFirstPaint waits until the window has painted.
+        self.lazyStartup = lazyStartup
+        self.painted = False
+        self.afterFirstPaint = []
+
+        # Restored tabs stay TabPlaceholders until activated; the neighbours of
+        # the active tab are read ahead in the background when prefetchAdjacent is set.
+        self.sessionPath = sessionPath
+        self.prefetchAdjacent = True
+        self.autoSnapshotEnabled = False
+
+        self.diffView = None
+        self.searchIndex = None
+        self.searchIndexQueue = None
+        self.compactionWorker = None
+        self.instrumentationDock = None
+        self.saveQueue = SaveQueue(self)
+        self.saveQueue.saveCompleted.connect(self.onSaveCompleted)
+        self.saveQueue.saveFailed.connect(self.onSaveFailed)
+
         self.setupSidePanels()
         self.setupTabWidget()
         self.setupMenu()
         self.setupToolbar()
+        self.tabWidget.installEventFilter(self)
+        self.runAfterFirstPaint(self.offerRecovery)
+
+    def eventFilter(self, watched, event):
+        if watched is self.tabWidget and event.type() == QEvent.Paint and not self.painted:
+            self.painted = True
+            self.tabWidget.removeEventFilter(self)
+            QTimer.singleShot(0, self.onFirstPaint)
+        return super().eventFilter(watched, event)
+
+    def onFirstPaint(self):
+        self.firstPainted.emit()
+        tasks, self.afterFirstPaint = self.afterFirstPaint, []
+        for task in tasks:
+            task()
+        self.startupFinished.emit()
+
+    def runAfterFirstPaint(self, task):
+        if self.painted or not self.lazyStartup:
+            task()
+        else:
+            self.afterFirstPaint.append(task)
 
     def setupTabWidget(self):
         self.tabWidget = QTabWidget()
@@ -30,28 +83,139 @@ class TextEditor(QMainWindow):
         self.tabWidget.currentChanged.connect(self.onTabChanged)
         self.setCentralWidget(self.tabWidget)
 
-        if self.tabWidget.count() == 0:
+        if not self.restoreSession():
             self.addNewTab()
 
         # Apply styles
         self.tabWidget.setStyleSheet(get_tab_style())
 
     def addNewTab(self, filePath=None):
-        newTab = EditorTab(self, filePath)
+        newTab = self.createEditorTab(filePath)
         fileName = os.path.basename(filePath) if filePath else "Untitled"
         self.tabWidget.addTab(newTab, fileName)
         self.tabWidget.setCurrentWidget(newTab)
 
-        newTab.editor.textChangedSignal.connect(self.onTextChanged)
+    def createEditorTab(self, filePath=None):
+        newTab = EditorTab(self, filePath)
+        newTab.editor.changesCoalescedSignal.connect(self.onTextChanged)
+        newTab.autosaver.snapshotsEnabled = self.autoSnapshotEnabled
+        newTab.autosaver.snapshotTaken.connect(self.scheduleSearchIndex)
+        newTab.autosaver.snapshotTaken.connect(self.maybeCompactStore)
+        newTab.autosaver.autosaveFailed.connect(self.onAutosaveFailed)
+        return newTab
+
+    def addLargeFileTab(self, filePath):
+        try:
+            newTab = LargeFileTab(self, filePath)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to open file:\n{str(e)}")
+            return
+        self.tabWidget.addTab(newTab, f"{os.path.basename(filePath)} [read-only]")
+        self.tabWidget.setCurrentWidget(newTab)
 
     def closeTab(self, index):
         if self.tabWidget.count() == 1:
             QMessageBox.warning(self, "Warning", "Cannot close the last tab.")
             return
+        tab = self.tabWidget.widget(index)
+        if isinstance(tab, EditorTab):
+            tab.cancelLoading()
+        elif isinstance(tab, LargeFileTab):
+            # A diff of this file reads its lines from the mapping being closed.
+            if self.diffView is not None and self.diffView.currentFile == tab.currentFile:
+                self.diffView.cancelDiff()
+                self.tabWidget.removeTab(self.tabWidget.indexOf(self.diffView))
+            tab.closeFile()
+            index = self.tabWidget.indexOf(tab)
+        elif tab is self.diffView:
+            tab.cancelDiff()
         self.tabWidget.removeTab(index)
 
     def onTabChanged(self, index):
+        if isinstance(self.tabWidget.widget(index), TabPlaceholder):
+            self.materializeTab(index)
         self.updateVersionHistoryPanel()
+        if hasattr(self, 'blameAction'):
+            currentTab = self.getCurrentTab()
+            self.blameAction.setChecked(bool(currentTab and currentTab.blameVisible))
+        if self.prefetchAdjacent:
+            for neighbour in (index - 1, index + 1):
+                tab = self.tabWidget.widget(neighbour)
+                if isinstance(tab, TabPlaceholder):
+                    tab.prefetch()
+
+    def restoreSession(self):
+        session = readSession(self.sessionPath) if self.sessionPath else None
+        if not session:
+            return False
+
+        # Signals stay blocked so adding placeholders does not materialize them.
+        self.tabWidget.blockSignals(True)
+        activeIndex = session.get("activeIndex", 0)
+        for index, state in enumerate(session.get("tabs", [])):
+            filePath = state.get("path")
+            if not filePath or not os.path.isfile(filePath):
+                # Keep the active tab pointing at the same file when earlier ones are gone.
+                if index < activeIndex:
+                    activeIndex -= 1
+                continue
+            placeholder = TabPlaceholder(self, filePath, state.get("cursor", 0), state.get("scroll", 0))
+            self.tabWidget.addTab(placeholder, os.path.basename(filePath))
+        if self.tabWidget.count():
+            self.tabWidget.setCurrentIndex(min(max(0, activeIndex), self.tabWidget.count() - 1))
+        self.tabWidget.blockSignals(False)
+
+        if not self.tabWidget.count():
+            return False
+        self.runAfterFirstPaint(lambda: self.onTabChanged(self.tabWidget.currentIndex()))
+        return True
+
+    def materializeTab(self, index):
+        placeholder = self.tabWidget.widget(index)
+        filePath = placeholder.currentFile
+        try:
+            fileSize = os.path.getsize(filePath)
+            if fileSize >= LARGE_FILE_THRESHOLD:
+                newTab = LargeFileTab(self, filePath)
+                title = f"{os.path.basename(filePath)} [read-only]"
+            else:
+                newTab = self.createEditorTab(filePath)
+                title = os.path.basename(filePath)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to open file:\n{str(e)}")
+            return
+
+        self.tabWidget.blockSignals(True)
+        self.tabWidget.insertTab(index, newTab, title)
+        self.tabWidget.removeTab(index + 1)
+        self.tabWidget.setCurrentIndex(index)
+        self.tabWidget.blockSignals(False)
+
+        if isinstance(newTab, EditorTab):
+            self.loadFileIntoTab(newTab, filePath, fileSize, placeholder.takePrefetched())
+            newTab.setViewState(placeholder.cursorPosition, placeholder.scrollPosition)
+        placeholder.deleteLater()
+
+    def saveSession(self):
+        if not self.sessionPath:
+            return
+        tabs = []
+        activeIndex = 0
+        for index in range(self.tabWidget.count()):
+            tab = self.tabWidget.widget(index)
+            if isinstance(tab, TabPlaceholder):
+                state = tab.sessionState()
+            elif isinstance(tab, EditorTab) and tab.currentFile:
+                cursorPosition, scrollPosition = tab.viewState()
+                state = {"path": os.path.abspath(tab.currentFile), "cursor": cursorPosition, "scroll": scrollPosition}
+            elif isinstance(tab, LargeFileTab):
+                state = {"path": os.path.abspath(tab.currentFile)}
+            else:
+                continue
+            if index == self.tabWidget.currentIndex():
+                activeIndex = len(tabs)
+            tabs.append(state)
+        writeSession(tabs, activeIndex, self.sessionPath)
 
     def getCurrentTab(self):
         current_widget = self.tabWidget.currentWidget()
@@ -101,32 +265,78 @@ class TextEditor(QMainWindow):
         diffAction.triggered.connect(self.showDiff)
         versionMenu.addAction(diffAction)
 
+        searchHistoryAction = QAction("Search &History", self)
+        searchHistoryAction.setShortcut("Ctrl+Shift+F")
+        searchHistoryAction.triggered.connect(self.searchHistory)
+        versionMenu.addAction(searchHistoryAction)
+
+        self.blameAction = QAction("Show &Blame", self)
+        self.blameAction.setCheckable(True)
+        self.blameAction.toggled.connect(self.toggleBlame)
+        versionMenu.addAction(self.blameAction)
+
+        autoSnapshotAction = QAction("Auto-&Snapshot", self)
+        autoSnapshotAction.setCheckable(True)
+        autoSnapshotAction.setChecked(self.autoSnapshotEnabled)
+        autoSnapshotAction.toggled.connect(self.setAutoSnapshotEnabled)
+        versionMenu.addAction(autoSnapshotAction)
+
+        compactAction = QAction("Com&pact Version Store", self)
+        compactAction.triggered.connect(lambda: self.compactStore(collectGarbage=True))
+        versionMenu.addAction(compactAction)
+
+        # Tools Menu
+        toolsMenu = menuBar.addMenu("&Tools")
+        performanceAction = QAction("&Performance Overlay", self)
+        performanceAction.setShortcut("Ctrl+Shift+P")
+        performanceAction.triggered.connect(self.showInstrumentation)
+        toolsMenu.addAction(performanceAction)
+
     def setupSidePanels(self):
         # Version History Dock
         self.versionHistoryDock = QDockWidget("Version History", self)
         self.versionHistoryDock.setFeatures(QDockWidget.NoDockWidgetFeatures)
 
-        self.versionHistoryList = QListWidget(self)
+        self.versionHistoryList = QListView(self)
+        self.versionHistoryList.setUniformItemSizes(True)
         self.versionHistoryList.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #2e2e2e;
                 color: #ffffff;
                 border: none;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #444444;
             }
         """)
-        self.versionHistoryList.itemClicked.connect(self.loadSelectedVersion)
+        self.emptyHistoryModel = VersionHistoryModel([], str, self)
+        self.versionHistoryList.setModel(self.emptyHistoryModel)
+        self.versionHistoryList.clicked.connect(self.loadSelectedVersion)
         self.versionHistoryDock.setWidget(self.versionHistoryList)
         self.addDockWidget(Qt.BottomDockWidgetArea, self.versionHistoryDock)
 
         # Terminal Dock
         self.terminalDock = QDockWidget("Terminal", self)
         self.terminalDock.setFeatures(QDockWidget.DockWidgetClosable | QDockWidget.DockWidgetMovable)
+        self.terminalWidget = None
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.terminalDock)
+        if self.lazyStartup:
+            self.terminalDock.setWidget(QWidget(self.terminalDock))
+            self.terminalDock.visibilityChanged.connect(self.onTerminalDockVisibilityChanged)
+        else:
+            self.createTerminal()
+
+    def onTerminalDockVisibilityChanged(self, visible):
+        if visible and self.terminalWidget is None:
+            # Queued so the dock paints before the shell is spawned.
+            QTimer.singleShot(0, self.createTerminal)
+
+    def createTerminal(self):
+        if self.terminalWidget is not None:
+            return
+        from terminal_widget import TerminalWidget
         self.terminalWidget = TerminalWidget(self)
         self.terminalDock.setWidget(self.terminalWidget)
-        self.addDockWidget(Qt.BottomDockWidgetArea, self.terminalDock)
 
     def setupToolbar(self):
         toolbar = QToolBar("Side Panels")
@@ -161,21 +371,55 @@ class TextEditor(QMainWindow):
 
         if filePath:
             # Check if file is already open
-            for index in range(self.tabWidget.count()):
-                tab = self.tabWidget.widget(index)
-                if tab.currentFile == filePath:
-                    self.tabWidget.setCurrentIndex(index)
-                    return
+            index = self.findTab(filePath)
+            if index != -1:
+                self.tabWidget.setCurrentIndex(index)
+                return
+
+            try:
+                fileSize = os.path.getsize(filePath)
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Failed to open file:\n{str(e)}")
+                return
+
+            if fileSize >= LARGE_FILE_THRESHOLD:
+                self.addLargeFileTab(filePath)
+                return
 
             self.addNewTab(filePath)
+            self.loadFileIntoTab(self.getCurrentTab(), filePath, fileSize)
 
-            try:
+    def findTab(self, filePath):
+        for index in range(self.tabWidget.count()):
+            tab = self.tabWidget.widget(index)
+            if tab.currentFile and os.path.abspath(tab.currentFile) == os.path.abspath(filePath):
+                return index
+        return -1
+
+    def loadFileIntoTab(self, tab, filePath, fileSize, content=None):
+        try:
+            if content is not None:
+                tab.editor.setPlainText(content)
+            elif fileSize >= ASYNC_LOAD_THRESHOLD:
+                tab.loadFileAsync(filePath)
+            else:
+                started = time.perf_counter() if recorder.enabled else None
                 with open(filePath, 'r', encoding='utf-8') as file:
-                    self.getCurrentTab().editor.setPlainText(file.read())
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to open file:\n{str(e)}")
-            self.getCurrentTab().loadVersionHistory()
+                    tab.editor.setPlainText(file.read())
+                if started is not None:
+                    recorder.recordDuration("load", started)
+            if not tab.loading:
+                tab.autosaver.markClean()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to open file:\n{str(e)}")
+        self.runAfterFirstPaint(lambda: self.loadTabHistory(tab))
+
+    def loadTabHistory(self, tab):
+        tab.loadVersionHistory()
+        if tab is self.getCurrentTab():
             self.updateVersionHistoryPanel()
+        if tab.versionHistory:
+            self.scheduleSearchIndex(tab.currentFile)
 
     def saveFile(self):
         currentTab = self.getCurrentTab()
@@ -186,12 +430,37 @@ class TextEditor(QMainWindow):
             self.saveFileAs()
             return
 
-        try:
-            with open(currentTab.currentFile, 'w', encoding='utf-8') as file:
-                file.write(currentTab.editor.toPlainText())
+        if not self.checkFullyLoaded(currentTab):
+            return
+
+        self.saveQueue.save(currentTab.currentFile, lambda tab=currentTab: self.saveSnapshot(tab))
+
+    def saveSnapshot(self, tab):
+        # Remembers which revision went to disk so autosave knows what is clean.
+        tab.autosaver.savingRevision = tab.editor.document().revision()
+        return tab.editor.toPlainText()
+
+    def onSaveCompleted(self, filePath):
+        self.statusBar().showMessage(f"Saved {os.path.basename(filePath)}", 3000)
+        index = self.findTab(filePath)
+        tab = self.tabWidget.widget(index) if index != -1 else None
+        if isinstance(tab, EditorTab):
+            tab.autosaver.markClean(tab.autosaver.savingRevision)
+        currentTab = self.getCurrentTab()
+        if currentTab and currentTab.currentFile == filePath:
             self.updateVersionHistoryPanel()
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to save file:\n{str(e)}")
+
+    def onSaveFailed(self, filePath, error):
+        QMessageBox.warning(self, "Error", f"Failed to save {os.path.basename(filePath)}:\n{error}")
+
+    def checkFullyLoaded(self, tab):
+        if tab.loading:
+            QMessageBox.warning(self, "Warning", "The file is still loading.")
+            return False
+        if tab.partiallyLoaded:
+            QMessageBox.warning(self, "Warning", "Loading was cancelled; the buffer holds only part of the file.")
+            return False
+        return True
 
     def saveFileAs(self):
         currentTab = self.getCurrentTab()
@@ -201,6 +470,8 @@ class TextEditor(QMainWindow):
         fileName, _ = QFileDialog.getSaveFileName(self, "Save File As")
         if fileName:
             currentTab.currentFile = fileName
+            currentTab.updateLanguage()
+            currentTab.loadVersionHistory()
             self.tabWidget.setTabText(self.tabWidget.currentIndex(), os.path.basename(fileName))
             self.saveFile()
 
@@ -213,10 +484,13 @@ class TextEditor(QMainWindow):
             QMessageBox.warning(self, "Error", "Please save the file before committing changes.")
             return
 
-        history = currentTab.versionHistory
+        if not self.checkFullyLoaded(currentTab):
+            return
+
+        recentEntries = currentTab.versionHistory.recent(COMMIT_DIALOG_ENTRIES) if currentTab.versionHistory else []
         commitOptions = ["New Commit"] + [
             f"{currentTab.getReadableTimestamp(entry['timestamp'])}: {entry['message']}" 
-            for entry in history
+            for entry in recentEntries
         ]
         selectedOption, ok = QInputDialog.getItem(
             self, 
@@ -242,26 +516,23 @@ class TextEditor(QMainWindow):
 
         if selectedOption == "New Commit":
             currentTab.saveVersion(content, message)
+            self.scheduleSearchIndex(currentTab.currentFile)
         else:
             commitIndex = commitOptions.index(selectedOption) - 1
-            if commitIndex < 0 or commitIndex >= len(history):
+            if commitIndex < 0 or commitIndex >= len(recentEntries):
                 QMessageBox.warning(self, "Error", "Invalid commit selection.")
                 return
-            history[commitIndex]['message'] = message
-            timestamp = history[commitIndex]['timestamp']
-            versionDir = currentTab.getVersionDirectory()
-            versionFileName = os.path.join(versionDir, f"{timestamp}.txt")
-            try:
-                with open(versionFileName, 'w', encoding='utf-8') as versionFile:
-                    versionFile.write(content)
-                currentTab.updateVersionHistory(history)
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to commit changes:\n{str(e)}")
+            if not currentTab.amendVersion(recentEntries[commitIndex]['seq'], content, message):
                 return
+            self.scheduleSearchIndex(currentTab.currentFile, recentEntries[commitIndex]['seq'])
 
         self.updateVersionHistoryPanel()
+        self.maybeCompactStore()
 
     def showDiff(self):
+        if isinstance(self.tabWidget.currentWidget(), LargeFileTab):
+            self.showLargeFileDiff(self.tabWidget.currentWidget())
+            return
         currentTab = self.getCurrentTab()
         if not currentTab:
             return
@@ -296,84 +567,309 @@ class TextEditor(QMainWindow):
         if not tab.currentFile:
             return
 
-        history = tab.versionHistory
-        timestamp = history[index]['timestamp']
-        versionDir = tab.getVersionDirectory()
-        versionFileName = os.path.join(versionDir, f"{timestamp}.txt")
-
-        if not os.path.exists(versionFileName):
-            QMessageBox.warning(self, "Error", "Failed to load the selected version for comparison.")
+        entry = tab.versionHistory[index]
+        self.openDiffView(tab.currentFile, tab.getReadableTimestamp(entry['timestamp']))
+        self.diffView.startDiff(lambda: tab.getCachedVersion(entry).lines, tab.editor.toPlainText())
+
+    def openDiffView(self, filePath, versionLabel):
+        if self.diffView is None or self.tabWidget.indexOf(self.diffView) == -1:
+            from diff_viewer import DiffView
+            self.diffView = DiffView(self)
+            self.tabWidget.addTab(self.diffView, "Diff")
+        title = f"Diff: {os.path.basename(filePath)} @ {versionLabel}"
+        self.tabWidget.setTabText(self.tabWidget.indexOf(self.diffView), title)
+        self.diffView.currentFile = filePath
+        self.tabWidget.setCurrentWidget(self.diffView)
+
+    def showLargeFileDiff(self, tab):
+        # Large files are never committed from the editor, but may have been
+        # through vcs_cli; their history is read without registering the file.
+        lines = tab.diffLines()
+        if lines is None:
+            QMessageBox.information(self, "Diff Viewer", "The file is still being indexed. Try again when it is done.")
             return
-
+        from history_catalog import defaultCatalog, readEntryContent
+        from vcs_core import getReadableTimestamp
         try:
-            with open(versionFileName, 'r', encoding='utf-8') as versionFile:
-                oldContent = versionFile.read()
+            history = defaultCatalog.history(tab.currentFile, create=False)
+            entries = history.recent(len(history))
         except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to read the selected version:\n{str(e)}")
+            QMessageBox.warning(self, "Error", f"Failed to load version history:\n{str(e)}")
+            return
+        if not entries:
+            QMessageBox.information(self, "Diff Viewer", "No versions available for comparison.")
             return
 
-        currentContent = tab.editor.toPlainText()
+        historyList = [f"{getReadableTimestamp(entry['timestamp'])}: {entry['message']}" for entry in entries]
+        selectedItem, ok = QInputDialog.getItem(
+            self, "Diff Viewer", "Select a version to compare:", historyList, 0, False)
+        if not ok or not selectedItem:
+            return
+        entry = entries[historyList.index(selectedItem)]
+        self.openDiffView(tab.currentFile, getReadableTimestamp(entry['timestamp']))
+        self.diffView.startDiff(lambda: readEntryContent(history.path, entry).splitlines(), lines)
 
-        diff = difflib.unified_diff(
-            oldContent.splitlines(),
-            currentContent.splitlines(),
-            fromfile="Previous Version",
-            tofile="Current Version",
-            lineterm=""
-        )
+    def toggleBlame(self, checked):
+        currentTab = self.getCurrentTab()
+        if not currentTab or currentTab.blameVisible == checked:
+            return
+        if checked and not currentTab.currentFile:
+            QMessageBox.warning(self, "Error", "Please save the file to view blame.")
+            self.blameAction.setChecked(False)
+            return
+        currentTab.setBlameVisible(checked)
+
+    def setAutoSnapshotEnabled(self, enabled):
+        self.autoSnapshotEnabled = enabled
+        for index in range(self.tabWidget.count()):
+            tab = self.tabWidget.widget(index)
+            if isinstance(tab, EditorTab):
+                tab.autosaver.snapshotsEnabled = enabled
+
+    def onAutosaveFailed(self, error):
+        self.statusBar().showMessage(f"Autosave failed: {error}", 5000)
+
+    def offerRecovery(self):
+        # Recovery files that still exist at startup belong to buffers that were
+        # never saved. Those matching the file on disk are dropped silently.
+        stale = []
+        for fileName, header in listRecoveryFiles():
+            filePath = header.get("path")
+            if filePath and os.path.isfile(filePath):
+                try:
+                    _, content = readRecovery(fileName)
+                    with open(filePath, 'r', encoding='utf-8') as file:
+                        unchanged = file.read() == content
+                except (OSError, ValueError):
+                    unchanged = False
+                if unchanged:
+                    removeRecovery(header.get("key"))
+                    continue
+            stale.append((fileName, header))
+        if not stale:
+            return
 
-        diffText = list(diff)
-        tab.editor.displayDiff(diffText)
+        names = "\n".join(os.path.basename(header.get("path") or "") or "Untitled" for _, header in stale)
+        box = QMessageBox(self)
+        box.setWindowTitle("Recover Unsaved Changes")
+        box.setText(f"Unsaved changes from a previous session were found:\n\n{names}\n\nRestore them?")
+        box.setStandardButtons(QMessageBox.Yes | QMessageBox.Discard | QMessageBox.Ignore)
+        choice = box.exec_()
+        for fileName, header in stale:
+            if choice == QMessageBox.Yes:
+                self.restoreRecovery(fileName, header)
+            elif choice == QMessageBox.Discard:
+                removeRecovery(header.get("key"))
+
+    def restoreRecovery(self, fileName, header):
+        try:
+            _, content = readRecovery(fileName)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Error", f"Failed to read recovery file:\n{str(e)}")
+            return
+
+        filePath = header.get("path")
+        index = self.findTab(filePath) if filePath else -1
+        if index != -1:
+            self.tabWidget.setCurrentIndex(index)
+        else:
+            self.addNewTab(filePath)
+            if filePath:
+                self.runAfterFirstPaint(lambda tab=self.getCurrentTab(): self.loadTabHistory(tab))
+        tab = self.getCurrentTab()
+        if tab is None:
+            QMessageBox.warning(self, "Error", f"Cannot restore unsaved changes to {filePath}.")
+            return
+        if not filePath:
+            tab.autosaver.untitledKey = header.get("key")
 
-    def loadSelectedVersion(self, item):
+        if tab.loading:
+            # Replace the text once the file on disk has finished streaming in.
+            tab.loadWorker.loadFinished.connect(lambda completed: tab.editor.setPlainText(content))
+        else:
+            tab.editor.setPlainText(content)
+
+    def scheduleSearchIndex(self, filePath, invalidFrom=None):
+        # The index is updated on a worker thread; search and its queue are only
+        # imported once something needs them.
+        if self.searchIndexQueue is None:
+            from search_worker import SearchIndexQueue
+            self.searchIndexQueue = SearchIndexQueue(self)
+            self.searchIndexQueue.indexFailed.connect(self.onSearchIndexFailed)
+        self.searchIndexQueue.schedule(filePath, invalidFrom)
+
+    def onSearchIndexFailed(self, filePath, error):
+        self.statusBar().showMessage(f"Search index update failed for {os.path.basename(filePath)}: {error}", 5000)
+
+    def maybeCompactStore(self, *args):
+        # Loose objects are packed in the background once there are enough of them.
+        from version_store import defaultStore
+        from store_maintenance import AUTO_PACK_THRESHOLD
+        if defaultStore.looseObjectCount() >= AUTO_PACK_THRESHOLD:
+            self.compactStore(collectGarbage=False)
+
+    def compactStore(self, collectGarbage):
+        if self.compactionWorker is not None:
+            if collectGarbage:
+                self.statusBar().showMessage("Version store compaction is already running.", 3000)
+            return
+        from maintenance_worker import CompactionWorker
+        self.compactionWorker = CompactionWorker(collectGarbage, self)
+        self.compactionWorker.compactionFinished.connect(self.onCompactionFinished)
+        self.compactionWorker.compactionFailed.connect(self.onCompactionFailed)
+        self.compactionWorker.finished.connect(self.onCompactionWorkerFinished)
+        self.compactionWorker.start()
+        if collectGarbage:
+            self.statusBar().showMessage("Compacting version store...")
+
+    def onCompactionFinished(self, stats):
+        from version_store import defaultStore
+        defaultStore.refreshPacks()
+        defaultStore.looseCount = None
+        if stats["migrated"]:
+            # Migrated entries now point at the store instead of a deleted .txt file.
+            for index in range(self.tabWidget.count()):
+                tab = self.tabWidget.widget(index)
+                if isinstance(tab, EditorTab) and tab.currentFile and not tab.loading:
+                    tab.loadVersionHistory()
+            self.updateVersionHistoryPanel()
+        if self.compactionWorker.collectGarbage:
+            self.statusBar().showMessage(
+                f"Packed {stats['packed']} objects, migrated {stats['migrated']} snapshots, removed "
+                f"{stats['removedObjects']} unused objects and {stats['removedSnapshots']} orphaned snapshots.", 5000)
+
+    def onCompactionFailed(self, error):
+        if self.compactionWorker.collectGarbage:
+            QMessageBox.warning(self, "Error", f"Failed to compact version store:\n{error}")
+        else:
+            self.statusBar().showMessage(f"Version store compaction failed: {error}", 5000)
+
+    def onCompactionWorkerFinished(self):
+        self.compactionWorker.deleteLater()
+        self.compactionWorker = None
+
+    def showInstrumentation(self):
+        # Opening the overlay starts recording; its checkbox turns it off again.
+        if self.instrumentationDock is None:
+            from instrumentation_dock import InstrumentationDock
+            recorder.setEnabled(True)
+            self.instrumentationDock = InstrumentationDock(self)
+            self.addDockWidget(Qt.RightDockWidgetArea, self.instrumentationDock)
+        self.instrumentationDock.show()
+        self.instrumentationDock.raise_()
+
+    def searchHistory(self):
         currentTab = self.getCurrentTab()
         if not currentTab:
             return
 
+        if not currentTab.currentFile or not currentTab.versionHistory:
+            QMessageBox.information(self, "Search History", "This file has no saved versions to search.")
+            return
+
+        phrase, ok = QInputDialog.getText(self, "Search History", "Find text in all versions:")
+        if not ok or not phrase.strip():
+            return
+
+        if self.searchIndex is None:
+            from search_index import SearchIndex
+            self.searchIndex = SearchIndex()
+        try:
+            results = self.searchIndex.search(currentTab.currentFile, phrase)
+            indexed = self.searchIndex.indexedCount(currentTab.currentFile)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to search version history:\n{str(e)}")
+            return
+        if indexed < len(currentTab.versionHistory):
+            self.scheduleSearchIndex(currentTab.currentFile)
+            self.statusBar().showMessage(
+                f"Search index covers {indexed} of {len(currentTab.versionHistory)} versions; results may be incomplete.", 5000)
+
+        if not results:
+            QMessageBox.information(self, "Search History", "No indexed version contains that text.")
+            return
+
         history = currentTab.versionHistory
-        selectedText = item.text()
+        resultList = [
+            f"{currentTab.getReadableTimestamp(history[result['lastSeq']]['timestamp'])} "
+            f"(versions {result['firstSeq'] + 1}-{result['lastSeq'] + 1}): {result['text'].strip()[:SEARCH_RESULT_TEXT]}"
+            for result in results
+        ]
+        selectedItem, ok = QInputDialog.getItem(
+            self,
+            "Search History",
+            f"{len(results)} matching lines, newest first:",
+            resultList,
+            0,
+            False
+        )
+        if ok and selectedItem:
+            result = results[resultList.index(selectedItem)]
+            self.jumpToVersionLine(currentTab, result['lastSeq'], result['text'])
+
+    def jumpToVersionLine(self, tab, seq, lineText):
+        entry = tab.versionHistory[seq]
         try:
-            readable_time, message = selectedText.split(": ", 1)
-            timestamp = datetime.strptime(readable_time, "%Y-%m-%d %H:%M:%S").strftime("%Y%m%d%H%M%S")
-        except:
-            QMessageBox.warning(self, "Error", "Invalid version format.")
+            cached = tab.getCachedVersion(entry)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to load the selected version:\n{str(e)}")
             return
 
-        versionDir = currentTab.getVersionDirectory()
-        versionFileName = os.path.join(versionDir, f"{timestamp}.txt")
+        self.resetEditorToDefault(tab, cached.content)
+        try:
+            lineNumber = cached.lines.index(lineText)
+        except ValueError:
+            lineNumber = 0
+        cursor = QTextCursor(tab.editor.document().findBlockByNumber(lineNumber))
+        tab.editor.setTextCursor(cursor)
+        tab.editor.centerCursor()
+
+    def loadSelectedVersion(self, index):
+        currentTab = self.getCurrentTab()
+        if not currentTab:
+            return
 
-        if os.path.exists(versionFileName):
-            try:
-                with open(versionFileName, 'r', encoding='utf-8') as versionFile:
-                    content = versionFile.read()
-                    self.resetEditorToDefault(currentTab, content)
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to load the selected version:\n{str(e)}")
-        else:
+        entry = index.data(VersionEntryRole)
+        if entry is None:
             QMessageBox.warning(self, "Error", "Failed to load the selected version")
+            return
+
+        try:
+            content = currentTab.readVersion(entry)
+            self.resetEditorToDefault(currentTab, content)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to load the selected version:\n{str(e)}")
 
     def resetEditorToDefault(self, tab, content):
-        tab.editor.clear()
         tab.editor.setPlainText(content)
-        cursor = tab.editor.textCursor()
-        cursor.select(QTextCursor.Document)
-        cursor.setCharFormat(tab.editor.getDefaultCharFormat())
 
     def updateVersionHistoryPanel(self):
-        try:
-            self.versionHistoryList.clear()
-        except AttributeError:
+        if not hasattr(self, 'versionHistoryList'):
             QMessageBox.warning(self, "Error", "Version History panel is not initialized.")
             return
 
         currentTab = self.getCurrentTab()
-        if not currentTab:
-            return
-        history = currentTab.versionHistory
-        for entry in history:
-            readable_time = currentTab.getReadableTimestamp(entry['timestamp'])
-            self.versionHistoryList.addItem(f"{readable_time}: {entry['message']}")
+        model = currentTab.getHistoryModel() if currentTab else self.emptyHistoryModel
+        if self.versionHistoryList.model() is not model:
+            self.versionHistoryList.setModel(model)
+
+    def closeEvent(self, event):
+        for filePath, error in self.saveQueue.waitForAll():
+            self.onSaveFailed(filePath, error)
+        if self.searchIndexQueue is not None:
+            self.searchIndexQueue.shutdown()
+        if self.compactionWorker is not None:
+            self.compactionWorker.wait()
+        for index in range(self.tabWidget.count()):
+            tab = self.tabWidget.widget(index)
+            if isinstance(tab, EditorTab):
+                tab.autosaver.shutdown()
+        try:
+            self.saveSession()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to save session:\n{str(e)}")
+        super().closeEvent(event)
 
-    def onTextChanged(self):
+    def onTextChanged(self, changes, firstBlock, lastBlock):
         # Placeholder for any future text changed handling
         pass
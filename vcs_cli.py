@@ -0,0 +1,116 @@
+import os
+import sys
+import fnmatch
+import argparse
+from vcs_core import VersionControl, VersionControlError, getReadableTimestamp
+
+
+def collectFiles(paths, patterns):
+    # Files named directly plus every file under the given directories,
+    # skipping hidden directories such as .git.
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for directory, dirNames, fileNames in os.walk(path):
+            dirNames[:] = sorted(name for name in dirNames if not name.startswith("."))
+            for name in sorted(fileNames):
+                if not patterns or any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                    yield os.path.join(directory, name)
+
+
+def formatEntry(entry):
+    digest = (entry["hash"] or "legacy")[:12]
+    return f"{entry['seq']:>6}  {digest:<12}  {getReadableTimestamp(entry['timestamp'])}  {entry['message']}"
+
+
+def runCommit(vcs, args):
+    for filePath in args.files:
+        entry = vcs.commit(filePath, args.message, skipUnchanged=args.skip_unchanged)
+        print(f"{filePath}: {'unchanged' if entry is None else formatEntry(entry)}")
+
+
+def runBatchCommit(vcs, args):
+    filePaths = list(collectFiles(args.paths, args.pattern))
+    entries, unchanged, failures = vcs.batchCommit(filePaths, args.message, args.jobs,
+                                                   skipUnchanged=not args.all)
+    for filePath, error in failures:
+        print(f"{filePath}: {error}", file=sys.stderr)
+    print(f"{len(entries)} committed, {unchanged} unchanged, {len(failures)} failed")
+    return 1 if failures else 0
+
+
+def runLog(vcs, args):
+    for entry in vcs.log(args.file, args.limit):
+        print(formatEntry(entry))
+
+
+def runShow(vcs, args):
+    sys.stdout.write(vcs.show(args.file, args.version))
+
+
+def runDiff(vcs, args):
+    sys.stdout.write(vcs.diff(args.file, args.old, args.new, args.context))
+
+
+def runRestore(vcs, args):
+    entry = vcs.restore(args.file, args.version, args.output)
+    print(f"Restored {args.output or args.file} to version {entry['seq']}")
+
+
+def buildParser():
+    parser = argparse.ArgumentParser(description="TrackText version control without the editor")
+    parser.add_argument("--root", help="version store directory (default: the editor's store)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commit = commands.add_parser("commit", help="commit files")
+    commit.add_argument("files", nargs="+")
+    commit.add_argument("-m", "--message", default="")
+    commit.add_argument("--skip-unchanged", action="store_true", help="do not commit identical content")
+    commit.set_defaults(run=runCommit)
+
+    batch = commands.add_parser("batch-commit", help="commit whole directory trees in parallel")
+    batch.add_argument("paths", nargs="+")
+    batch.add_argument("-m", "--message", default="")
+    batch.add_argument("-j", "--jobs", type=int, help="worker processes (default: CPU count)")
+    batch.add_argument("-p", "--pattern", action="append", help="only commit file names matching this glob")
+    batch.add_argument("--all", action="store_true", help="also commit files identical to their latest version")
+    batch.set_defaults(run=runBatchCommit)
+
+    log = commands.add_parser("log", help="list versions, newest first")
+    log.add_argument("file")
+    log.add_argument("-n", "--limit", type=int)
+    log.set_defaults(run=runLog)
+
+    show = commands.add_parser("show", help="print a version")
+    show.add_argument("file")
+    show.add_argument("-v", "--version", type=int, default=-1, help="sequence number; negative counts from newest")
+    show.set_defaults(run=runShow)
+
+    diff = commands.add_parser("diff", help="unified diff between versions or against the file on disk")
+    diff.add_argument("file")
+    diff.add_argument("--old", type=int, default=-1)
+    diff.add_argument("--new", type=int, help="default: the file on disk")
+    diff.add_argument("-U", "--context", type=int, default=3)
+    diff.set_defaults(run=runDiff)
+
+    restore = commands.add_parser("restore", help="write a version back to disk")
+    restore.add_argument("file")
+    restore.add_argument("-v", "--version", type=int, default=-1)
+    restore.add_argument("-o", "--output", help="write here instead of over the file")
+    restore.set_defaults(run=runRestore)
+    return parser
+
+
+def main(argv=None):
+    args = buildParser().parse_args(argv)
+    try:
+        with VersionControl(args.root) as vcs:
+            return args.run(vcs, args) or 0
+    except VersionControlError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
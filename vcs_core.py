@@ -0,0 +1,178 @@
+import os
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from store_paths import STORE_ROOT
+from version_store import VersionStore, VersionStoreError, defaultStore, readLegacySnapshot
+from history_catalog import HistoryCatalog, legacyVersionDirectory
+from line_diff import unifiedDiff
+from file_io import atomicWrite
+
+TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+BATCH_CHUNK_SIZE = 64
+
+# Store used by batch worker processes, set up once per process.
+workerStore = None
+
+
+class VersionControlError(Exception):
+    pass
+
+
+def makeTimestamp():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def getReadableTimestamp(timestamp):
+    try:
+        return datetime.strptime(timestamp, TIMESTAMP_FORMAT).strftime("%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return timestamp
+
+
+def readTextFile(filePath):
+    # newline='' here and in restore keeps line endings byte for byte.
+    try:
+        with open(filePath, 'r', encoding='utf-8', newline='') as textFile:
+            return textFile.read()
+    except (OSError, UnicodeDecodeError) as e:
+        raise VersionControlError(f"Cannot read {filePath}: {e}") from e
+
+
+def initBatchWorker(root):
+    global workerStore
+    workerStore = defaultStore if root is None else VersionStore(root)
+
+
+def storeSnapshot(task):
+    # Runs in a worker process: reads, hashes and stores one file. Returns
+    # (path, digest, error); digest is None when the file is unchanged or failed.
+    filePath, parent, skipUnchanged = task
+    try:
+        content = readTextFile(filePath)
+        if skipUnchanged and parent and workerStore.hashContent(content) == parent:
+            return filePath, None, None
+        return filePath, workerStore.put(content, parent=parent), None
+    except Exception as e:
+        return filePath, None, str(e)
+
+
+class VersionControl:
+    # Commit, history and diff operations without any UI. Every failure is
+    # raised as VersionControlError. Each instance owns its catalog connection,
+    # so use one per thread or process.
+    def __init__(self, root=None):
+        self.customRoot = root
+        self.root = root or STORE_ROOT
+        self.store = defaultStore if root is None else VersionStore(root)
+        self.catalog = HistoryCatalog(os.path.join(self.root, "catalog.sqlite3"))
+
+    def close(self):
+        self.catalog.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def history(self, filePath, create=False):
+        # Reads never write to the catalog; only commits register a file.
+        try:
+            return self.catalog.history(filePath, create)
+        except Exception as e:
+            raise VersionControlError(f"Failed to load version history: {e}") from e
+
+    def commit(self, filePath, message, content=None, skipUnchanged=False):
+        # Records `content` (the file on disk when omitted) as the newest version
+        # and returns its entry, or None when skipUnchanged and nothing changed.
+        if not filePath:
+            raise VersionControlError("No file selected for version control.")
+        if content is None:
+            content = readTextFile(filePath)
+        history = self.history(filePath, create=True)
+        latest = history.latest()
+        parent = latest["hash"] if latest else None
+        if skipUnchanged and parent and self.store.hashContent(content) == parent:
+            return None
+        try:
+            digest = self.store.put(content, parent=parent)
+            return history.append(makeTimestamp(), message, digest)
+        except Exception as e:
+            raise VersionControlError(f"Failed to save version: {e}") from e
+
+    def log(self, filePath, limit=None, offset=0):
+        # Entries newest first.
+        history = self.history(filePath)
+        if not len(history):
+            raise VersionControlError(f"{filePath} has no recorded versions")
+        return history.recent(len(history) if limit is None else limit, offset)
+
+    def entry(self, filePath, version=-1):
+        # `version` is a sequence number; negative numbers count back from the newest.
+        history = self.history(filePath)
+        try:
+            return history[version]
+        except (IndexError, TypeError) as e:
+            raise VersionControlError(f"{filePath} has no version {version}") from e
+
+    def readEntry(self, filePath, entry):
+        try:
+            if entry.get("hash"):
+                return self.store.get(entry["hash"])
+            legacyDir = entry.get("legacyDir") or legacyVersionDirectory(filePath)
+            return readLegacySnapshot(legacyDir, entry["timestamp"])
+        except (OSError, VersionStoreError) as e:
+            raise VersionControlError(f"Failed to read version {entry.get('seq')}: {e}") from e
+
+    def show(self, filePath, version=-1):
+        return self.readEntry(filePath, self.entry(filePath, version))
+
+    def diff(self, filePath, old=-1, new=None, context=3):
+        # Unified diff from version `old` to version `new`, or to the file on disk.
+        oldEntry = self.entry(filePath, old)
+        oldText = self.readEntry(filePath, oldEntry)
+        if new is None:
+            newText, newLabel = readTextFile(filePath), filePath
+        else:
+            newEntry = self.entry(filePath, new)
+            newText, newLabel = self.readEntry(filePath, newEntry), f"{filePath}@{newEntry['seq']}"
+        return "".join(unifiedDiff(oldText.splitlines(keepends=True), newText.splitlines(keepends=True),
+                                   f"{filePath}@{oldEntry['seq']}", newLabel, n=context))
+
+    def restore(self, filePath, version=-1, outputPath=None):
+        # Writes a version back to disk atomically and returns its entry.
+        entry = self.entry(filePath, version)
+        content = self.readEntry(filePath, entry)
+        try:
+            atomicWrite(outputPath or filePath, content, newline='')
+        except OSError as e:
+            raise VersionControlError(f"Failed to restore {filePath}: {e}") from e
+        return entry
+
+    def batchCommit(self, filePaths, message, jobs=None, skipUnchanged=True):
+        # Snapshots many files at once. Reading, hashing and delta-compressing
+        # run in a process pool; the catalog is then updated in one transaction.
+        # Returns (entries, unchanged, failures) with failures as (path, error).
+        tasks = []
+        for filePath in filePaths:
+            path = HistoryCatalog.normalizePath(filePath)
+            latest = self.history(path, create=True).latest()
+            tasks.append((path, latest["hash"] if latest else None, skipUnchanged))
+
+        if jobs == 1 or len(tasks) <= 1:
+            initBatchWorker(self.customRoot)
+            results = list(map(storeSnapshot, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=initBatchWorker,
+                                     initargs=(self.customRoot,)) as executor:
+                results = list(executor.map(storeSnapshot, tasks, chunksize=BATCH_CHUNK_SIZE))
+
+        timestamp = makeTimestamp()
+        stored = [(path, timestamp, message, digest) for path, digest, error in results if digest]
+        failures = [(path, error) for path, digest, error in results if error]
+        unchanged = len(results) - len(stored) - len(failures)
+        try:
+            entries = self.catalog.appendMany(stored)
+        except Exception as e:
+            raise VersionControlError(f"Failed to update version history: {e}") from e
+        return entries, unchanged, failures
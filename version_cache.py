@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+
+DEFAULT_BUDGET = 256 << 20
+LINE_OVERHEAD = 64
+
+
+def versionKey(entry):
+    if entry.get("hash"):
+        return entry["hash"]
+    return ("legacy", entry.get("legacyDir"), entry["timestamp"])
+
+
+class CachedVersion:
+    __slots__ = ("cache", "key", "content", "size", "_lines")
+
+    def __init__(self, cache, key, content):
+        self.cache = cache
+        self.key = key
+        self.content = content
+        self.size = len(content) + LINE_OVERHEAD
+        self._lines = None
+
+    @property
+    def lines(self):
+        # Shared between diffs against the same base: the list is split once and
+        # each str caches its own hash, so interning it again is cheap.
+        if self._lines is None:
+            self._lines = self.content.splitlines()
+            self.cache.grow(self, len(self._lines) * LINE_OVERHEAD)
+        return self._lines
+
+
+class VersionCache:
+    # LRU of reconstructed version texts shared by every tab, bounded by an
+    # approximate byte budget. Safe to use from diff worker threads.
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, load):
+        with self.lock:
+            cached = self.entries.get(key)
+            if cached is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        cached = CachedVersion(self, key, load())
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.used -= previous.size
+            self.entries[key] = cached
+            self.used += cached.size
+            self.evict()
+        return cached
+
+    def content(self, key, load):
+        return self.get(key, load).content
+
+    def grow(self, cached, extra):
+        with self.lock:
+            cached.size += extra
+            if self.entries.get(cached.key) is cached:
+                self.used += extra
+                self.evict()
+
+    def evict(self):
+        # Always keep the most recently used entry, even if it alone exceeds the budget.
+        while self.used > self.budget and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.used -= evicted.size
+
+    def invalidate(self, key):
+        with self.lock:
+            cached = self.entries.pop(key, None)
+            if cached is not None:
+                self.used -= cached.size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.used = 0
+
+    def setBudget(self, budget):
+        with self.lock:
+            self.budget = budget
+            self.evict()
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries),
+                    "bytes": self.used, "budget": self.budget}
+
+
+versionCache = VersionCache()
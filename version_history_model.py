@@ -0,0 +1,67 @@
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+VersionIdRole = Qt.UserRole
+VersionEntryRole = Qt.UserRole + 1
+FETCH_BATCH = 200
+
+
+class VersionHistoryModel(QAbstractListModel):
+    # Newest-first view over a VersionHistory. Rows are fetched from the catalog
+    # in batches as the view scrolls; commits made while the model is alive are
+    # inserted at the top without touching the rows already loaded.
+    def __init__(self, history, formatTimestamp, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.formatTimestamp = formatTimestamp
+        self.added = []
+        self.fetched = []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.added) + len(self.fetched)
+
+    def entryAt(self, row):
+        if row < len(self.added):
+            return self.added[len(self.added) - 1 - row]
+        return self.fetched[row - len(self.added)]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self.rowCount():
+            return None
+        entry = self.entryAt(index.row())
+        if role == Qt.DisplayRole:
+            return f"{self.formatTimestamp(entry['timestamp'])}: {entry['message']}"
+        if role == VersionIdRole:
+            return entry['id']
+        if role == VersionEntryRole:
+            return entry
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.rowCount() < len(self.history)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        loaded = self.rowCount()
+        entries = self.history.recent(min(FETCH_BATCH, len(self.history) - loaded), offset=loaded)
+        if not entries:
+            return
+        self.beginInsertRows(QModelIndex(), loaded, loaded + len(entries) - 1)
+        self.fetched.extend(entries)
+        self.endInsertRows()
+
+    def versionAdded(self, entry):
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.added.append(entry)
+        self.endInsertRows()
+
+    def versionUpdated(self, entry):
+        row = len(self.history) - 1 - entry['seq']
+        if not 0 <= row < self.rowCount():
+            return
+        current = self.entryAt(row)
+        current.update(entry)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
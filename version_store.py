@@ -0,0 +1,281 @@
+import os
+import json
+import zlib
+import time
+import hashlib
+import threading
+from line_diff import getOpcodes
+from pack_store import Pack, PackError, writePack, listPacks, removePack
+from store_paths import STORE_ROOT
+from file_io import replaceFile
+
+KEYFRAME_INTERVAL = 16
+HEADER_LIMIT = 128
+GC_GRACE_PERIOD = 3600
+
+KEYFRAME = b"K"
+DELTA = b"D"
+
+
+class VersionStoreError(Exception):
+    pass
+
+
+class VersionStore:
+    # Snapshots are addressed by the sha256 of their text. Each object is either
+    # a zlib-compressed keyframe or a compressed line delta against a keyframe,
+    # so restoring any version costs at most one keyframe plus one delta.
+    def __init__(self, root=None, keyframeInterval=KEYFRAME_INTERVAL):
+        self.root = root or STORE_ROOT
+        self.objectDir = os.path.join(self.root, "objects")
+        self.keyframeInterval = keyframeInterval
+        self.packDir = os.path.join(self.root, "packs")
+        self.packs = None
+        self.packLock = threading.Lock()
+        self.looseCount = None
+
+    @staticmethod
+    def hashContent(content):
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def objectPath(self, digest):
+        return os.path.join(self.objectDir, digest[:2], digest[2:])
+
+    def contains(self, digest):
+        return os.path.exists(self.objectPath(digest)) or self.packedRecord(digest) is not None
+
+    def put(self, content, parent=None):
+        digest = self.hashContent(content)
+        if self.contains(digest):
+            return digest
+
+        data = content.encode('utf-8')
+        record = None
+        if parent and parent != digest and self.contains(parent):
+            record = self.encodeDelta(content, data, parent)
+        if record is None:
+            record = KEYFRAME + b"\n" + zlib.compress(data, 6)
+        self.writeObject(digest, record)
+        return digest
+
+    def get(self, digest):
+        kind, header, payload = self.readObject(digest)
+        if kind == KEYFRAME:
+            return zlib.decompress(payload).decode('utf-8')
+        base = header[0]
+        baseKind, _, basePayload = self.readObject(base)
+        if baseKind != KEYFRAME:
+            raise VersionStoreError(f"Delta base {base} is not a keyframe")
+        baseLines = zlib.decompress(basePayload).decode('utf-8').splitlines(keepends=True)
+        return self.applyDelta(baseLines, json.loads(zlib.decompress(payload)))
+
+    def encodeDelta(self, content, data, parent):
+        kind, header, _ = self.readObject(parent)
+        if kind == KEYFRAME:
+            base, depth = parent, 1
+        else:
+            base, depth = header[0], int(header[1]) + 1
+        if depth >= self.keyframeInterval:
+            return None
+
+        baseLines = self.get(base).splitlines(keepends=True)
+        newLines = content.splitlines(keepends=True)
+        ops = []
+        for tag, i1, i2, j1, j2 in getOpcodes(baseLines, newLines):
+            if tag == 'equal':
+                ops.append([i1, i2])
+            elif j2 > j1:
+                ops.append("".join(newLines[j1:j2]))
+
+        delta = zlib.compress(json.dumps(ops, separators=(',', ':')).encode('utf-8'), 6)
+        # A delta that is not clearly smaller than the text is better stored whole.
+        if len(delta) * 2 > len(data):
+            keyframe = zlib.compress(data, 6)
+            if len(keyframe) <= len(delta):
+                return None
+        return DELTA + f" {base} {depth}\n".encode('ascii') + delta
+
+    @staticmethod
+    def applyDelta(baseLines, ops):
+        parts = []
+        for op in ops:
+            if isinstance(op, str):
+                parts.append(op)
+            else:
+                parts.extend(baseLines[op[0]:op[1]])
+        return "".join(parts)
+
+    def readObject(self, digest):
+        try:
+            with open(self.objectPath(digest), 'rb') as objectFile:
+                record = objectFile.read()
+        except OSError as e:
+            record = self.packedRecord(digest)
+            if record is None:
+                raise VersionStoreError(f"Missing version object {digest}") from e
+        # Packed records are memoryviews into the mapped pack; only the header is copied.
+        headerEnd = bytes(record[:HEADER_LIMIT]).index(b"\n")
+        header = bytes(record[:headerEnd]).split(b" ")
+        return header[0], [field.decode('ascii') for field in header[1:]], record[headerEnd + 1:]
+
+    def writeObject(self, digest, record):
+        objectPath = self.objectPath(digest)
+        os.makedirs(os.path.dirname(objectPath), exist_ok=True)
+        replaceFile(objectPath, record)
+        if self.looseCount is not None:
+            self.looseCount += 1
+
+    def loadedPacks(self):
+        packs = self.packs
+        return self.refreshPacks() if packs is None else packs
+
+    def refreshPacks(self):
+        # Packs that disappeared are only dropped, not closed: another thread may
+        # still be reading from them, and the mapping goes away with the last record.
+        with self.packLock:
+            current = {pack.packPath: pack for pack in self.packs or []}
+            packs = []
+            for packPath in listPacks(self.packDir):
+                pack = current.get(packPath)
+                if pack is None:
+                    try:
+                        pack = Pack(packPath)
+                    except (OSError, PackError):
+                        continue
+                packs.append(pack)
+            self.packs = packs
+            return packs
+
+    def packedRecord(self, digest):
+        for pack in self.loadedPacks():
+            record = pack.record(digest)
+            if record is not None:
+                return record
+        # Another process may have packed the object since the packs were listed.
+        known = {pack.packPath for pack in self.packs}
+        for pack in self.refreshPacks():
+            if pack.packPath not in known:
+                record = pack.record(digest)
+                if record is not None:
+                    return record
+        return None
+
+    def looseObjects(self):
+        try:
+            fanOut = os.listdir(self.objectDir)
+        except OSError:
+            return
+        for prefix in fanOut:
+            if len(prefix) != 2:
+                continue
+            try:
+                names = os.listdir(os.path.join(self.objectDir, prefix))
+            except OSError:
+                continue
+            for name in names:
+                if len(name) == 62 and "." not in name:
+                    yield prefix + name
+
+    def looseObjectCount(self):
+        if self.looseCount is None:
+            self.looseCount = sum(1 for _ in self.looseObjects())
+        return self.looseCount
+
+    def removeLoose(self, digest):
+        # Fan-out directories are left in place: removing one could race a
+        # concurrent writeObject between its makedirs and open.
+        try:
+            os.remove(self.objectPath(digest))
+        except OSError:
+            pass
+
+    def pack(self):
+        # Moves every loose object into one new pack and returns how many were packed.
+        packed = []
+
+        def looseRecords():
+            for digest in self.looseObjects():
+                try:
+                    with open(self.objectPath(digest), 'rb') as objectFile:
+                        record = objectFile.read()
+                except OSError:
+                    continue
+                packed.append(digest)
+                yield digest, record
+
+        if writePack(self.packDir, looseRecords()) is None:
+            return 0
+        self.refreshPacks()
+        for digest in packed:
+            self.removeLoose(digest)
+        self.looseCount = None
+        return len(packed)
+
+    def reachableFrom(self, digests):
+        # Versions plus the keyframes their deltas are based on.
+        reachable = set()
+        pending = list(digests)
+        while pending:
+            digest = pending.pop()
+            if digest in reachable:
+                continue
+            try:
+                kind, header, _ = self.readObject(digest)
+            except VersionStoreError:
+                continue
+            reachable.add(digest)
+            if kind == DELTA:
+                pending.append(header[0])
+        return reachable
+
+    def collectGarbage(self, roots):
+        # Removes objects not reachable from roots and rewrites packs that hold
+        # any. Objects younger than GC_GRACE_PERIOD are kept: they may belong to
+        # a commit whose catalog entry is still being written.
+        reachable = self.reachableFrom(roots)
+        cutoff = time.time() - GC_GRACE_PERIOD
+        removed = 0
+        for digest in list(self.looseObjects()):
+            if digest in reachable:
+                continue
+            try:
+                if os.path.getmtime(self.objectPath(digest)) > cutoff:
+                    continue
+            except OSError:
+                continue
+            self.removeLoose(digest)
+            removed += 1
+
+        stale = []
+        for pack in self.refreshPacks():
+            try:
+                recent = os.path.getmtime(pack.packPath) > cutoff
+            except OSError:
+                continue
+            if not recent and any(digest not in reachable for digest in pack.digests()):
+                stale.append(pack)
+        if stale:
+            kept = {}
+            for pack in stale:
+                for digest in pack.digests():
+                    if digest in reachable:
+                        kept.setdefault(digest, pack)
+                    else:
+                        removed += 1
+            writePack(self.packDir, ((digest, kept[digest].record(digest)) for digest in sorted(kept)))
+            for pack in stale:
+                removePack(pack.packPath)
+            self.refreshPacks()
+            for pack in stale:
+                pack.close()
+        self.looseCount = None
+        return removed
+
+
+def readLegacySnapshot(versionDir, timestamp):
+    versionFileName = os.path.join(versionDir, f"{timestamp}.txt")
+    with open(versionFileName, 'r', encoding='utf-8') as versionFile:
+        return versionFile.read()
+
+
+defaultStore = VersionStore()